@@ -0,0 +1,344 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+# --- Benchmark suite ---
+# Offline benchmarks of the scoring CLI's startup, calculate_reimbursement per
+# path, throughput over the case files, end-to-end eval and one tuner pass.
+# Each section yields flat metrics named "<section>.<subject>.<measure>_<unit>";
+# all are lower-is-better except "_per_s" rates. Results are written as JSON to
+# BENCH_OUTPUT and compared against BENCH_BASELINE, which is machine-specific:
+# refresh it with --update-baseline when moving to different hardware.
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BENCH_OUTPUT = "bench_output.txt"
+BENCH_BASELINE = "bench_baseline.json"
+# A metric regresses when it is more than this fraction worse than the baseline;
+# timings on shared or virtualized machines vary by tens of percent between runs
+DEFAULT_TOLERANCE = 0.50
+SAMPLE_ARGS = ["5", "250", "150.75"]
+STARTUP_RUNS = 20
+
+# --- Startup ---
+# eval.sh and generate_results.sh start one interpreter per case, so most of
+# their wall time is startup. These measure cold-start wall time of each entry
+# point and which modules each one imports beyond the bare interpreter. Note
+# that a script is compiled on every run while imported modules are loaded from
+# __pycache__ (unless PYTHONDONTWRITEBYTECODE is set), which is why run.py
+# starts faster than solution.py itself.
+
+# name -> command, run from ROOT
+STARTUP_COMMANDS = {
+    "interpreter": [sys.executable, "-c", "pass"],
+    "interpreter -S": [sys.executable, "-S", "-c", "pass"],
+    "solution.py": [sys.executable, "solution.py", *SAMPLE_ARGS],
+    "solution.py -S": [sys.executable, "-S", "solution.py", *SAMPLE_ARGS],
+    "run.py": [sys.executable, "run.py", *SAMPLE_ARGS],
+    "run.py -S": [sys.executable, "-S", "run.py", *SAMPLE_ARGS],
+    "run.sh": ["./run.sh", *SAMPLE_ARGS],
+}
+
+# Entry points whose -X importtime breakdown is reported, with the bare
+# interpreter command their imports are compared against
+IMPORT_COMMANDS = {
+    "solution.py": ([sys.executable, "solution.py", *SAMPLE_ARGS], [sys.executable, "-c", "pass"]),
+    "run.py": ([sys.executable, "run.py", *SAMPLE_ARGS], [sys.executable, "-c", "pass"]),
+}
+
+def time_command(command, runs=STARTUP_RUNS, warmup=True):
+    """Wall times of `runs` executions of command in milliseconds, after one warm-up run."""
+    env = {**os.environ, "REIMBURSEMENT_SOCKET": os.devnull}  # keep run.sh off a resident server
+    if warmup:
+        subprocess.run(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, check=True)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter_ns()
+        subprocess.run(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter_ns() - start) / 1e6)
+    return times
+
+def imported_modules(command):
+    """
+    [(module, self_us, cumulative_us)] from `python -X importtime`, in import
+    order. command must start with the interpreter.
+    """
+    result = subprocess.run([command[0], "-X", "importtime", *command[1:]], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+def import_breakdown(command, baseline_command):
+    """Modules command imports that baseline_command doesn't, costliest first, and their total self time in us."""
+    baseline = {name for name, _, _ in imported_modules(baseline_command)}
+    extra = [(name, self_us, cumulative_us) for name, self_us, cumulative_us in imported_modules(command)
+             if name not in baseline]
+    extra.sort(key=lambda module: module[1], reverse=True)
+    return extra, sum(self_us for _, self_us, _ in extra)
+
+def bench_startup(runs=STARTUP_RUNS):
+    """Startup metrics, and the per-module import breakdown of each entry point as details."""
+    metrics, details = {}, {}
+    for name, command in STARTUP_COMMANDS.items():
+        times = time_command(command, runs)
+        metrics[f"startup.{name}.min_ms"] = min(times)
+        metrics[f"startup.{name}.median_ms"] = statistics.median(times)
+    for name, (command, baseline_command) in IMPORT_COMMANDS.items():
+        extra, total_us = import_breakdown(command, baseline_command)
+        metrics[f"imports.{name}.modules_count"] = len(extra)
+        # Per-module times are too noisy to gate on, so they are only reported
+        details[f"imports.{name}"] = {
+            "total_self_us": total_us,
+            "modules": [{"name": n, "self_us": s, "cumulative_us": c} for n, s, c in extra],
+        }
+    return metrics, details
+
+# --- Per-path latency ---
+# One input per PathCode, chosen well inside its branch
+PATH_INPUTS = {
+    "EXTREME_HIGH": (1, 900, 2000.0),
+    "EXTREME_LOW": (1, 900, 1000.0),
+    "VACATION": (10, 900, 2000.0),
+    "LONG_TRIP": (12, 800, 900.0),
+    "LOW_TIER": (5, 250, 150.75),
+    "STANDARD_TIER": (4, 300, 500.0),
+    "SWEET_SPOT_TIER": (3, 300, 775.0),
+    "HIGH_TIER": (5, 500, 1200.0),
+    "ONE_DAY_UPPER": (1, 100, 900.0),
+    "ONE_DAY": (1, 100, 600.0),
+    "TWO_DAY_UPPER": (2, 100, 900.0),
+    "TWO_DAY": (2, 100, 600.0),
+}
+LATENCY_REPEATS = 5
+
+def call_ns(fn, repeats=LATENCY_REPEATS):
+    """Best-of-repeats time of one fn() call in nanoseconds, each repeat running about 0.2 s."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeats, number=number)) / number * 1e9
+
+def bench_paths(repeats=LATENCY_REPEATS):
+    """
+    Per-call latency of calculate_reimbursement on each path: with the
+    CLI's string arguments (including sanitization) and, as fast_ns, with
+    numbers through calculate_reimbursement_fast.
+    """
+    from solution import calculate_reimbursement, calculate_reimbursement_fast, PathCode
+    metrics = {}
+    for name, (days, miles, receipts) in PATH_INPUTS.items():
+        record = calculate_reimbursement_fast(days, miles, receipts, breakdown=True)
+        if record.code is not PathCode[name]:
+            raise AssertionError(f"PATH_INPUTS[{name!r}] takes path {record.code.name}")
+        args = (str(days), str(miles), str(receipts))
+        metrics[f"paths.{name}.cli_ns"] = call_ns(lambda: calculate_reimbursement(*args), repeats)
+        metrics[f"paths.{name}.fast_ns"] = call_ns(lambda: calculate_reimbursement_fast(days, miles, receipts), repeats)
+    return metrics, {}
+
+# --- Throughput ---
+THROUGHPUT_FILES = ("public_cases.json", "private_cases.json")
+THROUGHPUT_REPEATS = 5
+
+def best_seconds(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def bench_throughput(repeats=THROUGHPUT_REPEATS):
+    """Cases per second over each case file: scalar, compiled-config and NumPy batch engines."""
+    from case_store import load_case_store
+    from solution import calculate_reimbursement_fast, calculate_reimbursement_batch, compile_config
+    metrics = {}
+    for path in THROUGHPUT_FILES:
+        store = load_case_store(os.path.join(ROOT, path))
+        days, miles, receipts, _ = store.arrays()
+        inputs = list(zip(days.tolist(), miles.tolist(), receipts.tolist()))
+        calculate = compile_config()
+        engines = {
+            "scalar": lambda: [calculate_reimbursement_fast(d, m, r) for d, m, r in inputs],
+            "compiled": lambda: [calculate(d, m, r) for d, m, r in inputs],
+            "batch": lambda: calculate_reimbursement_batch(days, miles, receipts),
+        }
+        name = os.path.splitext(path)[0]
+        for engine, fn in engines.items():
+            metrics[f"throughput.{name}.{engine}_per_s"] = len(inputs) / best_seconds(fn, repeats)
+    return metrics, {}
+
+# --- End-to-end eval ---
+# name -> (command, runs); the black-box mode starts an interpreter per case
+EVAL_COMMANDS = {
+    "eval.py": ([sys.executable, "eval.py"], 3),
+    "eval.py --workers 1": ([sys.executable, "eval.py", "--workers", "1"], 3),
+    "eval.py --subprocess": ([sys.executable, "eval.py", "--subprocess"], 1),
+}
+
+def bench_eval():
+    """Wall time of eval.py end to end in each mode, including interpreter startup."""
+    metrics = {}
+    for name, (command, runs) in EVAL_COMMANDS.items():
+        metrics[f"eval.{name}.wall_ms"] = min(time_command(command, runs, warmup=False))
+    return metrics, {}
+
+# --- Tuner iteration ---
+# name -> tuner arguments; each run is one coordinate-descent pass from DEFAULT_CONFIG
+TUNER_MODES = {
+    "grid": [],
+    "vectorized": ["--vectorized"],
+}
+
+def bench_tuner():
+    """Time of one tuner.main coordinate-descent iteration in each mode, with its output discarded."""
+    import tuner
+    metrics = {}
+    for name, tuner_args in TUNER_MODES.items():
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            tuner.main([*tuner_args, "--max-iterations", "1"])
+        metrics[f"tuner.{name}.iteration_ms"] = (time.perf_counter() - start) * 1000
+    return metrics, {}
+
+SECTIONS = {
+    "startup": bench_startup,
+    "paths": bench_paths,
+    "throughput": bench_throughput,
+    "eval": bench_eval,
+    "tuner": bench_tuner,
+}
+
+# --- Baseline comparison ---
+def regression_ratio(name, value, baseline):
+    """How many times worse value is than baseline (above 1 is slower)."""
+    if name.endswith("_per_s"):
+        value, baseline = baseline, value
+    if baseline == 0:
+        return 1.0 if value == 0 else float("inf")
+    return value / baseline
+
+def compare_to_baseline(metrics, baseline, tolerance=DEFAULT_TOLERANCE):
+    """[(name, value, baseline value, ratio, regressed)] for each metric present in both."""
+    comparison = []
+    for name, value in metrics.items():
+        if name not in baseline:
+            continue
+        ratio = regression_ratio(name, value, baseline[name])
+        comparison.append((name, value, baseline[name], ratio, ratio > 1 + tolerance))
+    return comparison
+
+def environment():
+    import numpy
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "machine": platform.machine(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": numpy.__version__}
+
+def format_value(name, value):
+    unit = name.rsplit("_", 1)[-1]
+    if unit == "count":
+        return f"{value:.0f}"
+    return f"{value:,.0f} /s" if unit == "s" else f"{value:,.2f} {unit}"
+
+def print_report(metrics, comparison, details, file=sys.stdout):
+    compared = {name: (baseline, ratio, regressed) for name, _, baseline, ratio, regressed in comparison}
+    for name, value in metrics.items():
+        line = f"  {name:<48} {format_value(name, value):>16}"
+        if name in compared:
+            baseline, ratio, regressed = compared[name]
+            line += f"  baseline {format_value(name, baseline):>16}  x{ratio:.2f}" + ("  REGRESSION" if regressed else "")
+        print(line, file=file)
+    for name, imports in details.items():
+        if name.startswith("imports.") and imports["modules"]:
+            print(f"\n{name[len('imports.'):]} imports beyond the bare interpreter: "
+                  f"{imports['total_self_us'] / 1000:.2f} ms self time", file=file)
+            for module in imports["modules"]:
+                print(f"  {module['name']:<30} {module['self_us']:>7} us self  {module['cumulative_us']:>7} us cumulative", file=file)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks with baseline comparison.")
+    parser.add_argument('sections', nargs='*', metavar='section',
+                        help=f"Sections to run (default: all of {', '.join(SECTIONS)}).")
+    parser.add_argument('--runs', type=int, default=STARTUP_RUNS,
+                        help=f"Cold starts per startup command (default: {STARTUP_RUNS}).")
+    parser.add_argument('--repeats', type=int, default=None,
+                        help=f"Timing repeats for the paths and throughput sections, best taken "
+                             f"(default: {LATENCY_REPEATS} and {THROUGHPUT_REPEATS}).")
+    parser.add_argument('--output', default=BENCH_OUTPUT,
+                        help=f"Where to write the results as JSON (default: {BENCH_OUTPUT}).")
+    parser.add_argument('--baseline', default=BENCH_BASELINE,
+                        help=f"Baseline metrics to compare against (default: {BENCH_BASELINE}).")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Fraction a metric may be worse than its baseline before it fails (default: {DEFAULT_TOLERANCE}).")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Merge these results into the baseline instead of gating on it.")
+    args = parser.parse_args(argv)
+    unknown = [section for section in args.sections if section not in SECTIONS]
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(unknown)} (choose from {', '.join(SECTIONS)})")
+    return args
+
+def main(argv=None):
+    """Runs the benchmarks and returns the exit status: 1 if any metric regressed against the baseline."""
+    args = parse_args(argv)
+    os.chdir(ROOT)
+    options = {"startup": {"runs": args.runs}}
+    if args.repeats:
+        options["paths"] = options["throughput"] = {"repeats": args.repeats}
+    metrics, details = {}, {}
+    for section in args.sections or SECTIONS:
+        print(f"Running {section} benchmarks...", file=sys.stderr)
+        section_metrics, section_details = SECTIONS[section](**options.get(section, {}))
+        metrics.update(section_metrics)
+        details.update(section_details)
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)["metrics"]
+    except FileNotFoundError:
+        baseline = {}
+    comparison = [] if args.update_baseline else compare_to_baseline(metrics, baseline, args.tolerance)
+    regressions = [name for name, _, _, _, regressed in comparison if regressed]
+
+    results = {
+        "environment": environment(),
+        "metrics": metrics,
+        "baseline": args.baseline,
+        "tolerance": args.tolerance,
+        "comparison": [{"metric": name, "value": value, "baseline": base, "ratio": ratio, "regressed": regressed}
+                       for name, value, base, ratio, regressed in comparison],
+        "regressions": regressions,
+        "details": details,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+    print_report(metrics, comparison, details)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            stored = {**baseline, **{name: round(value, 3) for name, value in metrics.items()}}
+            json.dump({"environment": results["environment"], "metrics": stored}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline {args.baseline} updated with {len(metrics)} metrics.")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed more than {args.tolerance:.0%} against {args.baseline}: "
+              + ", ".join(regressions))
+        return 1
+    print(f"\nResults written to {args.output}; no regressions against {args.baseline}." if baseline else
+          f"\nResults written to {args.output}; no baseline at {args.baseline} (create one with --update-baseline).")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+from solution import iter_chunks, STREAM_CHUNK_SIZE
+
+# --- Columnar case store ---
+# A case file (public_cases.json style, or private_cases.json style without
+# expected outputs) converted to one binary file of fixed-width columns that
+# are memory-mapped straight into NumPy arrays. The JSON file stays the source
+# of truth: its size and mtime are recorded in the header, and the store is
+# rebuilt whenever they change.
+#
+# Layout: MAGIC, a little-endian uint64 header length, a JSON header and then
+# each column at a COLUMN_ALIGNMENT-aligned offset.
+#
+# Cases read back from the store must print exactly like the JSON values (the
+# CLI arguments are built from them, and "93" is not "93.0"), so a float
+# column holding some JSON integers gets a uint8 companion column,
+# "<name>_is_int", flagging them.
+MAGIC = b"CASESTR2"
+INT_FLAG_SUFFIX = "_is_int"
+COLUMN_ALIGNMENT = 64
+STORE_SUFFIX = ".cases.bin"
+
+def iter_json_records(f, buffer_size=1 << 16):
+    """
+    Yields the records of a JSON array, or of JSON lines, read incrementally
+    from the text file f, so memory doesn't grow with the file.
+    Raises json.JSONDecodeError on malformed JSON.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+    in_array = None
+    while True:
+        # Skip whitespace, and inside an array the commas between records
+        separators = ' \t\r\n,' if in_array else ' \t\r\n'
+        while True:
+            while position < len(buffer) and buffer[position] in separators:
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            buffer, position = f.read(buffer_size), 0
+            eof = not buffer
+        if position >= len(buffer):
+            if in_array:
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, position)
+            return
+        if in_array is None:
+            in_array = buffer[position] == '['
+            if in_array:
+                position += 1
+                continue
+        if in_array and buffer[position] == ']':
+            return
+
+        # Decode one record, reading more until it is complete. Objects, arrays
+        # and strings end with their closing character, but a number may have
+        # been cut short (e.g. "1." of "1.5") unless a delimiter follows it.
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                if eof or (end < len(buffer) and (isinstance(record, (dict, list, str)) or buffer[end] in ' \t\r\n,]')):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            more = f.read(buffer_size)
+            eof = not more
+            buffer, position = buffer[position:] + more, 0
+        position = end
+        yield record
+
+def record_fields(record):
+    """(days, miles, receipts, expected or None) of a public- or private-style case record."""
+    inputs = record.get('input', record)
+    return (inputs['trip_duration_days'], inputs['miles_traveled'], inputs['total_receipts_amount'],
+            record.get('expected_output'))
+
+def default_store_path(json_path):
+    return os.path.splitext(json_path)[0] + STORE_SUFFIX
+
+def _source_stamp(json_path):
+    stat = os.stat(json_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _aligned(offset):
+    return -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+
+def build_case_store(json_path, store_path=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Converts json_path into a case store at store_path (default: next to it,
+    with STORE_SUFFIX), streaming the records so memory stays flat. Days are
+    int16 and must be JSON integers; receipts/expected are float64. Miles are
+    int32 when every value is a JSON integer in range and float64 otherwise.
+    Expected outputs are stored only if every record has one. Returns store_path.
+    Raises ValueError on days that aren't integers in int16 range.
+    """
+    store_path = store_path or default_store_path(json_path)
+    stamp = _source_stamp(json_path)
+    count = 0
+    integral_miles = True
+    has_expected = True
+    # Whether any value of each float column was a JSON integer
+    any_int = {'miles': False, 'receipts': False, 'expected': False}
+    int16, int32 = np.iinfo(np.int16), np.iinfo(np.int32)
+
+    names = ('days', 'miles', 'receipts', 'expected') + tuple(name + INT_FLAG_SUFFIX for name in any_int)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(store_path))) as tmp:
+        column_paths = {name: os.path.join(tmp, name) for name in names}
+        column_files = {name: open(path, 'wb') for name, path in column_paths.items()}
+        try:
+            with open(json_path, 'r') as f:
+                for chunk in iter_chunks(iter_json_records(f), chunk_size):
+                    fields = [record_fields(record) for record in chunk]
+                    if not all(type(d) is int for d, _, _, _ in fields):
+                        raise ValueError(f"{json_path}: trip_duration_days must be whole numbers")
+                    days = np.array([d for d, _, _, _ in fields], dtype=np.float64)
+                    miles = np.array([m for _, m, _, _ in fields], dtype=np.float64)
+                    receipts = np.array([r for _, _, r, _ in fields], dtype=np.float64)
+                    expected = np.array([np.nan if e is None else e for _, _, _, e in fields], dtype=np.float64)
+                    if ((days < int16.min) | (days > int16.max)).any():
+                        raise ValueError(f"{json_path}: trip_duration_days out of int16 range")
+                    is_int = {name: np.array([type(f[i]) is int for f in fields], dtype=np.uint8)
+                              for i, name in enumerate(('miles', 'receipts', 'expected'), start=1)}
+                    integral_miles = integral_miles and bool(
+                        is_int['miles'].all() and (miles >= int32.min).all() and (miles <= int32.max).all()
+                    )
+                    has_expected = has_expected and all(e is not None for _, _, _, e in fields)
+                    days.astype(np.int16).tofile(column_files['days'])
+                    miles.tofile(column_files['miles'])
+                    receipts.tofile(column_files['receipts'])
+                    expected.tofile(column_files['expected'])
+                    for name, flags in is_int.items():
+                        any_int[name] = any_int[name] or bool(flags.any())
+                        flags.tofile(column_files[name + INT_FLAG_SUFFIX])
+                    count += len(chunk)
+        finally:
+            for column_file in column_files.values():
+                column_file.close()
+
+        # (name, stored dtype, dtype of the temporary column file)
+        columns = [('days', '<i2', '<i2'), ('miles', '<i4' if integral_miles else '<f8', '<f8'), ('receipts', '<f8', '<f8')]
+        if has_expected:
+            columns.append(('expected', '<f8', '<f8'))
+        for name, dtype, _ in list(columns):
+            if dtype == '<f8' and any_int[name]:
+                columns.append((name + INT_FLAG_SUFFIX, '|u1', '|u1'))
+
+        # Offsets depend on the header length, which depends on the offsets;
+        # reserving room for them up front settles it in one pass.
+        header = {'count': count, 'source': stamp, 'columns': {}}
+        header_length = len(json.dumps({**header, 'columns': {name: [dtype, 2 ** 63] for name, dtype, _ in columns}}).encode())
+        offset = _aligned(len(MAGIC) + 8 + header_length)
+        for name, dtype, _ in columns:
+            header['columns'][name] = [dtype, offset]
+            offset = _aligned(offset + count * np.dtype(dtype).itemsize)
+        header_bytes = json.dumps(header).encode().ljust(header_length)
+
+        tmp_store = os.path.join(tmp, 'store')
+        with open(tmp_store, 'wb') as out:
+            out.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+            for name, dtype, source_dtype in columns:
+                out.seek(header['columns'][name][1])
+                with open(column_paths[name], 'rb') as column_file:
+                    for start in range(0, count, chunk_size):
+                        values = np.fromfile(column_file, dtype=source_dtype, count=min(chunk_size, count - start))
+                        values.astype(dtype).tofile(out)
+            out.truncate(offset)
+        os.replace(tmp_store, store_path)
+    return store_path
+
+def read_store_header(store_path):
+    with open(store_path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{store_path} is not a case store")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        return json.loads(f.read(header_length))
+
+def open_case_store(store_path):
+    """Memory-maps the columns of the case store at store_path as a CaseStore."""
+    header = read_store_header(store_path)
+    count = header['count']
+    arrays = {}
+    for name, (dtype, offset) in header['columns'].items():
+        if count:
+            arrays[name] = np.memmap(store_path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+        else:
+            arrays[name] = np.zeros(0, dtype=dtype)
+    int_flags = {name[:-len(INT_FLAG_SUFFIX)]: array for name, array in arrays.items() if name.endswith(INT_FLAG_SUFFIX)}
+    return CaseStore(arrays['days'], arrays['miles'], arrays['receipts'], arrays.get('expected'), int_flags)
+
+def load_case_store(json_path, store_path=None):
+    """The CaseStore for json_path, (re)building the store first if it is missing or the JSON file changed."""
+    store_path = store_path or default_store_path(json_path)
+    try:
+        fresh = read_store_header(store_path)['source'] == _source_stamp(json_path)
+    except (OSError, ValueError):
+        fresh = False
+    if not fresh:
+        build_case_store(json_path, store_path)
+    return open_case_store(store_path)
+
+class CaseStore:
+    """
+    Cases held as columns. Reads like a list of public-style case dicts
+    (indexing, slicing, iteration), which are built on access, while arrays()
+    hands the columns to the batch engine without copying. int_flags maps a
+    float column's name to flags marking its values that were JSON integers,
+    which the case dicts hold as ints.
+    """
+
+    def __init__(self, days, miles, receipts, expected=None, int_flags=None):
+        self.days = days
+        self.miles = miles
+        self.receipts = receipts
+        self.expected = expected
+        self.int_flags = int_flags or {}
+
+    def arrays(self):
+        """(days, miles, receipts, expected) like solution.cases_to_arrays; expected is None if the file had none."""
+        return self.days, self.miles, self.receipts, self.expected
+
+    def __len__(self):
+        return len(self.days)
+
+    def _value(self, name, column, index):
+        """column[index] as a Python number, an int where the JSON had an integer."""
+        value = column[index].item()
+        flags = self.int_flags.get(name)
+        return int(value) if flags is not None and flags[index] else value
+
+    def _values(self, name, column):
+        """Every value of column like _value."""
+        values = column.tolist()
+        flags = self.int_flags.get(name)
+        if flags is not None:
+            values = [int(v) if flag else v for v, flag in zip(values, flags.tolist())]
+        return values
+
+    def _case(self, days, miles, receipts, expected):
+        case = {'input': {'trip_duration_days': days, 'miles_traveled': miles, 'total_receipts_amount': receipts}}
+        if expected is not None:
+            case['expected_output'] = expected
+        return case
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CaseStore(self.days[index], self.miles[index], self.receipts[index],
+                             None if self.expected is None else self.expected[index],
+                             {name: flags[index] for name, flags in self.int_flags.items()})
+        expected = None if self.expected is None else self._value('expected', self.expected, index)
+        return self._case(self.days[index].item(), self._value('miles', self.miles, index),
+                          self._value('receipts', self.receipts, index), expected)
+
+    def __iter__(self):
+        for start in range(0, len(self), STREAM_CHUNK_SIZE):
+            chunk = self[start:start + STREAM_CHUNK_SIZE]
+            expected = chunk._values('expected', chunk.expected) if chunk.expected is not None else [None] * len(chunk)
+            yield from map(self._case, chunk.days.tolist(), chunk._values('miles', chunk.miles),
+                           chunk._values('receipts', chunk.receipts), expected)
+
+    def digest(self):
+        """Content hash of the columns."""
+        sha = hashlib.sha256()
+        for column in self.arrays():
+            if column is None:
+                continue
+            sha.update(column.dtype.str.encode())
+            for start in range(0, len(column), STREAM_CHUNK_SIZE):
+                sha.update(np.ascontiguousarray(column[start:start + STREAM_CHUNK_SIZE]).tobytes())
+        return sha.hexdigest()
+
+if __name__ == '__main__':
+    # Builds (or refreshes) the store for each case file given, by default both case files
+    for json_path in sys.argv[1:] or ['public_cases.json', 'private_cases.json']:
+        store = load_case_store(json_path)
+        print(f"{default_store_path(json_path)}: {len(store)} cases, columns "
+              + ", ".join(f"{name} {column.dtype}" for name, column in zip(('days', 'miles', 'receipts', 'expected'), store.arrays())
+                          if column is not None))
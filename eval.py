@@ -1,43 +1,201 @@
+import argparse
+import csv
 import json
+import os
 import subprocess
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal, getcontext
 
 # Set precision for Decimal calculations
 getcontext().prec = 12
 
-def main():
+def load_cases(path):
+    """
+    The cases in path, from its memory-mapped case store (see case_store.py)
+    when NumPy is available and from the JSON file itself otherwise.
+    """
+    try:
+        from case_store import load_case_store
+    except ImportError:
+        with open(path, 'r') as f:
+            return json.load(f)
+    return load_case_store(path)
+
+def case_args(case):
+    """The three CLI arguments for a case, exactly as the black-box scripts pass them."""
+    inputs = case['input']
+    return (str(inputs['trip_duration_days']), str(inputs['miles_traveled']), str(inputs['total_receipts_amount']))
+
+def run_cases_subprocess(test_cases, instrumentation=None):
+    """
+    Runs run.py once per case. Returns a list of (output_str, failure, seconds)
+    triples, where failure is None on success and a message otherwise, and
+    seconds is the wall time of the run including interpreter startup. With an
+    Instrumentation, each run reports its counts as JSON on stderr (see
+    solution.start_env_instrumentation) and they are merged into it.
+    """
+    env = None
+    if instrumentation is not None:
+        from solution import PROFILE_ENV
+        env = {**os.environ, PROFILE_ENV: 'json'}
+    outputs = []
+    for i, case in enumerate(test_cases):
+        if i > 0 and i % 100 == 0:
+            print(f"Progress: {i}/{len(test_cases)} cases processed...")
+
+        start = time.perf_counter()
+        try:
+            # Execute the run.py script as a separate process
+            process = subprocess.run(
+                [sys.executable, 'run.py', *case_args(case)],
+                capture_output=True,
+                text=True,
+                timeout=5, # Add a 5-second timeout
+                env=env
+            )
+            
+            elapsed = time.perf_counter() - start
+            if process.returncode != 0:
+                # Capture stderr for better error reporting
+                error_msg = process.stderr.strip()
+                outputs.append((None, f"Script failed with error: {error_msg}", elapsed))
+                continue
+
+            outputs.append((process.stdout.strip(), None, elapsed))
+            if instrumentation is not None and process.stderr.strip():
+                try:
+                    instrumentation.merge(json.loads(process.stderr))
+                except json.JSONDecodeError as e:
+                    # The case's output stands; only its counts are lost
+                    print(f"Warning: case {i + 1} reported an unreadable profile: {e}")
+
+        except subprocess.TimeoutExpired:
+            outputs.append((None, "Script timed out after 5 seconds.", time.perf_counter() - start))
+        except Exception as e:
+            outputs.append((None, f"An unexpected error occurred: {e}", time.perf_counter() - start))
+    return outputs
+
+def _run_shard_in_process(shard, profile=False):
+    """
+    Worker entry point: computes the CLI output for each case args tuple in
+    the shard. Returns (outputs, counts), where counts is the shard's
+    Instrumentation.as_dict() with profile=True and None otherwise.
+    """
+    from solution import calculate_reimbursement, DEFAULT_CONFIG, Instrumentation
+    stats = Instrumentation() if profile else None
+    if stats is not None:
+        stats.start()
+    outputs = []
+    try:
+        for args in shard:
+            start = time.perf_counter()
+            try:
+                output = f"{calculate_reimbursement(*args, config=DEFAULT_CONFIG):.2f}"
+                outputs.append((output, None, time.perf_counter() - start))
+            except Exception as e:
+                outputs.append((None, f"An unexpected error occurred: {e}", time.perf_counter() - start))
+    finally:
+        if stats is not None:
+            stats.stop()
+    return outputs, stats.as_dict() if stats is not None else None
+
+def run_cases_in_process(test_cases, workers=None, instrumentation=None):
+    """
+    Imports calculate_reimbursement directly and shards the cases across a
+    process pool. Returns the same (output_str, failure, seconds) triples as
+    run_cases_subprocess, timing each calculate_reimbursement call.
+    With an Instrumentation, each shard's counts are merged into it.
+    """
+    all_args = [case_args(case) for case in test_cases]
+    workers = workers or os.cpu_count() or 1
+    profile = instrumentation is not None
+    if workers <= 1 or len(all_args) < 2:
+        shard_results = [_run_shard_in_process(all_args, profile)]
+    else:
+        shard_size = -(-len(all_args) // workers)
+        shards = [all_args[i:i + shard_size] for i in range(0, len(all_args), shard_size)]
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            # map() preserves shard order, so outputs line up with test_cases
+            shard_results = list(executor.map(_run_shard_in_process, shards, [profile] * len(shards)))
+
+    outputs = []
+    for shard_outputs, counts in shard_results:
+        outputs.extend(shard_outputs)
+        if counts is not None:
+            instrumentation.merge(counts)
+    return outputs
+
+# Per-case limit from the README, which latency is reported against
+CASE_TIME_LIMIT = 5.0
+LATENCY_PERCENTILES = (50, 90, 99)
+
+def latency_percentiles(latencies, percentiles=LATENCY_PERCENTILES):
+    """{'p50': ..., 'p90': ..., 'p99': ..., 'max': ...} of latencies by nearest rank, or {} for none."""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    summary = {f"p{p}": ordered[max(0, -(-p * len(ordered) // 100) - 1)] for p in percentiles}
+    summary["max"] = ordered[-1]
+    return summary
+
+def write_timings_csv(path, test_cases, outputs):
+    """One row per case: its number, inputs, wall time in milliseconds and whether it produced output."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['case', 'trip_duration_days', 'miles_traveled', 'total_receipts_amount', 'latency_ms', 'status'])
+        for i, (case, (_, failure, seconds)) in enumerate(zip(test_cases, outputs)):
+            inputs = case['input']
+            writer.writerow([i + 1, inputs['trip_duration_days'], inputs['miles_traveled'], inputs['total_receipts_amount'],
+                             f"{seconds * 1000:.3f}", 'ok' if failure is None else 'error'])
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Evaluate the reimbursement calculation against public_cases.json.")
+    parser.add_argument('--subprocess', action='store_true',
+                        help="Run run.py once per case as a black box instead of importing solution.py.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for the in-process mode (default: all cores).")
+    parser.add_argument('--profile', nargs='?', const='table', choices=['table', 'json'], default=None,
+                        help="Count calls and time per calculation path and helper, printed as a table (default) or JSON.")
+    parser.add_argument('--timings-csv', metavar='PATH', default=None,
+                        help="Also write each case's wall time to this CSV file.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """
     Evaluates a reimbursement calculation script against a set of test cases.
     This script is a Python-based, cross-platform equivalent of eval.sh.
     """
+    args = parse_args(argv)
+
     print("🧾 Black Box Challenge - Reimbursement System Evaluation (Python Version)")
     print("=======================================================================")
     print()
 
     # --- 1. Check for required files ---
     try:
-        with open('public_cases.json', 'r') as f:
-            try:
-                test_cases = json.load(f)
-            except json.JSONDecodeError:
-                print("❌ Error: public_cases.json is not valid JSON!")
-                sys.exit(1)
+        try:
+            test_cases = load_cases('public_cases.json')
+        except json.JSONDecodeError:
+            print("❌ Error: public_cases.json is not valid JSON!")
+            sys.exit(1)
     except FileNotFoundError:
         print("❌ Error: public_cases.json not found!")
         print("Please ensure the public cases file is in the current directory.")
         sys.exit(1)
 
-    try:
-        # The target script to evaluate, as per the PRD's implicit structure
-        with open('run.py', 'r') as f:
-            pass
-    except FileNotFoundError:
-        print("❌ Error: run.py not found!")
-        print("Please create a run.py script that takes three command-line arguments:")
-        print("  python run.py <trip_duration_days> <miles_traveled> <total_receipts_amount>")
-        print("  and prints the reimbursement amount to standard output.")
-        sys.exit(1)
+    if args.subprocess:
+        try:
+            # The target script to evaluate, as per the PRD's implicit structure
+            with open('run.py', 'r') as f:
+                pass
+        except FileNotFoundError:
+            print("❌ Error: run.py not found!")
+            print("Please create a run.py script that takes three command-line arguments:")
+            print("  python run.py <trip_duration_days> <miles_traveled> <total_receipts_amount>")
+            print("  and prints the reimbursement amount to standard output.")
+            sys.exit(1)
 
     print(f"📊 Running evaluation against {len(test_cases)} test cases...")
     print()
@@ -52,65 +210,50 @@ def main():
     errors = []
 
     # --- 3. Process each test case ---
-    for i, case in enumerate(test_cases):
-        if i > 0 and i % 100 == 0:
-            print(f"Progress: {i}/{len(test_cases)} cases processed...")
+    instrumentation = None
+    if args.profile:
+        from solution import Instrumentation
+        instrumentation = Instrumentation()
+    if args.subprocess:
+        outputs = run_cases_subprocess(test_cases, instrumentation)
+    else:
+        outputs = run_cases_in_process(test_cases, args.workers, instrumentation)
+
+    for i, (case, (output_str, failure, _)) in enumerate(zip(test_cases, outputs)):
+        if failure is not None:
+            errors.append(f"Case {i+1}: {failure}")
+            continue
 
         inputs = case['input']
-        trip_duration = str(inputs['trip_duration_days'])
-        miles_traveled = str(inputs['miles_traveled'])
-        receipts_amount = str(inputs['total_receipts_amount'])
         expected_output = Decimal(str(case['expected_output']))
 
         try:
-            # Execute the run.py script as a separate process
-            process = subprocess.run(
-                [sys.executable, 'run.py', trip_duration, miles_traveled, receipts_amount],
-                capture_output=True,
-                text=True,
-                timeout=5 # Add a 5-second timeout
-            )
-            
-            if process.returncode != 0:
-                # Capture stderr for better error reporting
-                error_msg = process.stderr.strip()
-                errors.append(f"Case {i+1}: Script failed with error: {error_msg}")
-                continue
-
-            output_str = process.stdout.strip()
-            
-            try:
-                # Validate and convert output to Decimal
-                actual_output = Decimal(output_str)
-            except Exception:
-                errors.append(f"Case {i+1}: Invalid numeric output format: '{output_str}'")
-                continue
+            # Validate and convert output to Decimal
+            actual_output = Decimal(output_str)
+        except Exception:
+            errors.append(f"Case {i+1}: Invalid numeric output format: '{output_str}'")
+            continue
 
-            # --- 4. Calculate metrics ---
-            successful_runs += 1
-            error = abs(actual_output - expected_output)
-            total_error += error
-            
-            results.append({
-                "case_num": i + 1,
-                "inputs": inputs,
-                "expected": expected_output,
-                "actual": actual_output,
-                "error": error
-            })
-
-            if error < Decimal('0.01'):
-                exact_matches += 1
-            if error < Decimal('1.00'):
-                close_matches += 1
-            
-            if error > max_error:
-                max_error = error
+        # --- 4. Calculate metrics ---
+        successful_runs += 1
+        error = abs(actual_output - expected_output)
+        total_error += error
+        
+        results.append({
+            "case_num": i + 1,
+            "inputs": inputs,
+            "expected": expected_output,
+            "actual": actual_output,
+            "error": error
+        })
 
-        except subprocess.TimeoutExpired:
-            errors.append(f"Case {i+1}: Script timed out after 5 seconds.")
-        except Exception as e:
-            errors.append(f"Case {i+1}: An unexpected error occurred: {e}")
+        if error < Decimal('0.01'):
+            exact_matches += 1
+        if error < Decimal('1.00'):
+            close_matches += 1
+        
+        if error > max_error:
+            max_error = error
 
     print(f"Progress: {len(test_cases)}/{len(test_cases)} cases processed...")
     print()
@@ -164,7 +307,28 @@ def main():
                 print(f"    Case {r['case_num']}: {inp['trip_duration_days']} days, {inp['miles_traveled']} miles, ${inp['total_receipts_amount']} receipts")
                 print(f"      Expected: ${r['expected']:.2f}, Got: ${r['actual']:.2f}, Error: ${r['error']:.2f}")
 
-    # --- 6. Show script errors ---
+    # --- 6. Show latency ---
+    latencies = [seconds for _, _, seconds in outputs]
+    if latencies:
+        summary = latency_percentiles(latencies)
+        if args.subprocess:
+            print("\n⏱️  Latency per case (run.py wall time, including interpreter startup):")
+        else:
+            print("\n⏱️  Latency per case (calculate_reimbursement call time):")
+        print("  " + "  ".join(f"{name}: {seconds * 1000:.3f} ms" for name, seconds in summary.items()))
+        print(f"  Slowest case used {summary['max'] / CASE_TIME_LIMIT:.3%} of the {CASE_TIME_LIMIT:g} s limit")
+        print(f"  Total: {sum(latencies):.2f} s, {sum(latencies) / len(latencies) * 5000:.2f} s projected for 5,000 cases run one at a time")
+        print("  Slowest cases:")
+        slowest = sorted(range(len(latencies)), key=lambda i: latencies[i], reverse=True)[:5]
+        for i in slowest:
+            inp = test_cases[i]['input']
+            print(f"    Case {i+1}: {inp['trip_duration_days']} days, {inp['miles_traveled']} miles, ${inp['total_receipts_amount']} receipts"
+                  f" - {latencies[i] * 1000:.3f} ms")
+    if args.timings_csv:
+        write_timings_csv(args.timings_csv, test_cases, outputs)
+        print(f"  Per-case timings written to {args.timings_csv}")
+
+    # --- 7. Show script errors ---
     if errors:
         print("\n⚠️  Errors encountered during evaluation:")
         for j, err in enumerate(errors[:10]):
@@ -172,6 +336,11 @@ def main():
         if len(errors) > 10:
             print(f"  ... and {len(errors) - 10} more errors.")
             
+    # --- 8. Show instrumentation ---
+    if instrumentation is not None:
+        print("\n⏱️  Calls and time per calculation path and helper:")
+        instrumentation.dump(args.profile, sys.stdout)
+
     print("\n📝 Next steps:")
     print("  1. Create run.py with your solution logic.")
     print("  2. Ensure your run.py script prints ONLY the final numeric result.")
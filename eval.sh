@@ -2,9 +2,26 @@
 
 # Black Box Challenge Evaluation Script
 # This script tests your reimbursement calculation implementation against 1,000 historical cases
+#
+# Usage: ./eval.sh [--timings-csv FILE]
+#   --timings-csv FILE  also write each case's run.sh wall time to FILE
 
 set -e
 
+timings_csv=""
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --timings-csv)
+            timings_csv="$2"
+            shift 2
+            ;;
+        *)
+            echo "Usage: $0 [--timings-csv FILE]" >&2
+            exit 1
+            ;;
+    esac
+done
+
 echo "🧾 Black Box Challenge - Reimbursement System Evaluation"
 echo "======================================================="
 echo
@@ -48,6 +65,35 @@ if [ ! -f "public_cases.json" ]; then
     exit 1
 fi
 
+# Per-case wall time in microseconds: bash 5's $EPOCHREALTIME needs no fork,
+# GNU date is the fallback, and without either latency isn't reported
+if [ -n "${EPOCHREALTIME:-}" ]; then
+    clock="epochrealtime"
+elif [[ $(date +%s%N) =~ ^[0-9]+$ ]]; then
+    clock="date"
+else
+    clock=""
+fi
+
+# Sets now_us to the current time in microseconds
+read_clock() {
+    if [ "$clock" = "epochrealtime" ]; then
+        now_us=${EPOCHREALTIME/[.,]/}
+    elif [ "$clock" = "date" ]; then
+        now_us=$(( $(date +%s%N) / 1000 ))
+    else
+        now_us=0
+    fi
+}
+
+# Formats microseconds as milliseconds with three decimals, or as seconds with two
+format_ms() {
+    printf "%d.%03d ms" $(( $1 / 1000 )) $(( $1 % 1000 ))
+}
+format_s() {
+    printf "%d.%02d s" $(( $1 / 1000000 )) $(( $1 / 10000 % 100 ))
+}
+
 echo "📊 Running evaluation against 1,000 test cases..."
 echo
 
@@ -71,6 +117,7 @@ max_error="0"
 max_error_case=""
 results_array=()
 errors_array=()
+latencies_array=()
 
 # Process each test case
 for ((i=0; i<num_cases; i++)); do
@@ -81,8 +128,18 @@ for ((i=0; i<num_cases; i++)); do
     # Extract test case data from pre-loaded array
     IFS=':' read -r trip_duration miles_traveled receipts_amount expected <<< "${test_cases[i]}"
     
-    # Run the user's implementation
+    # Run the user's implementation, timing the call
+    read_clock
+    start_us=$now_us
     if script_output=$(./run.sh "$trip_duration" "$miles_traveled" "$receipts_amount" 2>/dev/null); then
+        status="ok"
+    else
+        status="failed"
+    fi
+    read_clock
+    latencies_array+=("$((now_us - start_us)):$((i+1)):$trip_duration:$miles_traveled:$receipts_amount:$status")
+
+    if [ "$status" = "ok" ]; then
         # Check if output is a valid number
         output=$(echo "$script_output" | tr -d '[:space:]')
         if [[ $output =~ ^-?[0-9]+\.?[0-9]*$ ]]; then
@@ -117,6 +174,7 @@ for ((i=0; i<num_cases; i++)); do
             
         else
             errors_array+=("Case $((i+1)): Invalid output format: $output")
+            latencies_array[i]="${latencies_array[i]%:ok}:invalid_output"
         fi
     else
         # Capture stderr for error reporting
@@ -187,6 +245,52 @@ else
     fi
 fi
 
+# Show latency percentiles (nearest rank) and the slowest cases
+if [ -n "$clock" ] && [ $num_cases -gt 0 ]; then
+    IFS=$'\n' sorted_latencies=($(printf '%s\n' "${latencies_array[@]}" | sort -t: -k1 -nr))
+    latency_at_rank() {
+        # Latency of the case at 1-based rank $1 in ascending order
+        local entry="${sorted_latencies[$((num_cases - $1))]}"
+        echo "${entry%%:*}"
+    }
+    total_us=0
+    for entry in "${latencies_array[@]}"; do
+        total_us=$((total_us + ${entry%%:*}))
+    done
+    echo
+    echo "⏱️  Latency per case (run.sh wall time):"
+    line=""
+    for p in 50 90 99; do
+        line="$line  p$p: $(format_ms "$(latency_at_rank $(( (p * num_cases + 99) / 100 )))")"
+    done
+    max_us=$(latency_at_rank "$num_cases")
+    echo "$line  max: $(format_ms "$max_us")"
+    echo "  Slowest case used $(( max_us / 50000 )).$(( (max_us / 5000) % 10 ))% of the 5 s limit"
+    echo "  Total: $(format_s "$total_us"), $(format_s $(( total_us / num_cases * 5000 ))) projected for 5,000 cases run one at a time"
+    echo "  Slowest cases:"
+    for ((j=0; j<5 && j<num_cases; j++)); do
+        IFS=: read -r latency_us case_num trip_duration miles_traveled receipts_amount status <<< "${sorted_latencies[j]}"
+        printf "    Case %s: %s days, %s miles, \$%s receipts - %s\n" "$case_num" "$trip_duration" "$miles_traveled" \
+            "$receipts_amount" "$(format_ms "$latency_us")"
+    done
+fi
+
+if [ -n "$timings_csv" ]; then
+    if [ -n "$clock" ]; then
+        {
+            echo "case,trip_duration_days,miles_traveled,total_receipts_amount,latency_ms,status"
+            for entry in "${latencies_array[@]}"; do
+                IFS=: read -r latency_us case_num trip_duration miles_traveled receipts_amount status <<< "$entry"
+                printf "%s,%s,%s,%s,%d.%03d,%s\n" "$case_num" "$trip_duration" "$miles_traveled" "$receipts_amount" \
+                    $(( latency_us / 1000 )) $(( latency_us % 1000 )) "$status"
+            done
+        } > "$timings_csv"
+        echo "  Per-case timings written to $timings_csv"
+    else
+        echo "⚠️  No clock with sub-second resolution available; $timings_csv not written"
+    fi
+fi
+
 # Show errors if any
 if [ ${#errors_array[@]} -gt 0 ]; then
     echo
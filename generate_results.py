@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from solution import record_values, jq_text, CLI_OUTPUT_PATTERN
+
+# --- Parallel results generation ---
+# A drop-in replacement for generate_results.sh: the private cases are split
+# into contiguous shards that run concurrently, each running run.sh once per
+# case, and the results are merged back in case order. private_results.txt
+# and the "Error on case N: ..." messages on stderr are the same as the bash
+# script's. Like its jq extraction, a case that isn't a JSON object (or null)
+# fails the whole run before any case is executed. The work happens in the
+# run.sh processes, so threads are enough to keep every core busy.
+DEFAULT_CASES = "private_cases.json"
+DEFAULT_RESULTS = "private_results.txt"
+DEFAULT_SCRIPT = "./run.sh"
+
+def case_args(record):
+    """
+    The three run.sh arguments for a case record as generate_results.sh
+    extracts them with jq: missing fields (and every field of null) are "null".
+    Raises ValueError where jq fails, on records that aren't objects.
+    """
+    return tuple(jq_text(value) for value in record_values(record))
+
+def run_case(script, args):
+    """
+    Runs script once for a case, capturing stdout and stderr together.
+    Returns (line, None) on success and ("ERROR", message) otherwise, with the
+    messages generate_results.sh prints.
+    """
+    process = subprocess.run([script, *args], capture_output=True, text=True)
+    if process.returncode != 0:
+        # The bash script's `tr -d '\n'` of stderr
+        return "ERROR", f"Script failed: {process.stderr.replace(chr(10), '')}"
+    # The bash script's `tr -d '[:space:]'` of stdout
+    output = "".join(process.stdout.split())
+    if not re.match(CLI_OUTPUT_PATTERN, output):
+        return "ERROR", f"Invalid output format: {output}"
+    return output, None
+
+def _run_shard(script, shard):
+    return [run_case(script, args) for args in shard]
+
+def shard_cases(items, shards):
+    """items split into at most shards contiguous, nearly equal slices."""
+    if not items:
+        return []
+    shard_size = -(-len(items) // max(1, shards))
+    return [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+
+def generate_results(records, outfile, script=DEFAULT_SCRIPT, shards=None, errfile=None):
+    """
+    Writes one result line per case record to outfile, in order, and reports
+    failures and progress to errfile. Returns the number of ERROR lines.
+    Raises ValueError, before running anything, if records isn't a list of
+    case objects.
+    """
+    if not isinstance(records, list):
+        raise ValueError("the cases must be a JSON array")
+    all_args = []
+    for i, record in enumerate(records):
+        try:
+            all_args.append(case_args(record))
+        except ValueError as e:
+            raise ValueError(f"case {i + 1}: {e}") from None
+    shard_list = shard_cases(all_args, shards or os.cpu_count() or 1)
+    errors = done = 0
+    with ThreadPoolExecutor(max_workers=max(1, len(shard_list))) as executor:
+        # map() yields shards in order, so lines and messages keep case order
+        for shard_results in executor.map(_run_shard, [script] * len(shard_list), shard_list):
+            for line, error in shard_results:
+                if error is not None and errfile is not None:
+                    print(f"Error on case {done + 1}: {error}", file=errfile)
+                errors += error is not None
+                outfile.write(line + "\n")
+                done += 1
+            if errfile is not None and done < len(all_args):
+                print(f"Progress: {done}/{len(all_args)} cases processed...", file=errfile)
+    return errors
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate private_results.txt by running run.sh over the private cases in parallel.")
+    parser.add_argument('--cases', default=DEFAULT_CASES, help=f"Case file to run (default: {DEFAULT_CASES}).")
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help=f"Results file to write (default: {DEFAULT_RESULTS}).")
+    parser.add_argument('--script', default=DEFAULT_SCRIPT, help=f"Script to run once per case (default: {DEFAULT_SCRIPT}).")
+    parser.add_argument('--shards', type=int, default=None,
+                        help="Shards to run concurrently (default: one per core).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("🧾 Black Box Challenge - Generating Private Results")
+    print("====================================================")
+    print()
+
+    if not os.path.isfile(args.script):
+        print(f"❌ Error: {args.script} not found!")
+        print("Please create a run.sh script that takes three parameters:")
+        print("  ./run.sh <trip_duration_days> <miles_traveled> <total_receipts_amount>")
+        print("  and outputs the reimbursement amount")
+        return 1
+    # Make the script executable, as generate_results.sh does
+    os.chmod(args.script, os.stat(args.script).st_mode | 0o111)
+
+    try:
+        with open(args.cases, 'r') as f:
+            records = json.load(f)
+    except FileNotFoundError:
+        print(f"❌ Error: {args.cases} not found!")
+        print("Please ensure the private cases file is in the current directory.")
+        return 1
+    except json.JSONDecodeError as e:
+        print(f"❌ Error: {args.cases} is not valid JSON: {e}")
+        return 1
+
+    shards = args.shards or os.cpu_count() or 1
+    print("📊 Processing test cases and generating results...")
+    print(f"📝 Output will be saved to {args.output}")
+    print()
+    sys.stdout.flush()
+    print(f"Processing {len(records)} test cases across {min(shards, len(records))} shards...", file=sys.stderr)
+
+    # Written next to the output and moved into place, so an interrupted run
+    # never leaves a partial results file behind
+    tmp_path = args.output + ".tmp"
+    try:
+        with open(tmp_path, 'w') as tmp:
+            errors = generate_results(records, tmp, args.script, shards, errfile=sys.stderr)
+    except ValueError as e:
+        os.unlink(tmp_path)
+        print(f"❌ Error: {args.cases}: {e}", file=sys.stderr)
+        return 1
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    os.replace(tmp_path, args.output)
+
+    print(file=sys.stderr)
+    print(f"✅ Results generated successfully! ({errors} errors)", file=sys.stderr)
+    print(f"📄 Output saved to {args.output}", file=sys.stderr)
+    print(f"📊 Each line contains the result for the corresponding test case in {args.cases}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,2 @@
 @echo off
-python solution.py %1 %2 %3 
\ No newline at end of file
+python run.py %1 %2 %3 
\ No newline at end of file
@@ -1,37 +1,26 @@
 import sys
-import subprocess
 
 def main():
     """
-    A simple pass-through script that executes solution.py with the provided arguments.
+    Computes the reimbursement for the provided arguments in-process, with the
+    same output as `python solution.py <days> <miles> <receipts>` but without
+    starting a second interpreter.
     """
     if len(sys.argv) != 4:
         print("Usage: python run.py <trip_duration_days> <miles_traveled> <total_receipts_amount>", file=sys.stderr)
         sys.exit(1)
 
-    # Prepare the command to execute solution.py
-    command = [
-        "python", 
-        "solution.py", 
-        sys.argv[1], 
-        sys.argv[2], 
-        sys.argv[3]
-    ]
+    # solution imports only sys at module level, so this stays as cheap as the CLI itself
+    from solution import calculate_reimbursement, DEFAULT_CONFIG
 
     try:
-        # Execute the command and capture the output
-        result = subprocess.run(
-            command, 
-            capture_output=True, 
-            text=True, 
-            check=True  # This will raise an exception if solution.py fails
-        )
-        # Print the output from solution.py, which should be the final reimbursement amount
-        print(result.stdout.strip())
-    except subprocess.CalledProcessError as e:
-        # If solution.py exits with an error, print its stderr for debugging
-        print(f"Error executing solution.py:\n{e.stderr}", file=sys.stderr)
+        reimbursement = calculate_reimbursement(sys.argv[1], sys.argv[2], sys.argv[3], config=DEFAULT_CONFIG)
+    except Exception as e:
+        # Same failure contract as before: a message on stderr and a non-zero exit
+        print(f"Error executing solution.py:\n{e}", file=sys.stderr)
         sys.exit(1)
+    # Ensure output is formatted to exactly two decimal places
+    print(f"{reimbursement:.2f}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
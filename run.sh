@@ -14,4 +14,22 @@
 
 # --- Your implementation below ---
 
-python3 solution.py "$1" "$2" "$3" 
\ No newline at end of file
+# If a resident calculator is running (python3 solution.py --serve --socket),
+# send the request to it instead of starting a new interpreter per case. The
+# request is tab-separated so empty arguments and spaces survive; arguments
+# holding tabs or newlines, and any answer that isn't a number (errors
+# included), fall through to run.py for its exact output and exit status.
+SOCKET_PATH="${REIMBURSEMENT_SOCKET:-/tmp/reimbursement.sock}"
+if [ -S "$SOCKET_PATH" ] && [[ "$1$2$3" != *[$'\t\n']* ]] && command -v socat &> /dev/null; then
+    if output=$(printf '%s\t%s\t%s\n' "$1" "$2" "$3" | socat -t 5 - "UNIX-CONNECT:$SOCKET_PATH" 2>/dev/null) \
+        && [[ $output =~ ^-?[0-9]+\.?[0-9]*$ ]]; then
+        echo "$output"
+        exit 0
+    fi
+fi
+
+# run.py imports solution as a module, so its compiled bytecode is cached in
+# __pycache__ instead of being recompiled on every call as a script would be.
+# exec replaces this shell instead of forking, and -S skips site-packages
+# setup: the scoring path imports nothing outside the standard library.
+exec python3 -S run.py "$1" "$2" "$3"
@@ -1,8 +1,8 @@
-import json
 import sys
-import random
-from decimal import Decimal
-import re
+
+# The three-argument scoring CLI only needs the numeric path below, so it
+# imports nothing beyond sys. json, re, decimal, enum and numpy are imported
+# where they are used (batch mode, analysis, the regex and Decimal fallbacks).
 
 # --- Configuration (from our best run) ---
 DEFAULT_CONFIG = {
@@ -54,6 +54,9 @@ DEFAULT_CONFIG = {
     "receipt_high_tier_diminishing_pct": 0.1889,
 }
 
+# Characters of a plain decimal string, which float() parses exactly as the regex would extract it
+PLAIN_NUMBER_CHARS = frozenset("0123456789.")
+
 def clean_and_convert(val, target_type):
     """A robust function to clean and convert inputs to the correct numeric type."""
     if isinstance(val, (int, float)):
@@ -61,7 +64,12 @@ def clean_and_convert(val, target_type):
     try:
         # Handle strings with potential non-numeric characters like '$' or ','
         s_val = str(val)
+        # Plain numbers such as "150.75" or "-3" skip the regex (and importing re)
+        body = s_val[1:] if s_val[:1] in ('-', '+') else s_val
+        if body and body != '.' and body.count('.') <= 1 and PLAIN_NUMBER_CHARS.issuperset(body):
+            return target_type(float(s_val))
         # Extract a clean numeric string using regex
+        import re
         numeric_part = re.search(r'[-+]?[\d,.]+', s_val)
         if numeric_part:
             clean_str = numeric_part.group(0).replace(',', '')
@@ -72,15 +80,48 @@ def clean_and_convert(val, target_type):
     # Fallback if no numeric part is found
     return target_type(0)
 
-def round_legacy(x):
+def round_legacy_decimal(x):
+    # Reference implementation of the legacy rounding quirk, kept for parity tests
     rounded = round(x, 2)
     # The original bug is likely based on the string representation
     s_rounded = f"{rounded:.2f}"
     if s_rounded.endswith(".49") or s_rounded.endswith(".99"):
         # Use Decimal for precision addition to avoid float issues
+        from decimal import Decimal
         return float(Decimal(s_rounded) + Decimal("0.01"))
     return rounded
 
+# Below this many cents x * 100 is within 1e-6 of the exact product, so the
+# integer-cents path can tell which way a half cent rounds.
+FIXED_POINT_LIMIT = 2.0 ** 32
+
+def legacy_cents(x):
+    """
+    Rounds x to integer cents and applies the legacy .49/.99 quirk.
+    Returns None when x is too large, not finite, or too close to a half cent
+    to decide without the exact decimal expansion.
+    """
+    scaled = x * 100
+    # NaN fails both comparisons, so it is rejected here as well
+    if not (-FIXED_POINT_LIMIT < scaled < FIXED_POINT_LIMIT):
+        return None
+    cents = round(scaled)
+    if abs(abs(scaled - cents) - 0.5) < 1e-6:
+        return None
+    last_two = abs(cents) % 100
+    if last_two == 49 or last_two == 99:
+        cents += 1
+    return cents
+
+def round_legacy(x):
+    cents = legacy_cents(x)
+    # Zero keeps the reference path so -0.0 is preserved. float() makes NumPy
+    # scalars (e.g. from tuner grids) round like Python floats at half-cent ties.
+    if not cents:
+        return round_legacy_decimal(float(x))
+    # Only convert back to float at the very end
+    return cents / 100
+
 def get_per_diem_total(trip_duration_days, miles_traveled, total_receipts_amount, config):
     per_diem_rate = 100
     
@@ -196,15 +237,130 @@ def get_efficiency_bonus(trip_duration_days, miles_traveled, config):
     
     return 0
 
-def calculate_reimbursement(trip_duration_days, miles_traveled, total_receipts_amount, debug=False, config=None):
-    if config is None:
-        config = DEFAULT_CONFIG.copy() # Ensure a consistent config object
-    
+# --- Calculation paths ---
+# The path a case takes through calculate_reimbursement, as a small integer.
+# calculate_reimbursement_batch returns these codes, and each indexes its
+# (path, receipt_path) labels in BATCH_PATH_LABELS. solution.PathCode is the
+# IntEnum of PATH_CODE_NAMES; it is built on first access so the scoring CLI
+# doesn't pay for importing enum.
+PATH_CODE_NAMES = (
+    "EXTREME_HIGH", "EXTREME_LOW", "VACATION", "LONG_TRIP",
+    "LOW_TIER", "STANDARD_TIER", "SWEET_SPOT_TIER", "HIGH_TIER",
+    "ONE_DAY_UPPER", "ONE_DAY", "TWO_DAY_UPPER", "TWO_DAY",
+)
+
+def path_code_enum():
+    """The PathCode IntEnum, built and cached on first use."""
+    enum_class = globals().get("PathCode")
+    if enum_class is None:
+        from enum import IntEnum
+        enum_class = IntEnum("PathCode", [(name, code) for code, name in enumerate(PATH_CODE_NAMES)], module=__name__)
+        enum_class.__doc__ = "The path a case takes through calculate_reimbursement, indexing BATCH_PATH_LABELS."
+        globals()["PathCode"] = enum_class
+    return enum_class
+
+def __getattr__(name):
+    # Module attribute hook (PEP 562) so `from solution import PathCode` works
+    if name == "PathCode":
+        return path_code_enum()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Path labels for each PathCode, as (path, receipt_path) pairs matching the
+# debug dict of the scalar function.
+BATCH_PATH_LABELS = (
+    ("SPECIAL_EXTREME_ONE_DAY_HIGH_RECEIPT", None),
+    ("SPECIAL_EXTREME_ONE_DAY_LOW_RECEIPT", None),
+    ("VACATION_PENALTY_HIGH_SPEND", "N/A"),
+    ("LONG_TRIP_TWO_TIER", "LONG_TRIP_SWEET_SPOT_TIERS"),
+    ("NORMAL", "TIERED_RECEIPT_LOGIC_LOW_TIER_PENALTY"),
+    ("NORMAL", "TIERED_RECEIPT_LOGIC_STANDARD_TIER"),
+    ("NORMAL", "TIERED_RECEIPT_LOGIC_SWEET_SPOT_TIER"),
+    ("NORMAL", "TIERED_RECEIPT_LOGIC_HIGH_TIER_DIMINISHING"),
+    ("NORMAL", "ONE_DAY_HIGH_RECEIPT_UPPER_TIER"),
+    ("NORMAL", "ONE_DAY_HIGH_RECEIPT_MULTIPLIER"),
+    ("NORMAL", "TWO_DAY_HIGH_RECEIPT_UPPER_TIER"),
+    ("NORMAL", "TWO_DAY_HIGH_RECEIPT_MULTIPLIER"),
+)
+
+# Path code of each (path, receipt_path) pair
+PATH_LABEL_CODES = {labels: code for code, labels in enumerate(BATCH_PATH_LABELS)}
+
+def debug_dict(code, per_diem, mileage, receipts, penalty, eff_bonus, grand, miles_per_day=None):
+    """The legacy debug dict of calculate_reimbursement(debug=True), from the same fields as a Breakdown."""
+    path, receipt_path = BATCH_PATH_LABELS[code]
+    debug_info = {"path": path, "receipt_path": receipt_path}
+    if miles_per_day is not None:
+        debug_info["miles_per_day"] = miles_per_day
+    debug_info.update({
+        "per_diem": per_diem, "mileage": mileage, "receipts$": receipts,
+        "penalty": penalty, "eff_bonus": eff_bonus, "grand": grand,
+    })
+    return debug_info
+
+class Breakdown:
+    """
+    How one case's reimbursement was computed: its PathCode, each component
+    and the rounded grand total. miles_per_day is None on the extreme one-day
+    paths, which don't compute it. as_dict() gives the legacy debug dict.
+    The path code is kept as a plain int and made a PathCode only when read.
+    """
+    __slots__ = ('code_value', 'per_diem', 'mileage', 'receipts', 'penalty', 'eff_bonus', 'grand', 'miles_per_day')
+
+    def __init__(self, code, per_diem, mileage, receipts, penalty, eff_bonus, grand, miles_per_day=None):
+        self.code_value = code
+        self.per_diem = per_diem
+        self.mileage = mileage
+        self.receipts = receipts
+        self.penalty = penalty
+        self.eff_bonus = eff_bonus
+        self.grand = grand
+        self.miles_per_day = miles_per_day
+
+    @property
+    def code(self):
+        return path_code_enum()(self.code_value)
+
+    @property
+    def path(self):
+        return BATCH_PATH_LABELS[self.code_value][0]
+
+    @property
+    def receipt_path(self):
+        return BATCH_PATH_LABELS[self.code_value][1]
+
+    def as_dict(self):
+        """The debug dict calculate_reimbursement(debug=True) returns."""
+        return debug_dict(self.code_value, self.per_diem, self.mileage, self.receipts, self.penalty, self.eff_bonus,
+                          self.grand, self.miles_per_day)
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[1:])
+        return f"Breakdown({self.code.name}, {fields})"
+
+def calculate_reimbursement(trip_duration_days, miles_traveled, total_receipts_amount, debug=False, config=None, breakdown=False):
     # --- Input Sanitization ---
     trip_duration_days = clean_and_convert(trip_duration_days, int)
     miles_traveled = clean_and_convert(miles_traveled, float)
     total_receipts_amount = clean_and_convert(total_receipts_amount, float)
 
+    return calculate_reimbursement_fast(trip_duration_days, miles_traveled, total_receipts_amount, debug=debug, config=config,
+                                        breakdown=breakdown)
+
+def calculate_reimbursement_fast(trip_duration_days, miles_traveled, total_receipts_amount, debug=False, config=None, breakdown=False):
+    """
+    Trusted entry point for callers that already hold numbers: an int day count
+    and numeric miles/receipts. Skips clean_and_convert; strings and other raw
+    input must go through calculate_reimbursement.
+    With breakdown=True returns a Breakdown record; debug=True returns its dict view.
+    """
+    # Both take the Breakdown fields, so each path builds its record in one call
+    make_record = debug_dict if debug else Breakdown if breakdown else None
+    if config is None:
+        config = DEFAULT_CONFIG # Read-only here, so no per-call copy is needed
+    profile = PROFILE
+    if profile is not None:
+        start = profile.clock()
+
     path = "NORMAL"
     receipt_path = None # Initialize receipt_path
 
@@ -216,13 +372,13 @@ def calculate_reimbursement(trip_duration_days, miles_traveled, total_receipts_a
         else:
             path = "SPECIAL_EXTREME_ONE_DAY_LOW_RECEIPT"
             computed_total = (miles_traveled + total_receipts_amount) * config["extreme_day_low_receipt_multiplier"]
+        grand_total = round_legacy(computed_total)
         
-        if debug:
-             return {
-                "path": path, "receipt_path": None, "per_diem": 0, "mileage": 0, "receipts$": computed_total, "penalty": 0, "eff_bonus": 0,
-                "grand": round_legacy(computed_total)
-            }
-        return round_legacy(computed_total)
+        if profile is not None:
+            profile.record_path(path, receipt_path, start)
+        if make_record is not None:
+            return make_record(PATH_LABEL_CODES[(path, receipt_path)], 0, 0, computed_total, 0, 0, grand_total)
+        return grand_total
 
     # --- Vacation Penalty Logic (New Implementation) ---
     daily_spend = total_receipts_amount / trip_duration_days if trip_duration_days > 0 else 0
@@ -246,14 +402,15 @@ def calculate_reimbursement(trip_duration_days, miles_traveled, total_receipts_a
         
         efficiency_bonus = get_efficiency_bonus(trip_duration_days, miles_traveled, config)
         computed_total = final_per_diem + mileage_total + final_receipts + efficiency_bonus
+        computed_total = round_legacy(computed_total)
         
-        if debug:
-            return {
-                "path": path, "receipt_path": "N/A", "miles_per_day": miles_traveled / trip_duration_days if trip_duration_days > 0 else 0,
-                "per_diem": final_per_diem, "mileage": mileage_total, 
-                "receipts$": final_receipts, "penalty": 0, "eff_bonus": efficiency_bonus, "grand": round_legacy(computed_total)
-            }
-        return round_legacy(computed_total)
+        if profile is not None:
+            profile.record_path(path, receipt_path, start)
+        if make_record is not None:
+            miles_per_day = miles_traveled / trip_duration_days if trip_duration_days > 0 else 0
+            return make_record(PATH_LABEL_CODES[(path, "N/A")], final_per_diem, mileage_total, final_receipts, 0, efficiency_bonus,
+                               computed_total, miles_per_day)
+        return computed_total
         
     # --- New Two-Tier Logic for Long Trips ---
     if trip_duration_days >= config["long_trip_duration_threshold"]:
@@ -290,16 +447,16 @@ def calculate_reimbursement(trip_duration_days, miles_traveled, total_receipts_a
             receipt_total = reimbursable * pct_low_tier
 
         computed_total = per_diem_total + mileage_total + receipt_total + efficiency_bonus
+        computed_total = round_legacy(computed_total)
         
         # This path should be self-contained and not call get_receipt_total
-        if debug:
+        if profile is not None:
+            profile.record_path(path, receipt_path, start)
+        if make_record is not None:
             miles_per_day = miles_traveled / trip_duration_days if trip_duration_days > 0 else 0
-            return {
-                "path": path, "receipt_path": receipt_path, "miles_per_day": miles_per_day,
-                "per_diem": per_diem_total, "mileage": mileage_total, 
-                "receipts$": receipt_total, "penalty": 0, "eff_bonus": efficiency_bonus, "grand": round_legacy(computed_total)
-            }
-        return round_legacy(computed_total)
+            return make_record(PATH_LABEL_CODES[(path, receipt_path)], per_diem_total, mileage_total, receipt_total, 0, efficiency_bonus,
+                               computed_total, miles_per_day)
+        return computed_total
     
     # --- Standard Calculation Logic ---
     per_diem_total = get_per_diem_total(trip_duration_days, miles_traveled, total_receipts_amount, config)
@@ -310,24 +467,1028 @@ def calculate_reimbursement(trip_duration_days, miles_traveled, total_receipts_a
     computed_total = per_diem_total + mileage_total + receipt_total + penalty + efficiency_bonus
     computed_total = round_legacy(computed_total)
 
-    if debug:
+    if profile is not None:
+        profile.record_path(path, receipt_path, start)
+    if make_record is not None:
         miles_per_day = miles_traveled / trip_duration_days if trip_duration_days > 0 else 0
+        return make_record(PATH_LABEL_CODES[(path, receipt_path)], per_diem_total, mileage_total, receipt_total, penalty,
+                           efficiency_bonus, computed_total, miles_per_day)
+
+    return computed_total
+
+# --- Compiled calculator ---
+def compile_config(config=None):
+    """
+    Returns a calculate(trip_duration_days, miles_traveled, total_receipts_amount)
+    callable specialized for config. Config values and constant sub-sums are
+    bound once, so repeated calls skip the dict lookups. Inputs must already be
+    numeric, as for calculate_reimbursement_fast, and results are identical to it.
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+
+    # Per diem
+    per_diem_rate_14_plus = config["per_diem_rate_14_plus_days"]
+    per_diem_rate_10_plus = config["per_diem_rate_10_plus_days"]
+    floor_duration = config.get("per_diem_floor_duration", 15)
+    floor_rate = config.get("per_diem_floor_rate", 60)
+
+    # Mileage, with the cumulative amount below each breakpoint precomputed
+    # in the same evaluation order as get_mileage_total
+    primary_mileage_rate = 0.58
+    bp1 = config["mileage_breakpoint_1"]
+    bp2 = config["mileage_breakpoint_2"]
+    rate1 = config["mileage_rate_tier_1"]
+    rate2 = config["mileage_rate_tier_2"]
+    rate3 = config["mileage_rate_tier_3"]
+    mileage_base_1 = 100 * primary_mileage_rate
+    mileage_base_2 = mileage_base_1 + ((bp1 - 100) * rate1)
+    mileage_base_3 = mileage_base_2 + ((bp2 - bp1) * rate2)
+
+    # Receipts
+    low_receipt_threshold = config.get("receipt_low_tier_threshold", 200.0)
+    sweet_spot_lower_bound = config.get("receipt_sweet_spot_lower_bound", 600.0)
+    sweet_spot_upper_bound = config.get("receipt_sweet_spot_upper_bound", 800.0)
+    low_tier_pct = config.get("receipt_low_tier_pct", 0.1)
+    standard_pct = config.get("receipt_standard_pct", 0.5)
+    sweet_spot_pct = config.get("receipt_sweet_spot_pct", 0.9)
+    high_tier_diminishing_pct = config.get("receipt_high_tier_diminishing_pct", 0.3)
+    sweet_spot_base = sweet_spot_upper_bound * sweet_spot_pct
+    one_day_upper_threshold = config.get("one_day_upper_tier_threshold", 800)
+    one_day_upper_multiplier = config.get("one_day_upper_tier_multiplier", 0.6)
+    one_day_multiplier = config.get("one_day_high_receipt_multiplier", 0.6)
+    two_day_upper_threshold = config.get("two_day_upper_tier_threshold", 800)
+    two_day_upper_multiplier = config.get("two_day_upper_tier_multiplier", 0.7)
+    two_day_multiplier = config.get("two_day_high_receipt_multiplier", 0.7)
+
+    eff_slope = config["eff_slope"]
+
+    # Extreme one-day trips
+    extreme_threshold = config["extreme_day_receipt_threshold"]
+    extreme_high_pct = config["extreme_day_high_receipt_pct"]
+    extreme_low_multiplier = config["extreme_day_low_receipt_multiplier"]
+
+    # Vacation penalty
+    vacation_enabled = config.get("vacation_penalty_enabled", False)
+    vacation_spend_threshold = config.get("vacation_penalty_spend_threshold", 120)
+    vacation_per_diem_pct = config.get("vacation_penalty_per_diem_pct", 0.5)
+    vacation_receipt_pct = config.get("vacation_penalty_receipt_pct", 0.5)
+
+    # Long trips
+    long_trip_threshold = config["long_trip_duration_threshold"]
+    long_trip_rate = config["per_diem_rate_long_trip"]
+    high_spend_threshold = config["high_spend_threshold"]
+    cap_high = config["receipt_cap_long_trip_high"]
+    cap_low = config["receipt_cap_long_trip_low"]
+    long_sweet_spot_upper = config.get("receipt_sweet_spot_upper_bound", 800)
+    long_low_tier_ceiling = 600
+    long_pct_low_tier = 0.80
+    long_pct_high_tier = 0.50
+    long_base_low = long_low_tier_ceiling * long_pct_low_tier
+    long_base_high = long_base_low + ((long_sweet_spot_upper - long_low_tier_ceiling) * sweet_spot_pct)
+
+    def calculate(trip_duration_days, miles_traveled, total_receipts_amount):
+        days = trip_duration_days
+        miles = miles_traveled
+        receipts = total_receipts_amount
+
+        if days == 1 and miles > 800:
+            if receipts > extreme_threshold:
+                return round_legacy(receipts * extreme_high_pct)
+            return round_legacy((miles + receipts) * extreme_low_multiplier)
+
+        if miles > bp2:
+            mileage_total = mileage_base_3 + ((miles - bp2) * rate3)
+        elif miles > bp1:
+            mileage_total = mileage_base_2 + ((miles - bp1) * rate2)
+        elif miles > 100:
+            mileage_total = mileage_base_1 + ((miles - 100) * rate1)
+        else:
+            mileage_total = miles * primary_mileage_rate
+
+        if days == 0:
+            efficiency_bonus = 0
+        else:
+            mpd = miles / days
+            if 150 <= mpd <= 250:
+                efficiency_bonus = (mpd - 150) * eff_slope
+            elif mpd < 100 or mpd > 300:
+                efficiency_bonus = -50
+            else:
+                efficiency_bonus = 0
+
+        daily_spend = receipts / days if days > 0 else 0
+        if vacation_enabled and days >= 8 and daily_spend > vacation_spend_threshold:
+            per_diem_total = days * (per_diem_rate_14_plus if days > 13 else per_diem_rate_10_plus if days >= 10 else 100)
+            if days >= floor_duration:
+                per_diem_total = max(per_diem_total, days * floor_rate)
+            return round_legacy(per_diem_total * vacation_per_diem_pct + mileage_total +
+                                receipts * vacation_receipt_pct + efficiency_bonus)
+
+        if days >= long_trip_threshold:
+            cap_per_day = cap_high if (receipts / days) > high_spend_threshold else cap_low
+            reimbursable = min(receipts, cap_per_day * days)
+            if reimbursable > long_sweet_spot_upper:
+                receipt_total = long_base_high + ((reimbursable - long_sweet_spot_upper) * long_pct_high_tier)
+            elif reimbursable > long_low_tier_ceiling:
+                receipt_total = long_base_low + ((reimbursable - long_low_tier_ceiling) * sweet_spot_pct)
+            else:
+                receipt_total = reimbursable * long_pct_low_tier
+            return round_legacy(days * long_trip_rate + mileage_total + receipt_total + efficiency_bonus)
+
+        per_diem_total = days * (per_diem_rate_14_plus if days > 13 else per_diem_rate_10_plus if days >= 10 else 100)
+        if days >= floor_duration:
+            per_diem_total = max(per_diem_total, days * floor_rate)
+
+        penalty = 0
+        if days == 1 and receipts > 500:
+            receipt_total = receipts * (one_day_upper_multiplier if receipts > one_day_upper_threshold else one_day_multiplier)
+        elif days == 2 and receipts > 500:
+            receipt_total = receipts * (two_day_upper_multiplier if receipts > two_day_upper_threshold else two_day_multiplier)
+        elif receipts < low_receipt_threshold:
+            receipt_total = receipts * low_tier_pct
+            penalty = -50 if 0 < receipts <= 20 else 0
+        elif receipts < sweet_spot_lower_bound:
+            receipt_total = receipts * standard_pct
+        elif receipts <= sweet_spot_upper_bound:
+            receipt_total = receipts * sweet_spot_pct
+        else:
+            receipt_total = sweet_spot_base + ((receipts - sweet_spot_upper_bound) * high_tier_diminishing_pct)
+
+        return round_legacy(per_diem_total + mileage_total + receipt_total + penalty + efficiency_bonus)
+
+    if PROFILE is not None:
+        return PROFILE.timed("compile_config.calculate", calculate)
+    return calculate
+
+# --- Vectorized batch engine ---
+def cases_to_arrays(cases):
+    """
+    Splits a list of public-style cases into days, miles, receipts and expected
+    arrays. A case_store.CaseStore hands over its memory-mapped columns as they are.
+    """
+    import numpy as np
+    if hasattr(cases, 'arrays'):
+        return cases.arrays()
+    days = np.array([c['input']['trip_duration_days'] for c in cases], dtype=np.float64).astype(np.int64)
+    miles = np.array([c['input']['miles_traveled'] for c in cases], dtype=np.float64)
+    receipts = np.array([c['input']['total_receipts_amount'] for c in cases], dtype=np.float64)
+    expected = np.array([c['expected_output'] for c in cases], dtype=np.float64)
+    return days, miles, receipts, expected
+
+def round_legacy_batch(x):
+    """Array version of round_legacy, bit-for-bit identical to the scalar function."""
+    import numpy as np
+    x = np.asarray(x, dtype=np.float64)
+    scaled = x * 100
+    cents = np.rint(scaled)
+    # x * 100 can land on the wrong side of a half cent, so anything close to
+    # a tie (or too large/non-finite to trust) goes through the scalar function.
+    with np.errstate(invalid='ignore'):
+        frac = np.abs(scaled - np.trunc(scaled))
+        ambiguous = ~np.isfinite(scaled) | (np.abs(scaled) >= 2.0 ** 50) | \
+                    (np.abs(frac - 0.5) <= 1e-9 * np.maximum(1.0, np.abs(scaled)))
+    last_two = np.abs(np.where(ambiguous, 0, cents)) % 100
+    bumped = (last_two == 49) | (last_two == 99)
+    result = np.where(bumped, cents + 1, cents) / 100
+    flat_result, flat_x = result.reshape(-1), x.reshape(-1)
+    for i in np.flatnonzero(ambiguous):
+        flat_result[i] = round_legacy(float(flat_x[i]))
+    return result
+
+def _batch_per_diem(days, miles, receipts, config):
+    # get_per_diem_total
+    import numpy as np
+    days_f = days.astype(np.float64)
+    per_diem_rate = np.where(
+        days > 13, config["per_diem_rate_14_plus_days"],
+        np.where(days >= 10, config["per_diem_rate_10_plus_days"], 100.0)
+    )
+    per_diem_total = days_f * per_diem_rate
+    floor_total = days_f * config.get("per_diem_floor_rate", 60)
+    apply_floor = (days >= config.get("per_diem_floor_duration", 15)) & (floor_total > per_diem_total)
+    return np.where(apply_floor, floor_total, per_diem_total)
+
+def _batch_mileage(days, miles, receipts, config):
+    # get_mileage_total
+    import numpy as np
+    primary_mileage_rate = 0.58
+    bp1 = config["mileage_breakpoint_1"]
+    bp2 = config["mileage_breakpoint_2"]
+    rate1 = config["mileage_rate_tier_1"]
+    rate2 = config["mileage_rate_tier_2"]
+    rate3 = config["mileage_rate_tier_3"]
+    return np.select(
+        [miles > bp2, miles > bp1, miles > 100],
+        [
+            (100 * primary_mileage_rate) + ((bp1 - 100) * rate1) + ((bp2 - bp1) * rate2) + ((miles - bp2) * rate3),
+            (100 * primary_mileage_rate) + ((bp1 - 100) * rate1) + ((miles - bp1) * rate2),
+            (100 * primary_mileage_rate) + ((miles - 100) * rate1),
+        ],
+        miles * primary_mileage_rate,
+    )
+
+def _batch_efficiency(days, miles, receipts, config):
+    # get_efficiency_bonus
+    import numpy as np
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mpd = miles / np.where(days == 0, 1, days)
+        return np.select(
+            [days == 0, (mpd >= 150) & (mpd <= 250), (mpd < 100) | (mpd > 300)],
+            [0.0, (mpd - 150) * config["eff_slope"], -50.0],
+            0.0,
+        )
+
+def _batch_receipts(days, miles, receipts, config):
+    # get_receipt_total, returning (receipt_total, penalty, receipt path code)
+    import numpy as np
+    low_receipt_threshold = config.get("receipt_low_tier_threshold", 200.0)
+    sweet_spot_lower_bound = config.get("receipt_sweet_spot_lower_bound", 600.0)
+    sweet_spot_upper_bound = config.get("receipt_sweet_spot_upper_bound", 800.0)
+    sweet_spot_pct = config.get("receipt_sweet_spot_pct", 0.9)
+    tier_masks = [
+        receipts < low_receipt_threshold,
+        (low_receipt_threshold <= receipts) & (receipts < sweet_spot_lower_bound),
+        (sweet_spot_lower_bound <= receipts) & (receipts <= sweet_spot_upper_bound),
+    ]
+    receipt_total = np.select(tier_masks, [
+        receipts * config.get("receipt_low_tier_pct", 0.1),
+        receipts * config.get("receipt_standard_pct", 0.5),
+        receipts * sweet_spot_pct,
+    ], (sweet_spot_upper_bound * sweet_spot_pct) +
+       ((receipts - sweet_spot_upper_bound) * config.get("receipt_high_tier_diminishing_pct", 0.3)))
+    receipt_code = np.select(tier_masks, [4, 5, 6], 7)
+    penalty = np.where(tier_masks[0] & (receipts > 0) & (receipts <= 20), -50.0, 0.0)
+
+    one_day = (days == 1) & (receipts > 500)
+    one_day_upper = receipts > config.get("one_day_upper_tier_threshold", 800)
+    two_day = (days == 2) & (receipts > 500)
+    two_day_upper = receipts > config.get("two_day_upper_tier_threshold", 800)
+    overrides = [one_day & one_day_upper, one_day, two_day & two_day_upper, two_day]
+    receipt_total = np.select(overrides, [
+        receipts * config.get("one_day_upper_tier_multiplier", 0.6),
+        receipts * config.get("one_day_high_receipt_multiplier", 0.6),
+        receipts * config.get("two_day_upper_tier_multiplier", 0.7),
+        receipts * config.get("two_day_high_receipt_multiplier", 0.7),
+    ], receipt_total)
+    receipt_code = np.select(overrides, [8, 9, 10, 11], receipt_code)
+    penalty = np.where(one_day | two_day, 0.0, penalty)
+    return receipt_total, penalty, receipt_code
+
+def _batch_long_trip(days, miles, receipts, config):
+    # Per diem and receipts of the long-trip two-tier logic
+    import numpy as np
+    days_f = days.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cap_per_day = np.where(
+            (receipts / np.where(days == 0, 1, days)) > config["high_spend_threshold"],
+            config["receipt_cap_long_trip_high"], config["receipt_cap_long_trip_low"]
+        )
+    cap_total = cap_per_day * days_f
+    reimbursable = np.where(cap_total < receipts, cap_total, receipts)
+    low_tier_ceiling = 600
+    sweet_spot_upper = config.get("receipt_sweet_spot_upper_bound", 800)
+    sweet_spot_pct = config.get("receipt_sweet_spot_pct", 0.9)
+    pct_low_tier = 0.80
+    pct_high_tier = 0.50
+    long_receipt_total = np.select([reimbursable > sweet_spot_upper, reimbursable > low_tier_ceiling], [
+        (low_tier_ceiling * pct_low_tier) + ((sweet_spot_upper - low_tier_ceiling) * sweet_spot_pct) +
+        ((reimbursable - sweet_spot_upper) * pct_high_tier),
+        (low_tier_ceiling * pct_low_tier) + ((reimbursable - low_tier_ceiling) * sweet_spot_pct),
+    ], reimbursable * pct_low_tier)
+    return days_f * config["per_diem_rate_long_trip"], long_receipt_total
+
+def _batch_extreme(days, miles, receipts, config):
+    # Extreme one-day trips, returning (total, high receipt mask)
+    import numpy as np
+    extreme_high = receipts > config["extreme_day_receipt_threshold"]
+    extreme_total = np.where(
+        extreme_high,
+        receipts * config["extreme_day_high_receipt_pct"],
+        (miles + receipts) * config["extreme_day_low_receipt_multiplier"],
+    )
+    return extreme_total, extreme_high
+
+def _batch_paths(days, miles, receipts, config):
+    # Path masks, in the same precedence as the scalar function
+    import numpy as np
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_spend = np.where(days > 0, receipts / np.where(days == 0, 1, days), 0.0)
+    is_extreme = (days == 1) & (miles > 800)
+    is_vacation = ~is_extreme & np.asarray(config.get("vacation_penalty_enabled", False), dtype=bool) & \
+                  (days >= 8) & (daily_spend > config.get("vacation_penalty_spend_threshold", 120))
+    is_long = ~is_extreme & ~is_vacation & (days >= config["long_trip_duration_threshold"])
+    return is_extreme, is_vacation, is_long
+
+# Each batch column, the function computing it and the config keys it reads.
+# A column only needs recomputing when one of its keys changes.
+BATCH_COLUMNS = {
+    "per_diem": (_batch_per_diem, (
+        "per_diem_rate_14_plus_days", "per_diem_rate_10_plus_days", "per_diem_floor_rate", "per_diem_floor_duration",
+    )),
+    "mileage": (_batch_mileage, (
+        "mileage_breakpoint_1", "mileage_breakpoint_2", "mileage_rate_tier_1", "mileage_rate_tier_2", "mileage_rate_tier_3",
+    )),
+    "efficiency": (_batch_efficiency, ("eff_slope",)),
+    "receipts": (_batch_receipts, (
+        "receipt_low_tier_threshold", "receipt_sweet_spot_lower_bound", "receipt_sweet_spot_upper_bound",
+        "receipt_low_tier_pct", "receipt_standard_pct", "receipt_sweet_spot_pct", "receipt_high_tier_diminishing_pct",
+        "one_day_upper_tier_threshold", "one_day_upper_tier_multiplier", "one_day_high_receipt_multiplier",
+        "two_day_upper_tier_threshold", "two_day_upper_tier_multiplier", "two_day_high_receipt_multiplier",
+    )),
+    "long_trip": (_batch_long_trip, (
+        "high_spend_threshold", "receipt_cap_long_trip_high", "receipt_cap_long_trip_low",
+        "receipt_sweet_spot_upper_bound", "receipt_sweet_spot_pct", "per_diem_rate_long_trip",
+    )),
+    "extreme": (_batch_extreme, (
+        "extreme_day_receipt_threshold", "extreme_day_high_receipt_pct", "extreme_day_low_receipt_multiplier",
+    )),
+    "paths": (_batch_paths, (
+        "vacation_penalty_enabled", "vacation_penalty_spend_threshold", "long_trip_duration_threshold",
+    )),
+}
+
+def assemble_batch_totals(receipts, columns, config):
+    """
+    Combines BATCH_COLUMNS values into unrounded totals and path codes.
+    Only the vacation penalty percentages are read from config here.
+    """
+    import numpy as np
+    per_diem_total = columns["per_diem"]
+    mileage_total = columns["mileage"]
+    efficiency_bonus = columns["efficiency"]
+    receipt_total, penalty, receipt_code = columns["receipts"]
+    long_per_diem, long_receipt_total = columns["long_trip"]
+    extreme_total, extreme_high = columns["extreme"]
+    is_extreme, is_vacation, is_long = columns["paths"]
+
+    standard_total = per_diem_total + mileage_total + receipt_total + penalty + efficiency_bonus
+    long_total = long_per_diem + mileage_total + long_receipt_total + efficiency_bonus
+    vacation_total = (per_diem_total * config.get("vacation_penalty_per_diem_pct", 0.5) + mileage_total +
+                      receipts * config.get("vacation_penalty_receipt_pct", 0.5) + efficiency_bonus)
+
+    computed_total = np.select([is_extreme, is_vacation, is_long],
+                               [extreme_total, vacation_total, long_total], standard_total)
+    path_codes = np.select([is_extreme & extreme_high, is_extreme, is_vacation, is_long],
+                           [0, 1, 2, 3], receipt_code).astype(np.int8)
+    return computed_total, path_codes
+
+def calculate_reimbursement_batch(trip_duration_days, miles_traveled, total_receipts_amount, config=None, round_result=True):
+    """
+    Vectorized calculate_reimbursement over arrays of numeric inputs.
+    Returns (totals, path_codes) where path_codes are PathCode values indexing BATCH_PATH_LABELS.
+    Config values may also be arrays; they broadcast against the inputs, so
+    a (K, 1) column per key scores K configs against (1, N) cases at once.
+    With round_result=False the totals are returned before round_legacy.
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+    profile = PROFILE
+    if profile is not None:
+        start = profile.clock()
+    days, miles, receipts, columns = _batch_columns(trip_duration_days, miles_traveled, total_receipts_amount, config)
+    computed_total, path_codes = assemble_batch_totals(receipts, columns, config)
+
+    if round_result:
+        computed_total = round_legacy_batch(computed_total)
+    if profile is not None:
+        profile.record_batch(path_codes, start)
+    return computed_total, path_codes
+
+def _batch_columns(trip_duration_days, miles_traveled, total_receipts_amount, config):
+    # Broadcast input arrays and every BATCH_COLUMNS value for them
+    import numpy as np
+    days = np.asarray(trip_duration_days, dtype=np.float64).astype(np.int64)
+    miles = np.asarray(miles_traveled, dtype=np.float64)
+    receipts = np.asarray(total_receipts_amount, dtype=np.float64)
+    days, miles, receipts = np.broadcast_arrays(days, miles, receipts)
+    columns = {name: fn(days, miles, receipts, config) for name, (fn, _) in BATCH_COLUMNS.items()}
+    return days, miles, receipts, columns
+
+class BatchBreakdown:
+    """
+    Breakdown fields for a batch of cases as one array per field, so large
+    batches cost a few arrays rather than a record per case. record(i)
+    returns case i as a Breakdown.
+    """
+    __slots__ = ('days', 'miles', 'path_codes', 'per_diem', 'mileage', 'receipts', 'penalty', 'eff_bonus', 'grand')
+
+    def __init__(self, days, miles, path_codes, per_diem, mileage, receipts, penalty, eff_bonus, grand):
+        self.days = days
+        self.miles = miles
+        self.path_codes = path_codes
+        self.per_diem = per_diem
+        self.mileage = mileage
+        self.receipts = receipts
+        self.penalty = penalty
+        self.eff_bonus = eff_bonus
+        self.grand = grand
+
+    def __len__(self):
+        return len(self.path_codes)
+
+    def record(self, i):
+        PathCode = path_code_enum()
+        code = int(self.path_codes[i])
+        if code in (PathCode.EXTREME_HIGH, PathCode.EXTREME_LOW):
+            miles_per_day = None
+        else:
+            days = int(self.days[i])
+            miles_per_day = float(self.miles[i]) / days if days > 0 else 0
+        return Breakdown(code, float(self.per_diem[i]), float(self.mileage[i]), float(self.receipts[i]),
+                         float(self.penalty[i]), float(self.eff_bonus[i]), float(self.grand[i]), miles_per_day)
+
+def calculate_breakdown_batch(trip_duration_days, miles_traveled, total_receipts_amount, config=None):
+    """
+    calculate_reimbursement_batch with every component, as a BatchBreakdown.
+    Each field matches the scalar Breakdown of the same case.
+    """
+    import numpy as np
+    if config is None:
+        config = DEFAULT_CONFIG
+    days, miles, receipts, columns = _batch_columns(trip_duration_days, miles_traveled, total_receipts_amount, config)
+    computed_total, path_codes = assemble_batch_totals(receipts, columns, config)
+
+    per_diem_total = columns["per_diem"]
+    mileage_total = columns["mileage"]
+    efficiency_bonus = columns["efficiency"]
+    receipt_total, penalty, _ = columns["receipts"]
+    long_per_diem, long_receipt_total = columns["long_trip"]
+    extreme_total, _ = columns["extreme"]
+    is_extreme, is_vacation, is_long = columns["paths"]
+
+    paths = [is_extreme, is_vacation, is_long]
+    return BatchBreakdown(
+        days, miles, path_codes,
+        per_diem=np.select(paths, [0.0, per_diem_total * config.get("vacation_penalty_per_diem_pct", 0.5), long_per_diem], per_diem_total),
+        mileage=np.where(is_extreme, 0.0, mileage_total),
+        receipts=np.select(paths, [extreme_total, receipts * config.get("vacation_penalty_receipt_pct", 0.5), long_receipt_total],
+                           receipt_total),
+        penalty=np.where(is_extreme | is_vacation | is_long, 0.0, penalty),
+        eff_bonus=np.where(is_extreme, 0.0, efficiency_bonus),
+        grand=round_legacy_batch(computed_total),
+    )
+
+# --- Streaming path statistics ---
+# Cases per calculate_reimbursement_batch call when streaming through a case set
+STREAM_CHUNK_SIZE = 65536
+
+def iter_chunks(items, size=STREAM_CHUNK_SIZE):
+    """Yields successive lists of up to size items from any iterable."""
+    from itertools import islice
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class PathErrorSummary:
+    """Count, total and maximum error of one path, plus its sampled cases."""
+    __slots__ = ('count', 'total', 'max', 'sample')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # (random key, case) pairs, smallest keys first
+        self.sample = []
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+    def sampled_cases(self):
+        return [case for _, case in self.sample]
+
+class PathErrorStats:
+    """
+    Running per-path error statistics over a stream of case chunks, in O(paths)
+    memory. path_keys maps each batch path code to the key it is reported under.
+    Each path keeps a uniform random sample of up to sample_size cases: every
+    case draws a random key and the smallest keys seen on its path are kept,
+    so the sample doesn't depend on how the stream was chunked.
+    """
+
+    def __init__(self, path_keys, sample_size=5, seed=None):
+        import numpy as np
+        self.path_keys = path_keys
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.paths = {}
+        self.count = 0
+        self.total = 0.0
+
+    def add_batch(self, path_codes, errors, cases):
+        """Adds one chunk: per-case path codes and errors for the public-style cases."""
+        import numpy as np
+        path_codes = np.asarray(path_codes)
+        errors = np.asarray(errors, dtype=np.float64)
+        sample_keys = self.rng.random(len(errors))
+        self.count += len(errors)
+        self.total += float(errors.sum())
+        for code in np.unique(path_codes):
+            indices = np.flatnonzero(path_codes == code)
+            summary = self.paths.setdefault(self.path_keys[code], PathErrorSummary())
+            path_errors = errors[indices]
+            summary.count += len(indices)
+            summary.total += float(path_errors.sum())
+            summary.max = max(summary.max, float(path_errors.max()))
+            if self.sample_size <= 0:
+                continue
+            if len(indices) > self.sample_size:
+                indices = indices[np.argpartition(sample_keys[indices], self.sample_size - 1)[:self.sample_size]]
+            candidates = summary.sample + [
+                (float(sample_keys[i]), {'input': cases[i]['input'], 'expected': cases[i]['expected_output'], 'error': float(errors[i])})
+                for i in indices
+            ]
+            candidates.sort(key=lambda item: item[0])
+            summary.sample = candidates[:self.sample_size]
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0
+
+    def sorted_paths(self):
+        """(path_key, PathErrorSummary) pairs by descending total error."""
+        return sorted(self.paths.items(), key=lambda item: item[1].total, reverse=True)
+
+def stream_path_errors(cases, config=None, path_keys=None, sample_size=5, seed=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Scores an iterable of public-style cases chunk by chunk and returns their
+    PathErrorStats. path_keys defaults to "path -> receipt_path" per code.
+    """
+    import numpy as np
+    if path_keys is None:
+        path_keys = tuple(f"{path} -> {receipt_path}" for path, receipt_path in BATCH_PATH_LABELS)
+    stats = PathErrorStats(path_keys, sample_size=sample_size, seed=seed)
+    # A CaseStore is sliced, so its columns are scored without building case dicts
+    chunks = (cases[start:start + chunk_size] for start in range(0, len(cases), chunk_size)) if hasattr(cases, 'arrays') \
+        else iter_chunks(cases, chunk_size)
+    for chunk in chunks:
+        days, miles, receipts, expected = cases_to_arrays(chunk)
+        grand, path_codes = calculate_reimbursement_batch(days, miles, receipts, config=config)
+        stats.add_batch(path_codes, np.abs(grand - expected), chunk)
+    return stats
+
+# --- Streaming batch mode ---
+# One process computes a whole case file and writes one line per case, in
+# order, matching what generate_results.sh records from run.sh: the amount,
+# or ERROR when the script fails or prints something that isn't a number.
+BATCH_FIELDS = ("trip_duration_days", "miles_traveled", "total_receipts_amount")
+CLI_OUTPUT_PATTERN = r'^-?[0-9]+\.?[0-9]*$'
+# Plain numbers in [0, BATCH_FAST_LIMIT) are computed by the batch engine; the
+# rest go through the same string sanitization as the three-argument CLI.
+BATCH_FAST_LIMIT = 1e9
+
+def jq_text(value):
+    """value as `jq -r` prints it, i.e. the argument generate_results.sh passes to run.sh."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return jq_number(value)
+    import json
+    return json.dumps(value, separators=(',', ':'))
+
+def jq_number(value):
+    """
+    A number as jq 1.6 prints it: as a double, with the shortest round-trip
+    digits, in exponent form when the decimal point would sit more than 4
+    places left of them or 15 places right of them.
+    """
+    try:
+        x = float(value)
+    except OverflowError:
+        x = float('inf') if value > 0 else float('-inf')
+    if x != x:
+        return "null"
+    if x in (float('inf'), float('-inf')):
+        # jq clamps infinities to the largest double
+        x = 1.7976931348623157e+308 if x > 0 else -1.7976931348623157e+308
+    from decimal import Decimal
+    sign, digit_tuple, exponent = Decimal(repr(x)).as_tuple()
+    digits = ''.join(map(str, digit_tuple)).rstrip('0')
+    if not digits:
+        return "-0" if sign else "0"
+    # Digits before the decimal point
+    decpt = len(digit_tuple) + exponent
+    if decpt <= -4 or decpt > len(digits) + 15:
+        mantissa = digits[0] + ('.' + digits[1:] if len(digits) > 1 else '')
+        text = f"{mantissa}e{'-' if decpt - 1 < 0 else '+'}{abs(decpt - 1):02d}"
+    elif decpt <= 0:
+        text = "0." + "0" * -decpt + digits
+    elif decpt >= len(digits):
+        text = digits + "0" * (decpt - len(digits))
+    else:
+        text = digits[:decpt] + "." + digits[decpt:]
+    return ("-" if sign else "") + text
+
+def record_values(record):
+    """
+    The three input values of a case record as generate_results.sh's jq
+    extraction reads them: fields at the top level only, None where missing
+    and for every field of a null record. Raises ValueError where jq fails,
+    on records that aren't objects.
+    """
+    if record is None:
+        return (None,) * len(BATCH_FIELDS)
+    if not isinstance(record, dict):
+        json_type = {bool: 'boolean', list: 'array', str: 'string'}.get(type(record), 'number')
+        raise ValueError(f"Cannot index {json_type} with string \"{BATCH_FIELDS[0]}\"")
+    return tuple(record.get(field) for field in BATCH_FIELDS)
+
+def is_batch_number(value):
+    # Numbers whose repr (hence the CLI argument) reads back as the same value
+    return type(value) in (int, float) and 0 <= value < BATCH_FAST_LIMIT and 'e' not in repr(value)
+
+def cli_output(trip_duration_days, miles_traveled, total_receipts_amount, config=DEFAULT_CONFIG):
+    """
+    (line, None) with the three-argument CLI's output for these arguments, or
+    (None, error message) where run.sh fails, worded as generate_results.sh
+    reports run.py's stderr with its newlines removed.
+    """
+    try:
+        output = f"{calculate_reimbursement(trip_duration_days, miles_traveled, total_receipts_amount, config=config):.2f}"
+    except Exception as e:
+        message = f"Error executing solution.py:{e}".replace("\n", "")
+        return None, f"Script failed: {message}"
+    import re
+    if not re.match(CLI_OUTPUT_PATTERN, output):
+        return None, f"Invalid output format: {output}"
+    return output, None
+
+def batch_lines(records, config=DEFAULT_CONFIG, first_case=1):
+    """
+    Output lines for a chunk of case records, in order, and (index, message)
+    for the ones that became ERROR. Raises ValueError, naming the case by its
+    number counted from first_case, on a record jq couldn't read.
+    """
+    import numpy as np
+    lines = [None] * len(records)
+    errors = []
+    fast = []
+    all_values = []
+    for i, record in enumerate(records):
+        try:
+            values = record_values(record)
+        except ValueError as e:
+            raise ValueError(f"case {first_case + i}: {e}") from None
+        all_values.append(values)
+        if all(is_batch_number(value) for value in values):
+            fast.append(i)
+        else:
+            output, error = cli_output(*(jq_text(value) for value in values), config=config)
+            lines[i] = output if error is None else "ERROR"
+            if error is not None:
+                errors.append((i, error))
+
+    if fast:
+        values = [all_values[i] for i in fast]
+        totals, _ = calculate_reimbursement_batch(
+            np.array([v[0] for v in values], dtype=np.float64),
+            np.array([v[1] for v in values], dtype=np.float64),
+            np.array([v[2] for v in values], dtype=np.float64),
+            config=config,
+        )
+        for i, total in zip(fast, totals.tolist()):
+            lines[i] = f"{total:.2f}"
+    return lines, errors
+
+def run_batch(infile, outfile, config=DEFAULT_CONFIG, chunk_size=STREAM_CHUNK_SIZE, errfile=None):
+    """
+    Streams the case records of infile (a JSON array or JSON lines) and writes
+    one result line per case to outfile. Failures are reported to errfile as
+    generate_results.sh reports them. Returns (cases, errors). Raises
+    ValueError on a record that isn't an object, where generate_results.sh
+    aborts; the lines of earlier chunks have been written by then.
+    """
+    from case_store import iter_json_records
+    cases = errors = 0
+    for chunk in iter_chunks(iter_json_records(infile), chunk_size):
+        lines, chunk_errors = batch_lines(chunk, config, first_case=cases + 1)
+        outfile.write("\n".join(lines) + "\n")
+        if errfile is not None:
+            for i, message in chunk_errors:
+                print(f"Error on case {cases + i + 1}: {message}", file=errfile)
+        cases += len(chunk)
+        errors += len(chunk_errors)
+    return cases, errors
+
+def run_batch_cli(source, destination, config=DEFAULT_CONFIG):
+    """
+    --batch entry point: source and destination are paths, or '-' for
+    stdin/stdout. A destination file is written in full or, if the run fails,
+    not at all. Returns the exit status.
+    """
+    import json
+    import os
+    infile = sys.stdin if source == '-' else open(source, 'r')
+    tmp_path = None if destination == '-' else destination + ".tmp"
+    outfile = sys.stdout if tmp_path is None else open(tmp_path, 'w', buffering=1 << 20)
+    try:
+        cases, errors = run_batch(infile, outfile, config, errfile=sys.stderr)
+    except (json.JSONDecodeError, ValueError) as e:
+        if isinstance(e, json.JSONDecodeError):
+            print(f"Error: {source} is not valid JSON: {e}", file=sys.stderr)
+        else:
+            print(f"Error: {source}: {e}", file=sys.stderr)
+        if tmp_path is not None:
+            outfile.close()
+            os.unlink(tmp_path)
+        return 1
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if not outfile.closed and outfile is not sys.stdout:
+            outfile.close()
+    if tmp_path is not None:
+        os.replace(tmp_path, destination)
+    print(f"Processed {cases} cases ({errors} errors)", file=sys.stderr)
+    return 0
+
+# --- Resident mode ---
+# A long-lived process that answers newline-delimited requests so callers don't
+# pay interpreter startup per case. run.sh sends "<days>\t<miles>\t<receipts>",
+# which keeps empty arguments and arguments with spaces intact; lines without a
+# tab are split on whitespace, which is handier when typing requests by hand.
+DEFAULT_SOCKET_PATH = "/tmp/reimbursement.sock"
+
+def request_fields(line):
+    """The arguments of a request line, or None for a blank line."""
+    line = line.rstrip('\r\n')
+    if '\t' in line:
+        return line.split('\t')
+    return line.split() or None
+
+def answer_request(line, config):
+    """Computes the CLI output line for a single request, or None for a blank line."""
+    fields = request_fields(line)
+    if fields is None:
+        return None
+    if len(fields) != 3:
+        return f"ERROR: expected 3 values, got {len(fields)}"
+    try:
+        reimbursement = calculate_reimbursement(fields[0], fields[1], fields[2], config=config)
+    except Exception as e:
+        return f"ERROR: {e}"
+    return f"{reimbursement:.2f}"
+
+def serve_stream(infile, outfile, config=DEFAULT_CONFIG):
+    """Answers one request per input line until EOF, flushing after every answer."""
+    for line in infile:
+        answer = answer_request(line, config)
+        if answer is None:
+            continue
+        outfile.write(answer + "\n")
+        outfile.flush()
+
+def remove_socket_file(socket_path):
+    """
+    Removes a socket file left at socket_path, if any. Raises FileExistsError
+    if something other than a socket is there, rather than deleting it.
+    """
+    import errno
+    import os
+    import stat
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "exists and is not a socket", socket_path)
+    os.unlink(socket_path)
+
+def make_socket_server(socket_path=DEFAULT_SOCKET_PATH, config=DEFAULT_CONFIG):
+    """
+    A server answering requests on a Unix domain socket, one thread per
+    client, replacing any stale socket file. Raises FileExistsError if
+    socket_path is taken by anything else.
+    """
+    import socketserver
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw_line in self.rfile:
+                answer = answer_request(raw_line.decode('utf-8', errors='replace'), config)
+                if answer is None:
+                    continue
+                self.wfile.write((answer + "\n").encode('utf-8'))
+                self.wfile.flush()
+
+    remove_socket_file(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, RequestHandler)
+    server.daemon_threads = True
+    return server
+
+def serve_socket(socket_path=DEFAULT_SOCKET_PATH, config=DEFAULT_CONFIG):
+    """Serves requests over a Unix domain socket until interrupted."""
+    server = make_socket_server(socket_path, config)
+    print(f"Serving reimbursements on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        remove_socket_file(socket_path)
+
+# --- Instrumentation ---
+# Opt-in call counts and perf_counter_ns totals per calculation path and per
+# helper function. While inactive, PROFILE is None and the entry points pay
+# only that check; the helpers are replaced by timed wrappers only while an
+# Instrumentation is active.
+PROFILE = None
+PROFILE_ENV = "REIMBURSEMENT_PROFILE"
+INSTRUMENTED_FUNCTIONS = ("clean_and_convert", "get_per_diem_total", "get_mileage_total", "get_receipt_total",
+                          "get_efficiency_bonus", "round_legacy")
+
+def path_label(path, receipt_path):
+    """The label a path is reported under: the receipt tier on the NORMAL path, otherwise the path itself."""
+    return receipt_path if path == "NORMAL" else path
+
+class Instrumentation:
+    """
+    Call counts and elapsed nanoseconds collected while active:
+    - paths: per label, calculate_reimbursement_fast calls that took the path
+      and their time, helpers included;
+    - functions: per instrumented helper, compiled calculators made by
+      compile_config and calculate_reimbursement_batch;
+    - batch_paths: per label, cases the batch engine sent down the path.
+    Activate it as a context manager (`with Instrumentation() as stats:`) or
+    with start()/stop(). The timed wrappers add their own overhead, so
+    compare times against each other rather than against uninstrumented runs.
+    """
+
+    def __init__(self):
+        from time import perf_counter_ns
+        self.clock = perf_counter_ns
+        self.paths = {}
+        self.functions = {}
+        self.batch_paths = {}
+        self._previous = None
+        self._originals = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        global PROFILE
+        namespace = globals()
+        self._previous = PROFILE
+        self._originals = {name: namespace[name] for name in INSTRUMENTED_FUNCTIONS}
+        for name, function in self._originals.items():
+            namespace[name] = self.timed(name, function)
+        PROFILE = self
+
+    def stop(self):
+        global PROFILE
+        globals().update(self._originals)
+        PROFILE = self._previous
+
+    def timed(self, name, function):
+        """function wrapped to count its calls and time under functions[name]."""
+        clock = self.clock
+        totals = self.functions.setdefault(name, [0, 0])
+
+        def timed_function(*args, **kwargs):
+            start = clock()
+            result = function(*args, **kwargs)
+            totals[0] += 1
+            totals[1] += clock() - start
+            return result
+        return timed_function
+
+    def record_path(self, path, receipt_path, start):
+        elapsed = self.clock() - start
+        totals = self.paths.setdefault(path_label(path, receipt_path), [0, 0])
+        totals[0] += 1
+        totals[1] += elapsed
+
+    def record_batch(self, path_codes, start):
+        import numpy as np
+        elapsed = self.clock() - start
+        totals = self.functions.setdefault("calculate_reimbursement_batch", [0, 0])
+        totals[0] += 1
+        totals[1] += elapsed
+        counts = np.bincount(np.asarray(path_codes).ravel(), minlength=len(BATCH_PATH_LABELS))
+        for code, count in enumerate(counts.tolist()):
+            if count:
+                label = path_label(*BATCH_PATH_LABELS[code])
+                self.batch_paths[label] = self.batch_paths.get(label, 0) + count
+
+    def as_dict(self):
+        """The collected counts as plain JSON-serializable data, e.g. to send from a worker process."""
         return {
-            "path": path,
-            "receipt_path": receipt_path,
-            "miles_per_day": miles_per_day,
-            "per_diem": per_diem_total,
-            "mileage": mileage_total,
-            "receipts$": receipt_total,
-            "penalty": penalty,
-            "eff_bonus": efficiency_bonus,
-            "grand": computed_total
+            "paths": {label: {"calls": calls, "ns": ns} for label, (calls, ns) in self.paths.items()},
+            "functions": {name: {"calls": calls, "ns": ns} for name, (calls, ns) in self.functions.items()},
+            "batch_paths": dict(self.batch_paths),
         }
 
-    return computed_total
+    def merge(self, data):
+        """Adds counts from another Instrumentation's as_dict()."""
+        for attribute in ("paths", "functions"):
+            collected = getattr(self, attribute)
+            for name, entry in data[attribute].items():
+                totals = collected.setdefault(name, [0, 0])
+                totals[0] += entry["calls"]
+                totals[1] += entry["ns"]
+        for label, count in data["batch_paths"].items():
+            self.batch_paths[label] = self.batch_paths.get(label, 0) + count
+
+    def __bool__(self):
+        # Helpers are registered when wrapped, so only entries with calls count
+        return any(calls for calls, _ in self.paths.values()) or any(calls for calls, _ in self.functions.values()) \
+            or bool(self.batch_paths)
+
+    def format_table(self):
+        lines = []
+        for title, collected in (("Path", self.paths), ("Function", self.functions)):
+            called = {name: totals for name, totals in collected.items() if totals[0]}
+            if not called:
+                continue
+            lines.append(f"{title:<45} {'Calls':>10} {'Total ms':>12} {'Avg ns':>10}")
+            for name, (calls, ns) in sorted(called.items(), key=lambda item: item[1][1], reverse=True):
+                lines.append(f"{name:<45} {calls:>10} {ns / 1e6:>12.3f} {ns / calls:>10.0f}")
+            lines.append("")
+        if self.batch_paths:
+            lines.append(f"{'Batch path':<45} {'Cases':>10}")
+            for label, count in sorted(self.batch_paths.items(), key=lambda item: item[1], reverse=True):
+                lines.append(f"{label:<45} {count:>10}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def dump(self, fmt="table", file=None):
+        """Writes the counts to file (default stderr) as "json" or as a text table."""
+        file = file or sys.stderr
+        if fmt == "json":
+            import json
+            file.write(json.dumps(self.as_dict(), indent=2) + "\n")
+        else:
+            file.write(self.format_table())
+
+def _environ_get(name):
+    # os takes ~2 ms to import under -S, which run.sh uses, but the builtin
+    # posix (or nt) module it wraps is always loaded and holds the environment
+    if 'os' in sys.modules:
+        return sys.modules['os'].environ.get(name)
+    if 'posix' in sys.modules:
+        value = sys.modules['posix'].environ.get(name.encode())
+        return value.decode(errors='replace') if value is not None else None
+    return sys.modules['nt'].environ.get(name)
+
+def start_env_instrumentation():
+    """
+    With REIMBURSEMENT_PROFILE set ("table" or "json"), starts an
+    Instrumentation for the rest of the run and writes it to stderr at exit.
+    Returns it, or None when the variable is unset.
+    """
+    fmt = _environ_get(PROFILE_ENV)
+    if not fmt:
+        return None
+    stats = Instrumentation()
+    stats.start()
+    import atexit
+
+    def dump_at_exit():
+        # A module imported twice (as __main__ and as solution) only reports the copy that ran
+        if stats:
+            stats.dump(fmt)
+    atexit.register(dump_at_exit)
+    return stats
+
+ENV_INSTRUMENTATION = start_env_instrumentation()
 
 if __name__ == '__main__':
-    if len(sys.argv) == 4:
+    if '--serve' in sys.argv:
+        # Resident mode: stdin/stdout by default, or a Unix socket with --socket [path]
+        if '--socket' in sys.argv:
+            socket_index = sys.argv.index('--socket') + 1
+            socket_path = sys.argv[socket_index] if socket_index < len(sys.argv) else DEFAULT_SOCKET_PATH
+            try:
+                serve_socket(socket_path, config=DEFAULT_CONFIG)
+            except FileExistsError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        else:
+            serve_stream(sys.stdin, sys.stdout, config=DEFAULT_CONFIG)
+    elif '--batch' in sys.argv:
+        # Batch mode: --batch <cases.json|-> [--out <file|->], one result line per case
+        batch_index = sys.argv.index('--batch') + 1
+        source = sys.argv[batch_index] if batch_index < len(sys.argv) else '-'
+        destination = '-'
+        if '--out' in sys.argv:
+            out_index = sys.argv.index('--out') + 1
+            destination = sys.argv[out_index] if out_index < len(sys.argv) else '-'
+        sys.exit(run_batch_cli(source, destination, config=DEFAULT_CONFIG))
+    elif len(sys.argv) == 4:
         # Pass raw strings to the calculation function, which handles sanitization
         trip_duration_days = sys.argv[1]
         miles_traveled = sys.argv[2]
@@ -342,79 +1503,52 @@ if __name__ == '__main__':
         # Ensure output is formatted to exactly two decimal places
         print(f"{reimbursement:.2f}")
     else:
-        # Running for testing with public_cases.json
-        with open('public_cases.json', 'r') as f:
-            cases = json.load(f)
+        # Running for testing with public_cases.json, via its memory-mapped case store
+        from case_store import load_case_store
+        cases = load_case_store('public_cases.json')
         
         if '--filter' in sys.argv:
             filter_index = sys.argv.index('--filter') + 1
             if filter_index < len(sys.argv):
                 filter_str = sys.argv[filter_index]
-                original_cases = cases
-                cases = []
-                for case in original_cases:
-                    context = case['input']
-                    if eval(filter_str, {}, context):
-                        cases.append(case)
-                print(f"Filtered to {len(cases)} cases based on: '{filter_str}'")
-        
-        errors = []
-        
-        for case in cases:
-            inputs = case['input']
-            expected_output = case['expected_output']
-            
-            # Use the debug flag to get detailed info
-            debug_info = calculate_reimbursement(
-                inputs['trip_duration_days'],
-                inputs['miles_traveled'],
-                inputs['total_receipts_amount'],
-                debug=True,
-                config=DEFAULT_CONFIG # Pass config to get correct baseline
-            )
-            
-            calculated_output = debug_info['grand']
-            error = abs(calculated_output - expected_output)
-            errors.append({'input': inputs, 'expected': expected_output, 'debug': debug_info, 'error': error})
-            
-        average_error = sum(e['error'] for e in errors) / len(cases)
-        print(f"Average Error: {average_error:.2f}\n")
+                cases = (case for case in cases if eval(filter_str, {}, case['input']))
+                print(f"Filtering cases based on: '{filter_str}'")
 
-        # --- Path-based error analysis ---
-        path_buckets = {}
-        for e in errors:
-            receipt_path_str = e['debug'].get('receipt_path', 'N/A')
-            path_key = f"{e['debug']['path']} -> {receipt_path_str}"
-            if path_key not in path_buckets:
-                path_buckets[path_key] = []
-            path_buckets[path_key].append(e)
+        # Cases are scored chunk by chunk; only per-path totals and a small
+        # random sample per path are kept.
+        stats = stream_path_errors(cases, config=DEFAULT_CONFIG, sample_size=5)
+        if '--filter' in sys.argv:
+            print(f"Filtered to {stats.count} cases")
+        if not stats.count:
+            print("No cases to analyze.")
+            sys.exit()
+
+        print(f"Average Error: {stats.average:.2f}\n")
 
+        # --- Path-based error analysis ---
         print("\nPath-based error analysis (by total error contribution):")
-        path_total_errors = {name: sum(err['error'] for err in errs) for name, errs in path_buckets.items()}
-        sorted_paths = sorted(path_buckets.items(), key=lambda item: path_total_errors[item[0]], reverse=True)
+        sorted_paths = stats.sorted_paths()
 
-        for path_name, path_errors in sorted_paths:
-            count = len(path_errors)
-            if count > 0:
-                total_error_in_path = path_total_errors[path_name]
-                avg_error_in_path = total_error_in_path / count
-                print(f"  - Path: {path_name:<50} | Cases: {count:<4} | Total Error: ${total_error_in_path:<8.2f} | Avg Error: ${avg_error_in_path:<8.2f}")
+        for path_name, summary in sorted_paths:
+            print(f"  - Path: {path_name:<50} | Cases: {summary.count:<4} | Total Error: ${summary.total:<8.2f} | Avg Error: ${summary.average:<8.2f} | Max Error: ${summary.max:<8.2f}")
 
         # --- Focused analysis on the highest-contributing path ---
         if sorted_paths:
-            highest_impact_path_name, target_path_errors = sorted_paths[0]
-            
-            if not target_path_errors:
-                print("\nNo significant errors to analyze. Great job!")
-                sys.exit()
-
-            print(f"\nAnalysis of Highest-Error Path: '{highest_impact_path_name}' ({len(target_path_errors)} cases)")
-            
-            # Take a random sample to avoid bias
-            sample_size = min(5, len(target_path_errors)) # Show top 5
-            random_sample = random.sample(target_path_errors, sample_size)
-            
-            for e in random_sample:
+            highest_impact_path_name, target_summary = sorted_paths[0]
+
+            print(f"\nAnalysis of Highest-Error Path: '{highest_impact_path_name}' ({target_summary.count} cases)")
+
+            # A uniform random sample of the path's cases, to avoid bias
+            for e in target_summary.sampled_cases():
+                inputs = e['input']
+                # Only the sampled cases need the full scalar breakdown
+                e['debug'] = calculate_reimbursement_fast(
+                    inputs['trip_duration_days'],
+                    inputs['miles_traveled'],
+                    inputs['total_receipts_amount'],
+                    breakdown=True,
+                    config=DEFAULT_CONFIG
+                )
                 print(f"Input: {e['input']}, Expected: {e['expected']:.2f}, Error: {e['error']:.2f}")
                 print(f"  Debug Info: {e['debug']}")
                 print("-" * 20) 
\ No newline at end of file
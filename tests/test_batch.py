@@ -0,0 +1,189 @@
+import unittest
+import sys
+import os
+import io
+import json
+import random
+import shutil
+import tempfile
+import contextlib
+
+import numpy as np
+
+# Add the parent directory to the path so we can import the solution
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from solution import calculate_reimbursement, calculate_reimbursement_fast, calculate_reimbursement_batch, compile_config, DEFAULT_CONFIG, round_legacy, round_legacy_batch, BATCH_PATH_LABELS
+from solution import calculate_breakdown_batch, Breakdown, PathCode
+from solution import run_batch, run_batch_cli, cli_output, jq_number, jq_text
+
+def load_all_inputs():
+    with open(os.path.join(ROOT, 'public_cases.json'), 'r') as f:
+        inputs = [c['input'] for c in json.load(f)]
+    with open(os.path.join(ROOT, 'private_cases.json'), 'r') as f:
+        inputs += json.load(f)
+    return inputs
+
+class TestBatchMatchesScalar(unittest.TestCase):
+
+    def assert_batch_matches(self, inputs):
+        days = np.array([i['trip_duration_days'] for i in inputs])
+        miles = np.array([i['miles_traveled'] for i in inputs], dtype=float)
+        receipts = np.array([i['total_receipts_amount'] for i in inputs], dtype=float)
+        totals, path_codes = calculate_reimbursement_batch(days, miles, receipts)
+        for i, inp in enumerate(inputs):
+            debug_info = calculate_reimbursement(
+                inp['trip_duration_days'], inp['miles_traveled'], inp['total_receipts_amount'], debug=True
+            )
+            # Bit-for-bit, not just approximately equal
+            self.assertEqual(float(totals[i]).hex(), float(debug_info['grand']).hex(), inp)
+            self.assertEqual(BATCH_PATH_LABELS[path_codes[i]], (debug_info['path'], debug_info['receipt_path']), inp)
+
+    def test_public_and_private_cases(self):
+        self.assert_batch_matches(load_all_inputs())
+
+    def test_random_grid(self):
+        rng = random.Random(725)
+        inputs = []
+        for _ in range(20000):
+            inputs.append({
+                'trip_duration_days': rng.randint(0, 20),
+                'miles_traveled': rng.choice([rng.randint(0, 1500), round(rng.uniform(0, 1500), 2)]),
+                'total_receipts_amount': round(rng.uniform(0, 2500), rng.choice([0, 1, 2])),
+            })
+        self.assert_batch_matches(inputs)
+
+    def test_round_legacy_batch_near_ties(self):
+        # Values like 0.285 and 1.005 sit just below a half cent in binary
+        values = np.concatenate([np.arange(-20000, 20000) / 1000, np.arange(-20000, 20000) / 200,
+                                 [0.285, 1.005, 1.015, 2.675, 0.125, -1.49, 1e20]])
+        batch = round_legacy_batch(values)
+        for x, y in zip(values, batch):
+            self.assertEqual(float(y).hex(), float(round_legacy(float(x))).hex(), x)
+
+class TestBreakdown(unittest.TestCase):
+
+    def test_dict_view_matches_record(self):
+        record = calculate_reimbursement(9, 602, 186.69, breakdown=True)
+        self.assertIsInstance(record, Breakdown)
+        self.assertIs(record.code, PathCode.LONG_TRIP)
+        # The enum is built only when code is read
+        self.assertIs(type(record.code_value), int)
+        self.assertEqual(record.as_dict(), calculate_reimbursement(9, 602, 186.69, debug=True))
+        extreme = calculate_reimbursement(1, 900, 1000, debug=True)
+        self.assertNotIn('miles_per_day', extreme)
+        self.assertEqual(extreme['receipt_path'], None)
+
+    def test_batch_breakdown_matches_scalar(self):
+        inputs = load_all_inputs()
+        days = np.array([i['trip_duration_days'] for i in inputs])
+        miles = np.array([i['miles_traveled'] for i in inputs], dtype=float)
+        receipts = np.array([i['total_receipts_amount'] for i in inputs], dtype=float)
+        batch = calculate_breakdown_batch(days, miles, receipts)
+        self.assertEqual(len(batch), len(inputs))
+        for i, inp in enumerate(inputs):
+            scalar = calculate_reimbursement(
+                inp['trip_duration_days'], inp['miles_traveled'], inp['total_receipts_amount'], breakdown=True
+            )
+            record = batch.record(i)
+            self.assertIs(record.code, scalar.code)
+            self.assertIs(type(record.code_value), int)
+            for field in Breakdown.__slots__[1:]:
+                self.assertEqual(getattr(record, field), getattr(scalar, field), (inp, field))
+
+class TestBatchCli(unittest.TestCase):
+
+    def expected_lines(self, records):
+        # What generate_results.sh records: jq's text of each field through the CLI
+        lines = []
+        for record in records:
+            output, _ = cli_output(*(jq_text(record.get(k)) for k in ('trip_duration_days', 'miles_traveled', 'total_receipts_amount')))
+            lines.append(output or "ERROR")
+        return lines
+
+    def test_matches_cli_on_private_cases(self):
+        with open(os.path.join(ROOT, 'private_cases.json'), 'r') as f:
+            text = f.read()
+        # Small chunks, fed as JSON lines as well as the JSON array
+        lines = "\n".join(json.dumps(r) for r in json.loads(text))
+        for source in (text, lines):
+            out = io.StringIO()
+            self.assertEqual(run_batch(io.StringIO(source), out, chunk_size=333), (5000, 0))
+            self.assertEqual(out.getvalue().splitlines(), self.expected_lines(json.loads(text)))
+
+    def test_malformed_records(self):
+        records = [
+            {"trip_duration_days": 3, "miles_traveled": 93, "total_receipts_amount": 1.42},
+            {"trip_duration_days": "5 days", "miles_traveled": 250},
+            {"trip_duration_days": "1" + "0" * 400, "miles_traveled": 5, "total_receipts_amount": 3},
+            {"trip_duration_days": 3, "miles_traveled": "9" * 400, "total_receipts_amount": 3},
+            {"trip_duration_days": 99999999999999999999999, "miles_traveled": 10, "total_receipts_amount": True},
+            {"trip_duration_days": -2, "miles_traveled": 1e-7, "total_receipts_amount": [1, 2]},
+        ]
+        out, err = io.StringIO(), io.StringIO()
+        cases, errors = run_batch(io.StringIO(json.dumps(records) + "\n"), out, errfile=err)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines, self.expected_lines(records))
+        self.assertEqual((cases, errors), (6, 2))
+        self.assertEqual([i for i, line in enumerate(lines) if line == "ERROR"], [2, 3])
+        # run.py's error, as generate_results.sh prints it with newlines removed
+        self.assertIn("Error on case 3: Script failed: Error executing solution.py:cannot convert float infinity to integer\n",
+                      err.getvalue())
+
+    def test_records_read_as_jq_reads_them(self):
+        # jq reads every field of null, and of a record nested under "input", as null
+        null_line = self.expected_lines([{}])
+        nested = {"input": {"trip_duration_days": 3, "miles_traveled": 93, "total_receipts_amount": 1.42}}
+        out = io.StringIO()
+        self.assertEqual(run_batch(io.StringIO(json.dumps([None, nested])), out), (2, 0))
+        self.assertEqual(out.getvalue().splitlines(), null_line * 2)
+
+        # and fails the whole run on a record that isn't an object
+        with self.assertRaisesRegex(ValueError, 'case 2: Cannot index number with string "trip_duration_days"'):
+            run_batch(io.StringIO("[null, 7]"), io.StringIO())
+
+    def test_failed_run_writes_no_results(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        source, destination = os.path.join(tmp, 'cases.json'), os.path.join(tmp, 'results.txt')
+        with open(source, 'w') as f:
+            f.write('[{"trip_duration_days": 3}, [1, 2, 3]]')
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            self.assertEqual(run_batch_cli(source, destination), 1)
+        self.assertIn("case 2: Cannot index array", err.getvalue())
+        self.assertEqual(os.listdir(tmp), ['cases.json'])
+
+    def test_jq_number_formatting(self):
+        # Outputs of `jq -r` (jq 1.6) for the same JSON numbers
+        for value, text in [(99999999999999999999999, "1e+23"), (1234567890123456789, "1234567890123456800"),
+                            (10 ** 17, "1e+17"), (0.0001, "0.0001"), (0.00001, "1e-05"), (3.0, "3"),
+                            (1.5e300, "1.5e+300"), (-0.0, "-0"), (1.42, "1.42"), (float('inf'), "1.7976931348623157e+308")]:
+            self.assertEqual(jq_number(value), text, value)
+
+class TestCompiledConfig(unittest.TestCase):
+
+    def assert_compiled_matches(self, config, inputs):
+        calculate = compile_config(config)
+        for inp in inputs:
+            args = (inp['trip_duration_days'], inp['miles_traveled'], inp['total_receipts_amount'])
+            expected = calculate_reimbursement_fast(*args, config=config)
+            self.assertEqual(float(calculate(*args)).hex(), float(expected).hex(), inp)
+
+    def test_default_config(self):
+        self.assert_compiled_matches(None, load_all_inputs())
+
+    def test_perturbed_configs(self):
+        # Shift every numeric parameter so tier boundaries move across the cases
+        rng = random.Random(725)
+        inputs = load_all_inputs()
+        for _ in range(5):
+            config = DEFAULT_CONFIG.copy()
+            for key, value in config.items():
+                if isinstance(value, float):
+                    config[key] = value * rng.uniform(0.8, 1.2)
+            self.assert_compiled_matches(config, inputs)
+
+if __name__ == '__main__':
+    unittest.main()
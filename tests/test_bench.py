@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+# Add the parent directory to the path so we can import the benchmarks
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from solution import calculate_reimbursement_fast, PathCode
+import bench
+from bench import PATH_INPUTS, compare_to_baseline, regression_ratio, main
+
+class TestBench(unittest.TestCase):
+
+    def test_path_inputs_cover_every_path(self):
+        self.assertEqual(set(PATH_INPUTS), {code.name for code in PathCode})
+        for name, inputs in PATH_INPUTS.items():
+            self.assertIs(calculate_reimbursement_fast(*inputs, breakdown=True).code, PathCode[name])
+
+    def test_regressions_respect_metric_direction(self):
+        self.assertEqual(regression_ratio("paths.LOW_TIER.fast_ns", 150, 100), 1.5)
+        self.assertEqual(regression_ratio("throughput.public_cases.batch_per_s", 50, 100), 2.0)
+        self.assertEqual(regression_ratio("imports.run.py.modules_count", 0, 0), 1.0)
+        self.assertEqual(regression_ratio("imports.solution.py.modules_count", 2, 0), float("inf"))
+
+        metrics = {"a.b.c_ms": 12.0, "a.b.d_ms": 14.0, "a.b.e_per_s": 60.0, "a.b.new_ms": 1.0}
+        baseline = {"a.b.c_ms": 10.0, "a.b.d_ms": 10.0, "a.b.e_per_s": 100.0}
+        regressed = {name: flag for name, _, _, _, flag in compare_to_baseline(metrics, baseline, tolerance=0.3)}
+        self.assertEqual(regressed, {"a.b.c_ms": False, "a.b.d_ms": True, "a.b.e_per_s": True})
+
+    def test_output_and_baseline_files(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        output, baseline = os.path.join(tmp, 'bench_output.txt'), os.path.join(tmp, 'baseline.json')
+        cwd = os.getcwd()
+        self.addCleanup(os.chdir, cwd)
+        # One path and one repeat keep this quick
+        patcher = mock.patch.dict(bench.PATH_INPUTS, {'LOW_TIER': PATH_INPUTS['LOW_TIER']}, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        args = ['paths', '--repeats', '1', '--output', output, '--baseline', baseline]
+
+        self.assertEqual(main(args + ['--update-baseline']), 0)
+        with open(baseline) as f:
+            stored = json.load(f)['metrics']
+        self.assertEqual(sorted(stored), ['paths.LOW_TIER.cli_ns', 'paths.LOW_TIER.fast_ns'])
+
+        # A baseline ten times faster than this machine fails the gate
+        with open(baseline, 'w') as f:
+            json.dump({'metrics': {name: value / 10 for name, value in stored.items()}}, f)
+        self.assertEqual(main(args), 1)
+        with open(output) as f:
+            results = json.load(f)
+        self.assertEqual(sorted(results['regressions']), sorted(stored))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+
+import numpy as np
+
+# Add the parent directory to the path so we can import the case store
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from solution import cases_to_arrays
+from case_store import iter_json_records, build_case_store, load_case_store, open_case_store, record_fields
+
+class TestJsonRecords(unittest.TestCase):
+
+    def test_array_and_json_lines_with_tiny_buffers(self):
+        records = [{'a': 1, 'b': [1.5, "x,]"]}, {'a': 22}, 3.25, {'c': None}]
+        as_array = json.dumps(records, indent=2)
+        as_lines = "\n".join(json.dumps(r) for r in records) + "\n"
+        for text in (as_array, as_lines):
+            for buffer_size in (1, 3, 7, 1 << 16):
+                self.assertEqual(list(iter_json_records(io.StringIO(text), buffer_size)), records, (text, buffer_size))
+
+    def test_malformed_json_raises(self):
+        for text in ('[{"a": 1}, {"a": ', '[{"a": 1}', '{"a": 1} {oops}'):
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_json_records(io.StringIO(text), 4))
+
+class TestCaseStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def copy_case_file(self, name):
+        path = os.path.join(self.tmp, name)
+        shutil.copy(os.path.join(ROOT, name), path)
+        return path
+
+    def test_columns_and_cases_match_json(self):
+        for name in ('public_cases.json', 'private_cases.json'):
+            json_path = self.copy_case_file(name)
+            with open(json_path) as f:
+                records = json.load(f)
+            store = load_case_store(json_path)
+            self.assertEqual(len(store), len(records))
+            self.assertIsInstance(store.days, np.memmap)
+
+            fields = [record_fields(r) for r in records]
+            np.testing.assert_array_equal(store.days, [d for d, _, _, _ in fields])
+            np.testing.assert_array_equal(store.miles, [m for _, m, _, _ in fields])
+            np.testing.assert_array_equal(store.receipts, [r for _, _, r, _ in fields])
+            if name == 'public_cases.json':
+                for a, b in zip(cases_to_arrays(store), cases_to_arrays(records)):
+                    np.testing.assert_array_equal(a, b)
+                # Compared as JSON, so 93 and 93.0 differ
+                self.assertEqual(json.dumps(list(store)), json.dumps(records))
+                self.assertEqual(json.dumps(store[17]), json.dumps(records[17]))
+                self.assertEqual(json.dumps(store[-1]), json.dumps(records[-1]))
+            else:
+                self.assertIsNone(store.expected)
+                self.assertEqual(json.dumps([c['input'] for c in store]), json.dumps(records))
+
+    def test_integral_miles_are_stored_as_int32(self):
+        json_path = os.path.join(self.tmp, 'cases.json')
+        with open(json_path, 'w') as f:
+            f.write('{"trip_duration_days": 3, "miles_traveled": 93, "total_receipts_amount": 1.42}\n'
+                    '{"trip_duration_days": 5, "miles_traveled": 250, "total_receipts_amount": 150}\n')
+        store = open_case_store(build_case_store(json_path, chunk_size=1))
+        self.assertEqual(store.days.dtype, np.int16)
+        self.assertEqual(store.miles.dtype, np.int32)
+        self.assertEqual(store.receipts.tolist(), [1.42, 150.0])
+
+    def test_json_integers_read_back_as_ints(self):
+        json_path = os.path.join(self.tmp, 'cases.json')
+        with open(json_path, 'w') as f:
+            f.write('{"trip_duration_days": 3, "miles_traveled": 93, "total_receipts_amount": 150, "expected_output": 364}\n'
+                    '{"trip_duration_days": 5, "miles_traveled": 250.5, "total_receipts_amount": 150.0, "expected_output": 1.5}\n')
+        store = open_case_store(build_case_store(json_path, chunk_size=1))
+        self.assertEqual(store.miles.dtype, np.float64)
+        self.assertEqual(json.dumps(list(store)), json.dumps([
+            {'input': {'trip_duration_days': 3, 'miles_traveled': 93, 'total_receipts_amount': 150}, 'expected_output': 364},
+            {'input': {'trip_duration_days': 5, 'miles_traveled': 250.5, 'total_receipts_amount': 150.0}, 'expected_output': 1.5},
+        ]))
+        self.assertEqual(json.dumps(store[1:][0]), json.dumps(list(store)[1]))
+
+    def test_non_integer_days_are_rejected(self):
+        json_path = os.path.join(self.tmp, 'cases.json')
+        for days in ('3.5', '3.0', '"3"'):
+            with open(json_path, 'w') as f:
+                f.write('{"trip_duration_days": %s, "miles_traveled": 93, "total_receipts_amount": 1.42}\n' % days)
+            with self.assertRaises(ValueError):
+                build_case_store(json_path)
+
+    def test_rebuilt_when_json_changes(self):
+        json_path = self.copy_case_file('public_cases.json')
+        store = load_case_store(json_path)
+        digest = store.digest()
+        self.assertEqual(load_case_store(json_path).digest(), digest)
+
+        with open(json_path) as f:
+            records = json.load(f)
+        records[0]['expected_output'] += 1
+        with open(json_path, 'w') as f:
+            json.dump(records[:500], f)
+        changed = load_case_store(json_path)
+        self.assertEqual(len(changed), 500)
+        self.assertEqual(changed[0]['expected_output'], records[0]['expected_output'])
+        self.assertNotEqual(changed.digest(), digest)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import csv
+import shutil
+import tempfile
+import contextlib
+import io
+import subprocess
+from unittest import mock
+
+# Add the parent directory to the path so we can import the evaluator
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from eval import latency_percentiles, write_timings_csv, run_cases_in_process, run_cases_subprocess
+from solution import Instrumentation
+
+class TestLatency(unittest.TestCase):
+
+    def test_percentiles_use_nearest_rank(self):
+        latencies = [i / 1000 for i in range(100, 0, -1)]
+        self.assertEqual(latency_percentiles(latencies), {'p50': 0.05, 'p90': 0.09, 'p99': 0.099, 'max': 0.1})
+        self.assertEqual(latency_percentiles([0.2]), {'p50': 0.2, 'p90': 0.2, 'p99': 0.2, 'max': 0.2})
+        self.assertEqual(latency_percentiles([]), {})
+
+    def test_timings_csv_has_a_row_per_case(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, 'timings.csv')
+        cases = [{'input': {'trip_duration_days': 3, 'miles_traveled': 93, 'total_receipts_amount': 1.42}},
+                 {'input': {'trip_duration_days': 5, 'miles_traveled': 10, 'total_receipts_amount': 5}}]
+        outputs = run_cases_in_process(cases[:1], workers=1)
+        self.assertGreater(outputs[0][2], 0)
+        # A failed run keeps its time too
+        outputs.append((None, "Script failed: boom", 0.25))
+
+        write_timings_csv(path, cases, outputs)
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['case'] for row in rows], ['1', '2'])
+        self.assertEqual([row['status'] for row in rows], ['ok', 'error'])
+        self.assertEqual(rows[0]['miles_traveled'], '93')
+
+class TestSubprocessProfile(unittest.TestCase):
+
+    def test_unreadable_profile_keeps_one_output_per_case(self):
+        cases = [{'input': {'trip_duration_days': 3, 'miles_traveled': 93, 'total_receipts_amount': 1.42}}]
+        process = subprocess.CompletedProcess([], 0, stdout="364.51\n", stderr="Traceback: not JSON\n")
+        with mock.patch('eval.subprocess.run', return_value=process), contextlib.redirect_stdout(io.StringIO()) as out:
+            outputs = run_cases_subprocess(cases, instrumentation=Instrumentation())
+        self.assertEqual([(line, failure) for line, failure, _ in outputs], [("364.51", None)])
+        self.assertIn("case 1 reported an unreadable profile", out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+# Add the parent directory to the path so we can import the generator
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from generate_results import generate_results, shard_cases, case_args, main
+
+# Stands in for run.sh: fails, pads, prints garbage or echoes depending on the first argument
+FAKE_SCRIPT = """#!/bin/bash
+case "$1" in
+  1) echo "boom line1" >&2; echo "line2" >&2; exit 3;;
+  2) echo " 12.5 "; echo;;
+  3) echo "abc";;
+  *) echo "$1$2";;
+esac
+"""
+
+class TestGenerateResults(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.script = os.path.join(self.tmp, 'run.sh')
+        with open(self.script, 'w') as f:
+            f.write(FAKE_SCRIPT)
+        os.chmod(self.script, 0o755)
+
+    def test_shards_are_contiguous(self):
+        self.assertEqual(shard_cases(list(range(7)), 3), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(shard_cases([1], 4), [[1]])
+        self.assertEqual(shard_cases([], 4), [])
+
+    def test_lines_and_errors_match_generate_results_sh(self):
+        records = [{'trip_duration_days': d, 'miles_traveled': m, 'total_receipts_amount': 1}
+                   for d, m in [(5, 1), (1, 2), (2, 3), (3, 1e20), (7, 8.0), (6, None)]]
+        for shards in (1, 3, 10):
+            out, err = io.StringIO(), io.StringIO()
+            self.assertEqual(generate_results(records, out, self.script, shards, errfile=err), 3)
+            self.assertEqual(out.getvalue().splitlines(), ['51', 'ERROR', '12.5', 'ERROR', '78', 'ERROR'])
+            self.assertEqual([line for line in err.getvalue().splitlines() if line.startswith('Error')], [
+                "Error on case 2: Script failed: boom line1line2",
+                "Error on case 4: Invalid output format: abc",
+                "Error on case 6: Invalid output format: 6null",
+            ])
+
+    def test_fields_are_read_like_jq(self):
+        self.assertEqual(case_args(None), ('null', 'null', 'null'))
+        self.assertEqual(case_args({'input': {'trip_duration_days': 5}, 'miles_traveled': 1.0}), ('null', '1', 'null'))
+
+    def test_non_object_case_fails_the_run_like_jq(self):
+        # jq can't index an array or a number, and generate_results.sh stops under set -e
+        with self.assertRaisesRegex(ValueError, 'case 2: Cannot index array with string "trip_duration_days"'):
+            generate_results([None, []], io.StringIO(), self.script)
+
+        output, cases = os.path.join(self.tmp, 'results.txt'), os.path.join(self.tmp, 'cases.json')
+        with open(output, 'w') as f:
+            f.write('previous\n')
+        for records in ([{'trip_duration_days': 5, 'miles_traveled': 1, 'total_receipts_amount': 1}, 3], {'a': 1}):
+            with open(cases, 'w') as f:
+                json.dump(records, f)
+            with mock.patch('sys.stdout', io.StringIO()), mock.patch('sys.stderr', io.StringIO()) as err:
+                self.assertEqual(main(['--cases', cases, '--output', output, '--script', self.script]), 1)
+            self.assertIn('❌ Error', err.getvalue())
+            # The previous results are left untouched
+            with open(output) as f:
+                self.assertEqual(f.read(), 'previous\n')
+            self.assertFalse(os.path.exists(output + '.tmp'))
+
+    def test_matches_batch_mode_on_private_cases(self):
+        from solution import run_batch
+        with open(os.path.join(ROOT, 'private_cases.json')) as f:
+            records = json.load(f)[:12]
+        expected = io.StringIO()
+        run_batch(io.StringIO(json.dumps(records)), expected)
+
+        cases, output = os.path.join(self.tmp, 'cases.json'), os.path.join(self.tmp, 'results.txt')
+        with open(cases, 'w') as f:
+            json.dump(records, f)
+        cwd = os.getcwd()
+        self.addCleanup(os.chdir, cwd)
+        os.chdir(ROOT)
+        with mock.patch('sys.stdout', io.StringIO()), mock.patch('sys.stderr', io.StringIO()):
+            self.assertEqual(main(['--cases', cases, '--output', output, '--shards', '4']), 0)
+        with open(output) as f:
+            self.assertEqual(f.read(), expected.getvalue())
+        self.assertFalse(os.path.exists(output + '.tmp'))
+
+if __name__ == '__main__':
+    unittest.main()
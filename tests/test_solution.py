@@ -1,11 +1,24 @@
 import unittest
 import sys
 import os
+import json
+import re
+import subprocess
+import io
+import socket
+import shutil
+import tempfile
+import threading
 
 # Add the parent directory to the path so we can import the solution
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
 
-from solution import calculate_reimbursement
+import solution
+from solution import calculate_reimbursement, calculate_reimbursement_fast, clean_and_convert, compile_config
+from solution import calculate_reimbursement_batch, Instrumentation, INSTRUMENTED_FUNCTIONS, BATCH_PATH_LABELS, path_label
+from solution import answer_request, serve_stream, make_socket_server, DEFAULT_CONFIG
+from bench import imported_modules
 
 class TestReimbursementLogic(unittest.TestCase):
 
@@ -33,5 +46,183 @@ class TestReimbursementLogic(unittest.TestCase):
         # Total: 700 + 58 + 80 - 50 = 788
         self.assertEqual(calculate_reimbursement(14, 100, 100), 788.00)
 
+class TestSanitizedAndFastPathsAgree(unittest.TestCase):
+
+    def test_same_result_for_numbers_and_strings(self):
+        # The CLI passes strings through calculate_reimbursement, while the tuner
+        # and batch callers pass numbers to calculate_reimbursement_fast.
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        with open(os.path.join(root, 'public_cases.json'), 'r') as f:
+            cases = json.load(f)
+
+        for case in cases:
+            inputs = case['input']
+            days, miles, receipts = inputs['trip_duration_days'], inputs['miles_traveled'], inputs['total_receipts_amount']
+            fast = calculate_reimbursement_fast(days, miles, receipts, debug=True)
+            self.assertEqual(calculate_reimbursement(days, miles, receipts, debug=True), fast)
+            self.assertEqual(calculate_reimbursement(str(days), str(miles), str(receipts), debug=True), fast)
+
+class TestCli(unittest.TestCase):
+
+    def test_plain_number_fast_path_matches_regex(self):
+        def regex_convert(val, target_type):
+            # clean_and_convert before plain numbers skipped the regex
+            try:
+                numeric_part = re.search(r'[-+]?[\d,.]+', str(val))
+                if numeric_part:
+                    return target_type(float(numeric_part.group(0).replace(',', '')))
+            except (ValueError, TypeError, AttributeError):
+                return target_type(0)
+            return target_type(0)
+
+        values = ['5', '250', '150.75', '-3', '+4.5', '.5', '5.', '.', '-', '+', '', '1.2.3', '-.', '007',
+                  '1e3', '$1,000.50', ' 12', '12 ', '--1', '+-1', 'abc', '1_000', '\u0663', 'inf', 'nan']
+        for val in values:
+            for target_type in (int, float):
+                self.assertEqual(repr(clean_and_convert(val, target_type)), repr(regex_convert(val, target_type)), val)
+
+    def test_scoring_cli_imports_only_the_numeric_path(self):
+        for script in ('solution.py', 'run.py'):
+            modules = {name for name, _, _ in imported_modules([sys.executable, script, '5', '250', '150.75'])}
+            self.assertFalse(modules & {'json', 're', 'decimal', 'enum', 'random', 'numpy'}, script)
+
+    def test_run_py_matches_solution_py(self):
+        for args in (['5', '250', '150.75'], ['1', '900', '2000'], ['$1,000', 'abc', '3']):
+            outputs = [subprocess.run([sys.executable, script, *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+                       for script in ('solution.py', 'run.py')]
+            self.assertEqual(outputs[0], outputs[1], args)
+
+# Stands in for socat in run.sh: logs the request and replies with $SOCAT_ANSWER
+FAKE_SOCAT = """#!/bin/bash
+cat > "$SOCAT_LOG"
+echo "$SOCAT_ANSWER"
+"""
+
+class TestResidentMode(unittest.TestCase):
+
+    def cli(self, *args):
+        return f"{calculate_reimbursement(*args, config=DEFAULT_CONFIG):.2f}"
+
+    def test_answers_match_the_cli(self):
+        for args in (('5', '250', '150.75'), ('5', '250', ''), ('5 days', '2 50', '$1,000')):
+            self.assertEqual(answer_request("\t".join(args) + "\n", DEFAULT_CONFIG), self.cli(*args), args)
+        self.assertEqual(answer_request("5 250 150.75\r\n", DEFAULT_CONFIG), self.cli('5', '250', '150.75'))
+        self.assertEqual(answer_request("5\t250\n", DEFAULT_CONFIG), "ERROR: expected 3 values, got 2")
+        self.assertIsNone(answer_request(" \n", DEFAULT_CONFIG))
+
+    def test_serve_stream_skips_blank_lines(self):
+        out = io.StringIO()
+        serve_stream(io.StringIO("5 250 150.75\n\n1\t900\t\n1 2\n"), out)
+        self.assertEqual(out.getvalue().splitlines(),
+                         [self.cli('5', '250', '150.75'), self.cli('1', '900', ''), "ERROR: expected 3 values, got 2"])
+
+    def test_socket_server(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        server = make_socket_server(os.path.join(tmp, 'calc.sock'))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with socket.socket(socket.AF_UNIX) as client:
+                client.connect(server.server_address)
+                client.sendall(b"5\t250\t150.75\n\n5\t250\t\n")
+                with client.makefile('r') as replies:
+                    self.assertEqual([replies.readline().strip() for _ in range(2)],
+                                     [self.cli('5', '250', '150.75'), self.cli('5', '250', '')])
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_socket_server_keeps_other_files(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, 'notes.txt')
+        with open(path, 'w') as f:
+            f.write("keep me\n")
+        with self.assertRaisesRegex(FileExistsError, "not a socket"):
+            make_socket_server(path)
+        with open(path) as f:
+            self.assertEqual(f.read(), "keep me\n")
+
+    def test_run_sh_uses_only_numeric_answers(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        with open(os.path.join(tmp, 'socat'), 'w') as f:
+            f.write(FAKE_SOCAT)
+        os.chmod(os.path.join(tmp, 'socat'), 0o755)
+        socket_path, log = os.path.join(tmp, 'calc.sock'), os.path.join(tmp, 'request.txt')
+        listener = socket.socket(socket.AF_UNIX)
+        listener.bind(socket_path)
+        self.addCleanup(listener.close)
+
+        def run_sh(answer, *args):
+            if os.path.exists(log):
+                os.unlink(log)
+            env = {**os.environ, 'PATH': tmp + os.pathsep + os.environ['PATH'], 'REIMBURSEMENT_SOCKET': socket_path,
+                   'SOCAT_LOG': log, 'SOCAT_ANSWER': answer}
+            result = subprocess.run(['bash', 'run.sh', *args], cwd=ROOT, env=env, capture_output=True, text=True)
+            request = open(log).read() if os.path.exists(log) else None
+            return result.returncode, result.stdout.strip(), request
+
+        self.assertEqual(run_sh("123.45", '5', '250', ''), (0, "123.45", "5\t250\t\n"))
+        # Error answers fall back to run.py
+        self.assertEqual(run_sh("ERROR: expected 3 values, got 2", '5', '250', ''), (0, self.cli('5', '250', ''), "5\t250\t\n"))
+        # Arguments that can't be framed never reach the server
+        self.assertEqual(run_sh("123.45", '5', '250', '1\t2'), (0, self.cli('5', '250', '1\t2'), None))
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(ROOT, 'public_cases.json'), 'r') as f:
+            self.inputs = [c['input'] for c in json.load(f)]
+
+    def test_counts_paths_and_helpers_without_changing_results(self):
+        originals = {name: getattr(solution, name) for name in INSTRUMENTED_FUNCTIONS}
+        expected = [calculate_reimbursement(**i) for i in self.inputs]
+        with Instrumentation() as stats:
+            self.assertIs(solution.PROFILE, stats)
+            self.assertEqual([calculate_reimbursement(**i) for i in self.inputs], expected)
+            _, path_codes = calculate_reimbursement_batch([i['trip_duration_days'] for i in self.inputs],
+                                                          [i['miles_traveled'] for i in self.inputs],
+                                                          [i['total_receipts_amount'] for i in self.inputs])
+        self.assertIsNone(solution.PROFILE)
+        self.assertEqual({name: getattr(solution, name) for name in INSTRUMENTED_FUNCTIONS}, originals)
+
+        # The scalar path counts agree with the batch engine's
+        batch_counts = {}
+        for code in path_codes.tolist():
+            label = path_label(*BATCH_PATH_LABELS[code])
+            batch_counts[label] = batch_counts.get(label, 0) + 1
+        self.assertEqual({label: calls for label, (calls, _) in stats.paths.items()}, batch_counts)
+        self.assertEqual(stats.batch_paths, batch_counts)
+        self.assertEqual(stats.functions['clean_and_convert'][0], 3 * len(self.inputs))
+        self.assertEqual(stats.functions['calculate_reimbursement_batch'][0], 1)
+        self.assertTrue(all(ns > 0 for calls, ns in stats.paths.values()))
+
+        # as_dict() survives JSON and merges back in
+        merged = Instrumentation()
+        merged.merge(json.loads(json.dumps(stats.as_dict())))
+        merged.merge(stats.as_dict())
+        self.assertEqual(merged.paths, {label: [2 * calls, 2 * ns] for label, (calls, ns) in stats.paths.items()})
+        self.assertIn('TIERED_RECEIPT_LOGIC_LOW_TIER_PENALTY', merged.format_table())
+
+    def test_compiled_calculators_are_timed_while_active(self):
+        with Instrumentation() as stats:
+            calculate = compile_config()
+            for i in self.inputs[:10]:
+                calculate(**i)
+        self.assertEqual(stats.functions['compile_config.calculate'][0], 10)
+        self.assertEqual(compile_config().__name__, 'calculate')
+
+    def test_env_var_reports_to_stderr(self):
+        env = {**os.environ, 'REIMBURSEMENT_PROFILE': 'json'}
+        result = subprocess.run([sys.executable, '-S', 'run.py', '5', '250', '150.75'], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout, '584.74\n')
+        counts = json.loads(result.stderr)
+        self.assertEqual(counts['paths']['TIERED_RECEIPT_LOGIC_LOW_TIER_PENALTY']['calls'], 1)
+        self.assertEqual(counts['functions']['clean_and_convert']['calls'], 3)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
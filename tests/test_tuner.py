@@ -0,0 +1,276 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import io
+from unittest import mock
+
+import numpy as np
+
+# Add the parent directory to the path so we can import the tuner
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from solution import calculate_reimbursement_batch, cases_to_arrays, stream_path_errors, DEFAULT_CONFIG
+from tuner import CaseErrorTracker, ComponentCache, line_search_rate_param, sweep_threshold_param, evaluate_configs, get_total_error, PARAM_SEARCH_SPACE
+from tuner import BoundedScorer, EvaluationCache, score_configs, error_cents
+from tuner import stratified_order, stratified_sample, screen_candidates
+from tuner import get_path_errors, TUNER_PATH_KEYS, PARAM_GROUPS, parse_args, tune_group, tune_groups_in_parallel, independent_group_batches
+from tuner import tune_config, save_checkpoint, load_checkpoint, cases_digest, code_digest, canonical_config
+
+def load_public_cases():
+    with open(os.path.join(ROOT, 'public_cases.json'), 'r') as f:
+        return json.load(f)
+
+def unrounded_error(config, case_arrays):
+    days, miles, receipts, expected = case_arrays
+    totals, _ = calculate_reimbursement_batch(days, miles, receipts, config=config, round_result=False)
+    return np.abs(totals - expected).sum()
+
+class TestLineSearch(unittest.TestCase):
+
+    def test_beats_every_grid_point(self):
+        case_arrays = cases_to_arrays(load_public_cases())
+        for param in ["mileage_rate_tier_1", "receipt_standard_pct", "vacation_penalty_receipt_pct"]:
+            # Widen the bounds so the optimum is interior and checkable against a fine grid
+            grid = np.linspace(0.0, 1.0, 2001)
+            best_value = line_search_rate_param(DEFAULT_CONFIG, param, case_arrays, (0.0, 1.0))
+            best_error = unrounded_error({**DEFAULT_CONFIG, param: best_value}, case_arrays)
+            for value in list(grid) + list(PARAM_SEARCH_SPACE[param]):
+                self.assertLessEqual(best_error, unrounded_error({**DEFAULT_CONFIG, param: value}, case_arrays) + 1e-6, (param, value))
+
+    def test_non_linear_parameter_is_rejected(self):
+        case_arrays = cases_to_arrays(load_public_cases())
+        self.assertIsNone(line_search_rate_param(DEFAULT_CONFIG, "mileage_breakpoint_1", case_arrays, (500, 700)))
+
+class TestThresholdSweep(unittest.TestCase):
+
+    def test_beats_every_grid_point(self):
+        cases = load_public_cases()
+        case_arrays = cases_to_arrays(cases)
+        for param in ["receipt_low_tier_threshold", "vacation_penalty_spend_threshold", "long_trip_duration_threshold"]:
+            search_space = PARAM_SEARCH_SPACE[param]
+            best_value = sweep_threshold_param(DEFAULT_CONFIG, param, case_arrays, search_space)
+            self.assertGreaterEqual(best_value, min(search_space))
+            self.assertLessEqual(best_value, max(search_space))
+            best_error = get_total_error({**DEFAULT_CONFIG, param: best_value}, cases)
+            for value in np.linspace(min(search_space), max(search_space), 200):
+                self.assertLessEqual(best_error, get_total_error({**DEFAULT_CONFIG, param: value}, cases) + 1e-6, (param, value))
+
+class TestEvaluateConfigs(unittest.TestCase):
+
+    def test_matches_scalar_scoring(self):
+        cases = load_public_cases()
+        configs = [{**DEFAULT_CONFIG, "receipt_standard_pct": v, "vacation_penalty_enabled": i % 2 == 0}
+                   for i, v in enumerate(PARAM_SEARCH_SPACE["receipt_standard_pct"])]
+        configs.append(DEFAULT_CONFIG.copy())
+        # A small cell budget forces several chunks
+        errors = evaluate_configs(configs, cases, max_cells=3 * len(cases))
+        self.assertEqual(len(errors), len(configs))
+        for config, error in zip(configs, errors):
+            self.assertAlmostEqual(error, get_total_error(config, cases), places=6)
+
+class TestCaseErrorTracker(unittest.TestCase):
+
+    def test_dependency_index_covers_every_changed_case(self):
+        case_arrays = cases_to_arrays(load_public_cases())
+        days, miles, receipts, expected = case_arrays
+        tracker = CaseErrorTracker(DEFAULT_CONFIG, case_arrays)
+        for param, search_space in PARAM_SEARCH_SPACE.items():
+            for value in search_space:
+                totals, _ = calculate_reimbursement_batch(days, miles, receipts, config={**DEFAULT_CONFIG, param: value})
+                errors = np.abs(totals - expected)
+                missed = (errors != tracker.errors) & ~tracker.affected(param, value)
+                self.assertFalse(missed.any(), (param, value))
+                self.assertAlmostEqual(tracker.score(param, value), errors.sum(), places=6)
+
+    def test_update_matches_reset(self):
+        case_arrays = cases_to_arrays(load_public_cases())
+        tracker = CaseErrorTracker(DEFAULT_CONFIG, case_arrays)
+        tracker.update("receipt_low_tier_threshold", 250.0)
+        tracker.update("vacation_penalty_spend_threshold", 130.0)
+        fresh = CaseErrorTracker({**DEFAULT_CONFIG, "receipt_low_tier_threshold": 250.0, "vacation_penalty_spend_threshold": 130.0}, case_arrays)
+        np.testing.assert_array_equal(tracker.errors, fresh.errors)
+        np.testing.assert_array_equal(tracker.path_codes, fresh.path_codes)
+
+class TestComponentCache(unittest.TestCase):
+
+    def test_cached_totals_match_batch(self):
+        case_arrays = cases_to_arrays(load_public_cases())
+        days, miles, receipts, _ = case_arrays
+        cache = ComponentCache(case_arrays)
+        config = DEFAULT_CONFIG.copy()
+        for param in ["mileage_rate_tier_2", "receipt_low_tier_threshold", "vacation_penalty_spend_threshold", "eff_slope"]:
+            for value in PARAM_SEARCH_SPACE[param][:3]:
+                config[param] = value
+                cached, cached_paths = cache.totals(config)
+                totals, path_codes = calculate_reimbursement_batch(days, miles, receipts, config=config)
+                np.testing.assert_array_equal(cached, totals)
+                np.testing.assert_array_equal(cached_paths, path_codes)
+        self.assertGreater(cache.columns_reused, cache.columns_computed)
+
+class TestBoundedScorer(unittest.TestCase):
+
+    def test_abandons_only_candidates_that_cannot_win(self):
+        cases = load_public_cases()
+        scorer = BoundedScorer(cases, cases_to_arrays(cases))
+        for param in ["receipt_standard_pct", "mileage_breakpoint_1", "vacation_penalty_spend_threshold"]:
+            best = scorer.incumbent_error(DEFAULT_CONFIG)
+            self.assertEqual(best, error_cents(get_total_error(DEFAULT_CONFIG, cases)))
+            values = PARAM_SEARCH_SPACE[param]
+            for value, error in zip(values, scorer.candidate_errors(param, values, best)):
+                full = error_cents(get_total_error({**DEFAULT_CONFIG, param: value}, cases))
+                if error == float('inf'):
+                    self.assertGreaterEqual(full, best, (param, value))
+                else:
+                    self.assertEqual(error, full, (param, value))
+                    best = min(best, full)
+        self.assertGreater(scorer.saved, scorer.evaluated)
+
+class TestEvaluationCache(unittest.TestCase):
+
+    def test_shared_across_connections_and_keyed_by_cases(self):
+        cases = load_public_cases()
+        configs = [{**DEFAULT_CONFIG, "eff_slope": v} for v in PARAM_SEARCH_SPACE["eff_slope"][:3]]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.sqlite')
+            first = EvaluationCache(path, cases)
+            errors = score_configs(configs, cases, evaluations=first)
+            first.close()
+
+            second = EvaluationCache(path, cases)
+            # np.float64 and float values of the same config share a key
+            same = [{**config, "eff_slope": float(config["eff_slope"])} for config in configs]
+            self.assertEqual(score_configs(same, cases, evaluations=second), errors)
+            self.assertEqual((second.hits, second.misses), (3, 0))
+            second.close()
+
+            other = EvaluationCache(path, cases[:10])
+            self.assertIsNone(other.get(configs[0]))
+            other.close()
+
+            # Editing solution.py invalidates every entry
+            with mock.patch('tuner.code_digest', return_value='edited'):
+                edited = EvaluationCache(path, cases)
+            self.assertIsNone(edited.get(configs[0]))
+            edited.close()
+
+class TestScreening(unittest.TestCase):
+
+    def test_stratified_samples_are_nested_and_cover_every_path(self):
+        days, miles, receipts, _ = cases_to_arrays(load_public_cases())
+        _, path_codes = calculate_reimbursement_batch(days, miles, receipts)
+        order = stratified_order(path_codes)
+        small, large = stratified_sample(order, 50), stratified_sample(order, 100)
+        self.assertTrue(set(small) <= set(large))
+        self.assertEqual(set(path_codes[small]), set(path_codes))
+        self.assertEqual(len(stratified_sample(order, len(path_codes))), len(path_codes))
+
+    def test_finalists_are_the_best_on_a_clear_winner(self):
+        case_arrays = cases_to_arrays(load_public_cases())
+        candidates = list(np.linspace(0.0, 1.0, 101))
+        finalists = screen_candidates(DEFAULT_CONFIG, "receipt_standard_pct", candidates, case_arrays)
+        self.assertLessEqual(len(finalists), 3)
+        self.assertEqual(finalists, sorted(finalists))
+        cases = load_public_cases()
+        errors = [get_total_error({**DEFAULT_CONFIG, "receipt_standard_pct": v}, cases) for v in candidates]
+        self.assertIn(candidates[int(np.argmin(errors))], finalists)
+
+    def test_exact_when_the_sample_covers_every_affected_case(self):
+        case_arrays = cases_to_arrays(load_public_cases())
+        for param in ("receipt_standard_pct", "mileage_breakpoint_1"):
+            candidates = list(PARAM_SEARCH_SPACE[param])
+            errors = evaluate_configs([{**DEFAULT_CONFIG, param: v} for v in candidates], load_public_cases())
+            best = sorted(np.argsort(errors, kind='stable')[:3])
+            finalists = screen_candidates(DEFAULT_CONFIG, param, candidates, case_arrays, start_size=len(case_arrays[0]))
+            self.assertEqual(finalists, [candidates[i] for i in best], param)
+
+    def test_screened_pass_never_raises_the_error(self):
+        # Screening may miss the grid's winner, but a group is only changed when the full error drops
+        cases = load_public_cases()
+        case_arrays = cases_to_arrays(cases)
+        args = parse_args(['--screen', '--vectorized'])
+        config = DEFAULT_CONFIG.copy()
+        for params in PARAM_GROUPS.values():
+            before = get_total_error(config, cases)
+            config, changed = tune_group(config, [p for p in params if p in PARAM_SEARCH_SPACE], cases, case_arrays, args)
+            after = get_total_error(config, cases)
+            if changed:
+                self.assertLess(after, before)
+            else:
+                self.assertEqual(after, before)
+
+class TestPathErrors(unittest.TestCase):
+
+    def test_streamed_stats_match_full_grouping(self):
+        cases = load_public_cases()
+        days, miles, receipts, expected = cases_to_arrays(cases)
+        totals, path_codes = calculate_reimbursement_batch(days, miles, receipts)
+        errors = np.abs(totals - expected)
+        avg_error, sorted_paths = get_path_errors(DEFAULT_CONFIG, cases)
+        self.assertAlmostEqual(avg_error, errors.mean(), places=9)
+        self.assertEqual([s.total for _, s in sorted_paths], sorted((s.total for _, s in sorted_paths), reverse=True))
+        for name, summary in sorted_paths:
+            mask = np.array([TUNER_PATH_KEYS[code] == name for code in path_codes])
+            self.assertEqual(summary.count, mask.sum())
+            self.assertAlmostEqual(summary.total, errors[mask].sum(), places=6)
+            self.assertEqual(summary.max, errors[mask].max())
+            sampled = summary.sampled_cases()
+            self.assertEqual(len(sampled), min(5, summary.count))
+            path_inputs = [cases[i]['input'] for i in np.flatnonzero(mask)]
+            for case in sampled:
+                self.assertIn(case['input'], path_inputs)
+
+    def test_sample_does_not_depend_on_chunking(self):
+        cases = load_public_cases()
+        whole = stream_path_errors(cases, seed=725)
+        chunked = stream_path_errors(iter(cases), seed=725, chunk_size=37)
+        self.assertEqual(whole.count, chunked.count)
+        for name, summary in whole.paths.items():
+            self.assertEqual(summary.count, chunked.paths[name].count)
+            self.assertAlmostEqual(summary.total, chunked.paths[name].total, places=6)
+
+class TestParallelGroups(unittest.TestCase):
+
+    def test_parallel_pass_matches_sequential_pass(self):
+        cases = load_public_cases()
+        case_arrays = cases_to_arrays(cases)
+        args = parse_args([])
+        batches, _ = independent_group_batches(DEFAULT_CONFIG, case_arrays)
+        self.assertEqual([g for batch in batches for g in batch], list(PARAM_GROUPS))
+        # One-day and 8+ day trips can't meet, so these two always share a batch
+        self.assertTrue(any({"Extreme Day Logic", "Vacation Penalty"} <= set(batch) for batch in batches), batches)
+
+        sequential = DEFAULT_CONFIG.copy()
+        for params in PARAM_GROUPS.values():
+            sequential, _ = tune_group(sequential, [p for p in params if p in PARAM_SEARCH_SPACE], cases, case_arrays, args)
+        self.assertEqual(tune_groups_in_parallel(DEFAULT_CONFIG.copy(), cases, case_arrays, args), sequential)
+
+class TestCheckpoint(unittest.TestCase):
+
+    def test_no_iterations_left_to_run(self):
+        cases = load_public_cases()
+        with tempfile.TemporaryDirectory() as tmp, mock.patch('sys.stdout', io.StringIO()):
+            path = os.path.join(tmp, 'checkpoint.json')
+            self.assertEqual(tune_config(DEFAULT_CONFIG.copy(), cases, parse_args(['--max-iterations', '0', '--checkpoint', path])),
+                             DEFAULT_CONFIG)
+            with open(path) as f:
+                state = json.load(f)
+            self.assertEqual((state['iteration'], state['done']), (0, True))
+
+            # Resuming a checkpoint that already reached --max-iterations
+            save_checkpoint(path, {'cases_digest': cases_digest(cases), 'code_digest': code_digest(),
+                                   'config': canonical_config(DEFAULT_CONFIG),
+                                   'iteration': 3, 'next_group': 0, 'last_error': 1.0, 'done': False})
+            tune_config(DEFAULT_CONFIG.copy(), cases, parse_args(['--max-iterations', '2', '--checkpoint', path]))
+            with open(path) as f:
+                state = json.load(f)
+            self.assertEqual((state['iteration'], state['done']), (3, True))
+
+            self.assertIsNotNone(load_checkpoint(path, cases))
+            with mock.patch('tuner.code_digest', return_value='edited'):
+                self.assertIsNone(load_checkpoint(path, cases))
+
+if __name__ == '__main__':
+    unittest.main()
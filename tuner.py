@@ -1,6 +1,15 @@
+import argparse
+import hashlib
 import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from itertools import product
-from solution import calculate_reimbursement, DEFAULT_CONFIG
+from solution import (compile_config, calculate_reimbursement_batch, cases_to_arrays, assemble_batch_totals,
+                      round_legacy_batch, stream_path_errors, BATCH_COLUMNS, BATCH_PATH_LABELS, DEFAULT_CONFIG, PathCode,
+                      Instrumentation)
+from case_store import load_case_store
 import numpy as np
 
 # This now represents logical groups of parameters for coordinate descent.
@@ -130,117 +139,1008 @@ PARAM_SEARCH_SPACE = {
     "eff_slope": np.linspace(0.3, 0.5, 10),
 }
 
-def get_path_errors(config, cases):
-    """Calculates errors and groups them by calculation path."""
-    errors = []
-    path_buckets = {}
-    for case in cases:
-        inputs = case['input']
-        expected = case['expected_output']
-        debug_info = calculate_reimbursement(
-            inputs['trip_duration_days'], inputs['miles_traveled'], inputs['total_receipts_amount'], 
-            debug=True, config=config
+# Parameters that scale a term linearly on every path they touch. Their
+# error curve is piecewise linear, so they can be solved exactly instead of
+# searched on a grid (see line_search_rate_param).
+RATE_PARAMS = [
+    "mileage_rate_tier_1",
+    "mileage_rate_tier_2",
+    "mileage_rate_tier_3",
+    "one_day_high_receipt_multiplier",
+    "one_day_upper_tier_multiplier",
+    "two_day_high_receipt_multiplier",
+    "two_day_upper_tier_multiplier",
+    "extreme_day_high_receipt_pct",
+    "extreme_day_low_receipt_multiplier",
+    "vacation_penalty_per_diem_pct",
+    "vacation_penalty_receipt_pct",
+    "per_diem_rate_long_trip",
+    "receipt_low_tier_pct",
+    "receipt_standard_pct",
+    "receipt_sweet_spot_pct",
+    "receipt_high_tier_diminishing_pct",
+    "eff_slope",
+]
+
+def line_search_rate_param(config, param, case_arrays, bounds):
+    """
+    Finds the value of a rate parameter that minimizes the total absolute error.
+    Each case's unrounded total is linear in the value, so the total error is
+    piecewise linear with its minimum at the slope-weighted median of the values
+    where each case would be exact. The result is clamped to bounds. Returns
+    None if the parameter is not linear under this config or affects no case.
+    """
+    days, miles, receipts, expected = case_arrays
+    low, high = bounds
+
+    # The two ends fix the line and two more points check it, all stacked into
+    # one batch evaluation like evaluate_configs
+    samples = np.array([low, high, config[param], (low + high) / 2], dtype=np.float64)
+    stacked = {**config, param: samples[:, np.newaxis]}
+    totals, _ = calculate_reimbursement_batch(days[np.newaxis, :], miles[np.newaxis, :], receipts[np.newaxis, :],
+                                              config=stacked, round_result=False)
+    base = totals[0]
+    slope = (totals[1] - base) / (high - low)
+    # Linear across the whole interval, not just near two sample points
+    for value, sampled in zip(samples[2:], totals[2:]):
+        if not np.allclose(sampled, base + (value - low) * slope, rtol=1e-9, atol=1e-6):
+            return None
+
+    affected = slope != 0
+    if not affected.any():
+        return None
+    breakpoints = low + (expected[affected] - base[affected]) / slope[affected]
+    weights = np.abs(slope[affected])
+
+    order = np.argsort(breakpoints, kind='stable')
+    cumulative_weight = np.cumsum(weights[order])
+    median_index = np.searchsorted(cumulative_weight, cumulative_weight[-1] / 2)
+    best_value = breakpoints[order][median_index]
+
+    return float(min(max(best_value, low), high))
+
+def daily_spend(days, miles, receipts):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(days > 0, receipts / np.where(days == 0, 1, days), 0.0)
+
+# Parameters that only pick a branch. Each maps to the per-case quantity it is
+# compared with and the comparison under which a case takes the "inside"
+# branch, e.g. receipts < receipt_low_tier_threshold puts a case in the low tier.
+THRESHOLD_PARAMS = {
+    "receipt_low_tier_threshold": (lambda days, miles, receipts: receipts, '<'),
+    "receipt_sweet_spot_lower_bound": (lambda days, miles, receipts: receipts, '<'),
+    "one_day_upper_tier_threshold": (lambda days, miles, receipts: receipts, '>'),
+    "two_day_upper_tier_threshold": (lambda days, miles, receipts: receipts, '>'),
+    "extreme_day_receipt_threshold": (lambda days, miles, receipts: receipts, '>'),
+    "vacation_penalty_spend_threshold": (daily_spend, '>'),
+    "high_spend_threshold": (daily_spend, '>'),
+    "long_trip_duration_threshold": (lambda days, miles, receipts: days, '>='),
+    "per_diem_floor_duration": (lambda days, miles, receipts: days, '>='),
+}
+
+def sweep_threshold_param(config, param, case_arrays, search_space):
+    """
+    Finds the threshold within the bounds of search_space with the lowest total
+    error. Every case's output is one of two branch outputs, so both are computed
+    once, the cases are sorted by the compared quantity, and each candidate
+    threshold is scored from prefix sums. Integer search spaces stay integer.
+    """
+    days, miles, receipts, expected = case_arrays
+    quantity_fn, op = THRESHOLD_PARAMS[param]
+
+    def errors_at(value):
+        test_config = config.copy()
+        test_config[param] = value
+        totals, _ = calculate_reimbursement_batch(days, miles, receipts, config=test_config)
+        return np.abs(totals - expected)
+
+    # Force every case into one branch and then the other
+    inside_when_low = op in ('>', '>=')
+    errors_low, errors_high = errors_at(-np.inf), errors_at(np.inf)
+    errors_in, errors_out = (errors_low, errors_high) if inside_when_low else (errors_high, errors_low)
+
+    quantity = quantity_fn(days, miles, receipts)
+    order = np.argsort(quantity, kind='stable')
+    sorted_quantity = quantity[order]
+    cumulative_in = np.concatenate([[0.0], np.cumsum(errors_in[order])])
+    cumulative_out = np.concatenate([[0.0], np.cumsum(errors_out[order])])
+
+    low, high = min(search_space), max(search_space)
+    if all(float(v).is_integer() for v in search_space):
+        candidates = np.arange(int(low), int(high) + 1)
+    else:
+        # One candidate inside each gap between neighbouring case values, plus the bounds
+        in_range = np.unique(sorted_quantity[(sorted_quantity >= low) & (sorted_quantity <= high)])
+        candidates = np.concatenate([[low], (in_range[:-1] + in_range[1:]) / 2, [high]])
+
+    side = 'right' if op in ('>', '<=') else 'left'
+    split = np.searchsorted(sorted_quantity, candidates, side=side)
+    if inside_when_low:
+        # Cases above the split take the inside branch
+        totals = cumulative_out[split] + (cumulative_in[-1] - cumulative_in[split])
+    else:
+        totals = cumulative_in[split] + (cumulative_out[-1] - cumulative_out[split])
+
+    best_value = candidates[np.argmin(totals)]
+    return best_value.item()
+
+# --- Dependency index ---
+# Path codes from calculate_reimbursement_batch (see solution.PathCode)
+EXTREME_HIGH, EXTREME_LOW, VACATION, LONG_TRIP = PathCode.EXTREME_HIGH, PathCode.EXTREME_LOW, PathCode.VACATION, PathCode.LONG_TRIP
+LOW_TIER, STANDARD_TIER, SWEET_SPOT_TIER, HIGH_TIER = PathCode.LOW_TIER, PathCode.STANDARD_TIER, PathCode.SWEET_SPOT_TIER, PathCode.HIGH_TIER
+ONE_DAY_UPPER, ONE_DAY, TWO_DAY_UPPER, TWO_DAY = PathCode.ONE_DAY_UPPER, PathCode.ONE_DAY, PathCode.TWO_DAY_UPPER, PathCode.TWO_DAY
+RECEIPT_TIERS = (LOW_TIER, STANDARD_TIER, SWEET_SPOT_TIER, HIGH_TIER)
+PER_DIEM_PATHS = RECEIPT_TIERS + (ONE_DAY_UPPER, ONE_DAY, TWO_DAY_UPPER, TWO_DAY, VACATION)
+
+def on_paths(ctx, *paths):
+    return np.isin(ctx['path_codes'], paths)
+
+def between(values, old, new):
+    """Cases whose compared value lies between the old and new setting, inclusive."""
+    return (values >= min(old, new)) & (values <= max(old, new))
+
+def not_extreme(ctx):
+    return ~on_paths(ctx, EXTREME_HIGH, EXTREME_LOW)
+
+# Maps each config key to the cases a change from old to new can affect.
+# ctx holds the case arrays plus the path codes under the current config;
+# a case can only switch path when it lies in a threshold's changed range.
+DEPENDENCY_INDEX = {
+    "per_diem_rate_10_plus_days": lambda old, new, ctx: on_paths(ctx, *PER_DIEM_PATHS) & (ctx['days'] >= 10) & (ctx['days'] <= 13),
+    "per_diem_rate_14_plus_days": lambda old, new, ctx: on_paths(ctx, *PER_DIEM_PATHS) & (ctx['days'] > 13),
+    "per_diem_floor_rate": lambda old, new, ctx: on_paths(ctx, *PER_DIEM_PATHS) & (ctx['days'] >= ctx['config'].get("per_diem_floor_duration", 15)),
+    "per_diem_floor_duration": lambda old, new, ctx: on_paths(ctx, *PER_DIEM_PATHS) & between(ctx['days'], old, new),
+    "mileage_rate_tier_1": lambda old, new, ctx: not_extreme(ctx) & (ctx['miles'] > 100),
+    "mileage_rate_tier_2": lambda old, new, ctx: not_extreme(ctx) & (ctx['miles'] > ctx['config']["mileage_breakpoint_1"]),
+    "mileage_rate_tier_3": lambda old, new, ctx: not_extreme(ctx) & (ctx['miles'] > ctx['config']["mileage_breakpoint_2"]),
+    # Moving a breakpoint also shifts the cumulative amount for every case above it
+    "mileage_breakpoint_1": lambda old, new, ctx: not_extreme(ctx) & (ctx['miles'] > min(old, new)),
+    "mileage_breakpoint_2": lambda old, new, ctx: not_extreme(ctx) & (ctx['miles'] > min(old, new)),
+    "one_day_high_receipt_multiplier": lambda old, new, ctx: on_paths(ctx, ONE_DAY),
+    "one_day_upper_tier_multiplier": lambda old, new, ctx: on_paths(ctx, ONE_DAY_UPPER),
+    "one_day_upper_tier_threshold": lambda old, new, ctx: on_paths(ctx, ONE_DAY, ONE_DAY_UPPER) & between(ctx['receipts'], old, new),
+    "two_day_high_receipt_multiplier": lambda old, new, ctx: on_paths(ctx, TWO_DAY),
+    "two_day_upper_tier_multiplier": lambda old, new, ctx: on_paths(ctx, TWO_DAY_UPPER),
+    "two_day_upper_tier_threshold": lambda old, new, ctx: on_paths(ctx, TWO_DAY, TWO_DAY_UPPER) & between(ctx['receipts'], old, new),
+    "extreme_day_receipt_threshold": lambda old, new, ctx: on_paths(ctx, EXTREME_HIGH, EXTREME_LOW) & between(ctx['receipts'], old, new),
+    "extreme_day_high_receipt_pct": lambda old, new, ctx: on_paths(ctx, EXTREME_HIGH),
+    "extreme_day_low_receipt_multiplier": lambda old, new, ctx: on_paths(ctx, EXTREME_LOW),
+    "vacation_penalty_enabled": lambda old, new, ctx: not_extreme(ctx) & (ctx['days'] >= 8),
+    "vacation_penalty_spend_threshold": lambda old, new, ctx: not_extreme(ctx) & (ctx['days'] >= 8) & between(ctx['daily_spend'], old, new),
+    "vacation_penalty_per_diem_pct": lambda old, new, ctx: on_paths(ctx, VACATION),
+    "vacation_penalty_receipt_pct": lambda old, new, ctx: on_paths(ctx, VACATION),
+    "per_diem_rate_long_trip": lambda old, new, ctx: on_paths(ctx, LONG_TRIP),
+    "receipt_cap_long_trip_low": lambda old, new, ctx: on_paths(ctx, LONG_TRIP),
+    "receipt_cap_long_trip_high": lambda old, new, ctx: on_paths(ctx, LONG_TRIP),
+    "high_spend_threshold": lambda old, new, ctx: on_paths(ctx, LONG_TRIP) & between(ctx['daily_spend'], old, new),
+    "long_trip_duration_threshold": lambda old, new, ctx: not_extreme(ctx) & ~on_paths(ctx, VACATION) & between(ctx['days'], old, new),
+    "receipt_low_tier_threshold": lambda old, new, ctx: on_paths(ctx, *RECEIPT_TIERS) & between(ctx['receipts'], old, new),
+    "receipt_sweet_spot_lower_bound": lambda old, new, ctx: on_paths(ctx, *RECEIPT_TIERS) & between(ctx['receipts'], old, new),
+    "receipt_sweet_spot_upper_bound": lambda old, new, ctx: on_paths(ctx, LONG_TRIP) | (on_paths(ctx, *RECEIPT_TIERS) & (ctx['receipts'] >= min(old, new))),
+    "receipt_low_tier_pct": lambda old, new, ctx: on_paths(ctx, LOW_TIER),
+    "receipt_standard_pct": lambda old, new, ctx: on_paths(ctx, STANDARD_TIER),
+    "receipt_sweet_spot_pct": lambda old, new, ctx: on_paths(ctx, SWEET_SPOT_TIER, HIGH_TIER, LONG_TRIP),
+    "receipt_high_tier_diminishing_pct": lambda old, new, ctx: on_paths(ctx, HIGH_TIER),
+    "eff_slope": lambda old, new, ctx: not_extreme(ctx) & (ctx['miles_per_day'] >= 150) & (ctx['miles_per_day'] <= 250),
+}
+
+# Keys the calculation never reads: changing them affects no case
+UNUSED_CONFIG_KEYS = {
+    "receipt_cap_4_6_days",
+    "high_cost_receipt_percentage",
+    "short_trip_high_receipt_pct",
+    "receipt_tier_1_threshold",
+    "receipt_tier_1_percentage",
+    "receipt_tier_2_percentage",
+    "standard_receipt_pct_1_3_days",
+    "standard_receipt_pct_4_6_days",
+    "vacation_penalty_duration_threshold",
+}
+
+class CaseErrorTracker:
+    """
+    Per-case errors and their running total for one config. Scoring a change
+    to a single parameter only re-evaluates the cases DEPENDENCY_INDEX says it
+    can affect; keys missing from the index conservatively affect every case.
+    """
+
+    def __init__(self, config, case_arrays):
+        self.days, self.miles, self.receipts, self.expected = case_arrays
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.miles_per_day = np.where(self.days > 0, self.miles / np.where(self.days == 0, 1, self.days), 0.0)
+        self.daily_spend = daily_spend(self.days, self.miles, self.receipts)
+        self.reset(config)
+
+    def reset(self, config):
+        """Re-evaluates every case under config."""
+        self.config = config.copy()
+        totals, self.path_codes = calculate_reimbursement_batch(self.days, self.miles, self.receipts, config=self.config)
+        self.errors = np.abs(totals - self.expected)
+        self.total = self.errors.sum()
+
+    def affected(self, param, value, path_codes=None):
+        """Mask of cases a change of param to value can affect, given path_codes (default: the current paths)."""
+        old = self.config[param]
+        if value == old or param in UNUSED_CONFIG_KEYS:
+            return np.zeros(len(self.expected), dtype=bool)
+        if param not in DEPENDENCY_INDEX:
+            return np.ones(len(self.expected), dtype=bool)
+        ctx = {
+            'config': self.config, 'path_codes': self.path_codes if path_codes is None else path_codes,
+            'days': self.days, 'miles': self.miles,
+            'receipts': self.receipts, 'daily_spend': self.daily_spend, 'miles_per_day': self.miles_per_day,
+        }
+        return DEPENDENCY_INDEX[param](old, value, ctx)
+
+    def _evaluate(self, param, value, mask):
+        test_config = self.config.copy()
+        test_config[param] = value
+        totals, path_codes = calculate_reimbursement_batch(
+            self.days[mask], self.miles[mask], self.receipts[mask], config=test_config
+        )
+        return np.abs(totals - self.expected[mask]), path_codes
+
+    def score(self, param, value):
+        """Total error with param set to value, re-evaluating only the affected cases."""
+        mask = self.affected(param, value)
+        if not mask.any():
+            return self.total
+        errors, _ = self._evaluate(param, value, mask)
+        return self.total - self.errors[mask].sum() + errors.sum()
+
+    def update(self, param, value):
+        """Sets param to value and refreshes the affected cases."""
+        mask = self.affected(param, value)
+        if mask.any():
+            self.errors[mask], self.path_codes[mask] = self._evaluate(param, value, mask)
+            self.total = self.errors.sum()
+        self.config[param] = value
+
+class ComponentCache:
+    """
+    Per-case component columns (see solution.BATCH_COLUMNS) for the last config
+    scored. Scoring a new config only recomputes the columns whose config keys
+    changed and assembles the totals from the cached rest, so tuning one group
+    never recomputes e.g. the mileage of every case.
+    """
+
+    def __init__(self, case_arrays):
+        self.days, self.miles, self.receipts, self.expected = case_arrays
+        self.config = None
+        self.columns = {}
+        self.columns_computed = 0
+        self.columns_reused = 0
+
+    def totals(self, config):
+        """Rounded totals and path codes for config."""
+        for name, (column_fn, keys) in BATCH_COLUMNS.items():
+            if self.config is None or any(config.get(key) != self.config.get(key) for key in keys):
+                self.columns[name] = column_fn(self.days, self.miles, self.receipts, config)
+                self.columns_computed += 1
+            else:
+                self.columns_reused += 1
+        self.config = config.copy()
+        computed_total, path_codes = assemble_batch_totals(self.receipts, self.columns, config)
+        return round_legacy_batch(computed_total), path_codes
+
+    def total_error(self, config):
+        totals, _ = self.totals(config)
+        return np.abs(totals - self.expected).sum()
+
+def get_total_error(config, cases):
+    """Total absolute error of config over cases, using a calculator compiled once for config."""
+    calculate = compile_config(config)
+    return sum(abs(calculate(**c['input']) - c['expected_output']) for c in cases)
+
+class BoundedScorer:
+    """
+    Scores candidate values of a parameter against an incumbent config and
+    abandons a candidate as soon as its running error can no longer beat the
+    best so far. Cases the dependency index says the value can't affect keep
+    the incumbent's error; the rest are visited in descending order of the
+    incumbent's per-case error, so a bad candidate is usually rejected after a
+    handful of cases. Counts the case evaluations saved since reset_stats().
+    """
+
+    def __init__(self, cases, case_arrays):
+        self.cases = cases
+        self.case_arrays = case_arrays
+        self.tracker = None
+        self.order = None
+        self.evaluated = 0
+        self.saved = 0
+
+    def reset_stats(self):
+        self.evaluated = 0
+        self.saved = 0
+
+    def incumbent_error(self, config):
+        """Error of config in cents; its per-case errors are what candidates are bounded against."""
+        self.tracker = CaseErrorTracker(config, self.case_arrays)
+        self.order = np.argsort(-self.tracker.errors, kind='stable')
+        return error_cents(self.tracker.total)
+
+    def bounded_error(self, param, value, bound_cents):
+        """Error in cents with param set to value, or None once it is certain to be at least bound_cents."""
+        affected = self.tracker.affected(param, value)
+        calculate = compile_config({**self.tracker.config, param: value})
+        cases = self.cases
+        # error_cents(total) >= bound_cents, without rounding on every case
+        limit = (bound_cents - 0.5) / 100
+        total = self.tracker.errors[~affected].sum()
+        evaluated = 0
+        for i in self.order[affected[self.order]]:
+            c = cases[i]
+            total += abs(calculate(**c['input']) - c['expected_output'])
+            evaluated += 1
+            if total >= limit:
+                self.evaluated += evaluated
+                self.saved += len(cases) - evaluated
+                return None
+        self.evaluated += evaluated
+        self.saved += len(cases) - evaluated
+        return error_cents(total)
+
+    def candidate_errors(self, param, values, best_cents):
+        """Errors in cents for values of param, scored in order against a falling bound; abandoned ones are inf."""
+        errors = []
+        for value in values:
+            error = self.bounded_error(param, value, best_cents)
+            if error is None:
+                errors.append(float('inf'))
+            else:
+                errors.append(error)
+                best_cents = min(best_cents, error)
+        return errors
+
+def canonical_config(config):
+    """config as plain Python values, so equal configs serialize identically whatever produced them."""
+    canonical = {}
+    for key, value in config.items():
+        if isinstance(value, (bool, np.bool_)):
+            canonical[key] = bool(value)
+        elif isinstance(value, (int, np.integer)):
+            canonical[key] = int(value)
+        elif isinstance(value, (float, np.floating)):
+            canonical[key] = float(value)
+        else:
+            canonical[key] = value
+    return canonical
+
+def cases_digest(cases):
+    """Content hash of a list of cases (or a CaseStore's columns), so cached errors are never reused for different cases."""
+    if hasattr(cases, 'digest'):
+        return cases.digest()
+    return hashlib.sha256(json.dumps(cases, sort_keys=True).encode()).hexdigest()
+
+def code_digest():
+    """Hash of solution.py's source, so cached errors and checkpoints are never reused once the calculation changes."""
+    import solution
+    with open(solution.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class EvaluationCache:
+    """
+    On-disk cache of config evaluations in SQLite, keyed by a hash of the
+    canonical config, the cases digest and the code digest. Maps to the total error and,
+    when known, the per-path errors. Several processes (e.g. --parallel-groups
+    workers) can share one file; lookups are also memoized in memory.
+    """
+
+    def __init__(self, path, cases):
+        self.path = path
+        self.digest = cases_digest(cases)
+        self.code = code_digest()
+        self.memory = {}
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, total_error REAL NOT NULL, path_errors TEXT)"
+        )
+        self.connection.commit()
+
+    def key(self, config):
+        canonical = json.dumps({'config': canonical_config(config), 'cases': self.digest, 'code': self.code}, sort_keys=True)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, config):
+        """(total_error, path_errors or None) for config, or None if it was never evaluated."""
+        key = self.key(config)
+        if key not in self.memory:
+            row = self.connection.execute(
+                "SELECT total_error, path_errors FROM evaluations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            total_error, path_errors = row
+            self.memory[key] = (total_error, json.loads(path_errors) if path_errors else None)
+        self.hits += 1
+        return self.memory[key]
+
+    def put(self, config, total_error, path_errors=None):
+        key = self.key(config)
+        self.memory[key] = (float(total_error), path_errors)
+        # Per-path errors fill in an entry first stored with only the total
+        self.connection.execute(
+            "INSERT INTO evaluations (key, total_error, path_errors) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET path_errors = COALESCE(evaluations.path_errors, excluded.path_errors)",
+            (key, float(total_error), json.dumps(path_errors) if path_errors is not None else None),
         )
-        error = abs(debug_info['grand'] - expected)
-        e = {'input': inputs, 'expected': expected, 'debug': debug_info, 'error': error}
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+# Upper bound on configs x cases cells evaluated at once by evaluate_configs
+MAX_BATCH_CELLS = 2_000_000
+
+def evaluate_configs(configs, cases, max_cells=MAX_BATCH_CELLS):
+    """
+    Total absolute error of each config over cases, as an array of len(configs).
+    Values that differ between configs are stacked into (K, 1) columns and
+    broadcast against the cases, so K configs cost one batch evaluation.
+    Configs are processed in chunks of at most max_cells cells to bound memory.
+    All configs must have the same keys.
+    """
+    return evaluate_configs_on_arrays(configs, cases_to_arrays(cases), max_cells)
+
+def evaluate_configs_on_arrays(configs, case_arrays, max_cells=MAX_BATCH_CELLS):
+    """evaluate_configs for cases already split into arrays by cases_to_arrays."""
+    days, miles, receipts, expected = case_arrays
+    days, miles, receipts = days[np.newaxis, :], miles[np.newaxis, :], receipts[np.newaxis, :]
+    if not configs:
+        return np.zeros(0)
+
+    first = configs[0]
+    varying = [key for key in first if any(config[key] != first[key] for config in configs)]
+    chunk_size = max(1, max_cells // max(1, len(expected)))
+
+    errors = []
+    for start in range(0, len(configs), chunk_size):
+        chunk = configs[start:start + chunk_size]
+        stacked = dict(first)
+        for key in varying:
+            stacked[key] = np.array([config[key] for config in chunk])[:, np.newaxis]
+        totals, _ = calculate_reimbursement_batch(days, miles, receipts, config=stacked)
+        # Identical configs leave nothing to stack, giving a single row for the whole chunk
+        errors.append(np.broadcast_to(np.abs(totals - expected).sum(axis=1), (len(chunk),)))
+    return np.concatenate(errors)
+
+def grid_search_params(config, params, cases):
+    """
+    Scores every combination of PARAM_SEARCH_SPACE values for params (e.g. a
+    pair from the same PARAM_GROUP) in one evaluate_configs call.
+    Returns (best_values, best_total_error).
+    """
+    combinations = list(product(*(PARAM_SEARCH_SPACE[p] for p in params)))
+    test_configs = [{**config, **dict(zip(params, values))} for values in combinations]
+    errors = evaluate_configs(test_configs, cases)
+    best_index = int(np.argmin(errors))
+    return dict(zip(params, combinations[best_index])), float(errors[best_index])
+
+# Successive-halving screening (--screen): candidates are scored on a
+# path-stratified sample, the best SCREEN_KEEP_FRACTION survive, the sample
+# doubles, and only SCREEN_FINALISTS reach the full case set. This is a
+# heuristic: a candidate dropped on a sample is never scored in full, so the
+# tuned config can differ from an unscreened run. What holds is that the
+# finalists are ranked on every affected case and tune_group still keeps a
+# change only when it lowers the full error.
+SCREEN_START_SIZE = 50
+SCREEN_KEEP_FRACTION = 0.5
+SCREEN_FINALISTS = 3
+SCREEN_SEED = 725
+
+def stratified_order(path_codes, seed=SCREEN_SEED):
+    """
+    Per-path shuffled case indices, {path_code: indices}. Taking a prefix of
+    each path's indices gives a stratified sample; a longer prefix always
+    contains a shorter one, so doubled samples are nested.
+    """
+    rng = np.random.default_rng(seed)
+    return {code: rng.permutation(np.flatnonzero(path_codes == code)) for code in np.unique(path_codes)}
+
+def stratified_sample(order, size):
+    """About size case indices with every path represented in proportion (at least one case each)."""
+    total = sum(len(indices) for indices in order.values())
+    fraction = min(1.0, size / total)
+    return np.sort(np.concatenate([indices[:max(1, int(np.ceil(len(indices) * fraction)))] for indices in order.values()]))
+
+def screen_candidates(config, param, candidates, case_arrays, finalists=SCREEN_FINALISTS,
+                      keep_fraction=SCREEN_KEEP_FRACTION, start_size=SCREEN_START_SIZE):
+    """
+    Successive halving: scores candidates for param on a stratified sample,
+    keeps the best keep_fraction, doubles the sample and repeats until at most
+    finalists remain, with a last round over every affected case. Survivors
+    keep their order.
+    """
+    # Cases no candidate can affect add the same error to every candidate, so
+    # samples are drawn only from the cases the dependency index flags.
+    tracker = CaseErrorTracker(config, case_arrays)
+    affected = np.zeros(len(tracker.path_codes), dtype=bool)
+    for value in candidates:
+        affected |= tracker.affected(param, value)
+    affected_cases = np.flatnonzero(affected)
+    order = {code: affected_cases[indices] for code, indices in stratified_order(tracker.path_codes[affected_cases]).items()}
+
+    survivors = list(candidates)
+    size = start_size
+    while len(survivors) > finalists:
+        # Once the sample would reach every affected case the ranking is exact,
+        # so the last round scores them all and keeps just the finalists.
+        last_round = size >= len(affected_cases)
+        sample = affected_cases if last_round else stratified_sample(order, size)
+        sample_arrays = tuple(column[sample] for column in case_arrays)
+        errors = evaluate_configs_on_arrays([{**config, param: value} for value in survivors], sample_arrays)
+        keep = finalists if last_round else max(finalists, int(np.ceil(len(survivors) * keep_fraction)))
+        best = np.sort(np.argsort(errors, kind='stable')[:keep])
+        survivors = [survivors[i] for i in best]
+        if last_round:
+            break
+        size *= 2
+    return survivors
+
+def widen_search_space(search_space, points):
+    """search_space resampled to points evenly spaced values; integer grids are kept as they are."""
+    if not points or all(isinstance(value, (int, np.integer)) for value in search_space):
+        return search_space
+    return np.linspace(min(search_space), max(search_space), points)
+
+# Cases for worker processes, set once per worker by _init_worker so they
+# aren't pickled with every candidate config.
+_worker_cases = None
+
+def _init_worker(cases):
+    global _worker_cases
+    _worker_cases = cases
+
+def _score_config(config):
+    return get_total_error(config, _worker_cases)
+
+def score_configs(configs, cases, executor=None, vectorized=False, cache=None, evaluations=None):
+    """
+    Total errors for a list of configs, in the same order. With vectorized=True
+    they are scored in one evaluate_configs pass; with a ComponentCache, from
+    cached component columns; with an executor created by make_executor, in
+    worker processes. With an EvaluationCache only configs it doesn't hold are
+    scored, and their errors are added to it.
+    """
+    if evaluations is not None:
+        errors = [evaluations.get(config) for config in configs]
+        missing = [i for i, cached in enumerate(errors) if cached is None]
+        for i, error in zip(missing, score_configs([configs[i] for i in missing], cases, executor, vectorized, cache)):
+            evaluations.put(configs[i], error)
+            errors[i] = (error, None)
+        return [total_error for total_error, _ in errors]
+    if cache is not None:
+        return [cache.total_error(config) for config in configs]
+    if vectorized:
+        return list(evaluate_configs(configs, cases))
+    if executor is None:
+        return [get_total_error(config, cases) for config in configs]
+    return list(executor.map(_score_config, configs))
+
+def make_executor(workers, cases):
+    """A process pool whose workers hold the cases, or None for a single process."""
+    if not workers or workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cases,))
+
+# Path key per batch path code: the receipt path is shown only where it
+# splits a path into tiers.
+TUNER_PATH_KEYS = tuple(
+    f"{path} -> {receipt_path}" if path in ("NORMAL", "LONG_TRIP_TWO_TIER") else path
+    for path, receipt_path in BATCH_PATH_LABELS
+)
+
+def get_path_errors(config, cases, sample_size=5):
+    """
+    Calculates errors and aggregates them by calculation path. Cases are
+    streamed in chunks, so memory is O(paths) whatever the number of cases.
+    Returns (avg_error, sorted_paths) with (path_key, PathErrorSummary) pairs
+    by descending total error.
+    """
+    stats = stream_path_errors(cases, config=config, path_keys=TUNER_PATH_KEYS, sample_size=sample_size)
+    return stats.average, stats.sorted_paths()
+
+def get_average_error(config, cases, evaluations=None):
+    """Average error of config over cases, from the EvaluationCache when it holds config with its per-path errors."""
+    cached = evaluations.get(config) if evaluations is not None else None
+    if cached is not None and cached[1] is not None:
+        return cached[0] / len(cases) if cases else 0
+    avg_error, sorted_paths = get_path_errors(config, cases)
+    if evaluations is not None:
+        path_errors = {name: summary.total for name, summary in sorted_paths}
+        evaluations.put(config, avg_error * len(cases), path_errors)
+    return avg_error
+
+def save_checkpoint(path, state):
+    """Writes state as JSON, atomically, so an interrupted run never leaves half a checkpoint."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path, cases):
+    """The saved state at path if it exists and was written for the same cases and solution.py, else None."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        state = json.load(f)
+    if state.get('cases_digest') != cases_digest(cases):
+        print(f"Ignoring checkpoint {path}: it was written for different cases.")
+        return None
+    if state.get('code_digest') != code_digest():
+        print(f"Ignoring checkpoint {path}: solution.py has changed since it was written.")
+        return None
+    return state
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Coordinate-descent tuning of DEFAULT_CONFIG against public_cases.json.")
+    parser.add_argument('--line-search', action='store_true',
+                        help="Solve rate parameters exactly with a weighted-median line search instead of the grid "
+                             "(implies --vectorized scoring).")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for scoring candidate configs (default: 1).")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="Score all candidate values of a parameter in one NumPy pass (see evaluate_configs).")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Keep per-case errors and re-evaluate only the cases a candidate value can affect.")
+    parser.add_argument('--component-cache', action='store_true',
+                        help="Cache per-case component columns and recompute only those the tuned parameter reads.")
+    parser.add_argument('--parallel-groups', action='store_true',
+                        help="Tune groups that touch disjoint cases concurrently, each on its own case subset.")
+    parser.add_argument('--threshold-sweep', action='store_true',
+                        help="Solve branch thresholds exactly with a sorted sweep instead of the grid.")
+    parser.add_argument('--early-abandon', action='store_true',
+                        help="Stop scoring a candidate once its running error can't beat the incumbent, worst cases first.")
+    parser.add_argument('--screen', action='store_true',
+                        help="Screen grid candidates by successive halving on path-stratified samples before full scoring "
+                             "(faster, but may settle on a different config than the full grid).")
+    parser.add_argument('--grid-points', type=int, default=None,
+                        help="Resample each non-integer search space to this many points (e.g. 200 with --screen).")
+    parser.add_argument('--eval-cache', nargs='?', const='tuner_cache.sqlite', default=None,
+                        help="Reuse config evaluations across runs from this SQLite file (default: tuner_cache.sqlite).")
+    parser.add_argument('--checkpoint', nargs='?', const='tuner_checkpoint.json', default=None,
+                        help="Save progress after every group and resume from it (default: tuner_checkpoint.json).")
+    parser.add_argument('--max-iterations', type=int, default=10,
+                        help="Stop after this many coordinate-descent passes (default: 10).")
+    parser.add_argument('--profile', nargs='?', const='table', choices=['table', 'json'], default=None,
+                        help="Count calls and time per calculation path and helper in this process (not --workers "
+                             "processes), printed as a table (default) or JSON.")
+    return parser.parse_args(argv)
+
+def get_candidate_values(config, param, case_arrays, args):
+    """
+    The values to try for param: the exact line-search or sweep optimum when
+    available, else the grid (screened down to a few finalists with --screen).
+    """
+    search_space = widen_search_space(PARAM_SEARCH_SPACE[param], args.grid_points)
+    if args.line_search and param in RATE_PARAMS:
+        bounds = (min(search_space), max(search_space))
+        best_value = line_search_rate_param(config, param, case_arrays, bounds)
+        if best_value is not None:
+            return [best_value]
+    if args.threshold_sweep and param in THRESHOLD_PARAMS:
+        return [sweep_threshold_param(config, param, case_arrays, search_space)]
+    if args.screen:
+        return screen_candidates(config, param, search_space, case_arrays)
+    return search_space
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Memory-mapped columns, rebuilt from public_cases.json when it changes
+    cases = load_case_store('public_cases.json')
+
+    executor = make_executor(args.workers, cases)
+    evaluations = EvaluationCache(args.eval_cache, cases) if args.eval_cache else None
+    instrumentation = Instrumentation() if args.profile else None
+    if instrumentation is not None:
+        instrumentation.start()
+    try:
+        current_best_config = tune_config(DEFAULT_CONFIG.copy(), cases, args, executor, evaluations)
+    finally:
+        if instrumentation is not None:
+            instrumentation.stop()
+        if executor is not None:
+            executor.shutdown()
+        if evaluations is not None:
+            evaluations.close()
+
+    print("\n--- Tuning Complete ---")
+    print("Best configuration found:")
+    for key, value in current_best_config.items():
+        if DEFAULT_CONFIG.get(key) != value:
+            original_value = DEFAULT_CONFIG.get(key, 'N/A')
+            print(f"  - {key}: {value} (Original: {original_value})")
+
+    if instrumentation is not None:
+        print("\nCalls and time per calculation path and helper:")
+        instrumentation.dump(args.profile, sys.stdout)
+
+def error_cents(total_error):
+    """
+    Total error as whole cents. Every per-case error is a difference of two cent
+    amounts, so anything finer is summation noise that would otherwise break
+    exact ties differently depending on how (and over which cases) it was summed.
+    """
+    return round(float(total_error) * 100)
+
+def tune_group(current_best_config, params_to_tune, cases, case_arrays, args, executor=None, tracker=None, cache=None, scorer=None,
+               evaluations=None):
+    """
+    Coordinate descent over one parameter group. Returns the config to keep
+    (current_best_config itself if the group didn't improve) and the params
+    that changed.
+    """
+    # --- Tune parameters one by one (Coordinate Descent) ---
+    best_group_config = current_best_config.copy()
+    # Line search already runs on the batch engine, and its few candidates
+    # would otherwise be rescored one case at a time
+    vectorized = args.vectorized or args.line_search
+    if tracker is not None:
+        group_start_error = error_cents(tracker.total)
+    
+    for param_to_tune in params_to_tune:
+        best_param_value = best_group_config[param_to_tune]
+        search_space = get_candidate_values(best_group_config, param_to_tune, case_arrays, args)
+
+        if tracker is not None:
+            best_param_error = error_cents(tracker.total)
+            candidate_errors = [error_cents(tracker.score(param_to_tune, value)) for value in search_space]
+        else:
+            test_configs = []
+            for value in search_space:
+                test_config = best_group_config.copy()
+                test_config[param_to_tune] = value
+                test_configs.append(test_config)
+
+            if scorer is not None:
+                best_param_error = scorer.incumbent_error(best_group_config)
+                candidate_errors = scorer.candidate_errors(param_to_tune, search_space, best_param_error)
+            else:
+                # Score the current best params for this group and every candidate in one batch.
+                # Picking the winner in search-space order keeps the result independent of --workers.
+                errors = score_configs([best_group_config] + test_configs, cases, executor, vectorized, cache, evaluations)
+                best_param_error, *candidate_errors = [error_cents(e) for e in errors]
         
-        receipt_path_str = debug_info.get('receipt_path', 'N/A')
-        path_key = f"{debug_info['path']}"
-        if debug_info['path'] == "NORMAL":
-            path_key += f" -> {receipt_path_str}"
-        elif debug_info['path'] == "LONG_TRIP_TWO_TIER":
-            path_key += f" -> {receipt_path_str}"
+        for value, total_error_for_value in zip(search_space, candidate_errors):
+            if total_error_for_value < best_param_error:
+                best_param_error = total_error_for_value
+                best_param_value = value
         
-        if path_key not in path_buckets:
-            path_buckets[path_key] = []
-        path_buckets[path_key].append(e)
-        errors.append(e)
-    
-    path_total_errors = {name: sum(err['error'] for err in errs) for name, errs in path_buckets.items()}
-    sorted_paths = sorted(path_buckets.items(), key=lambda item: path_total_errors[item[0]], reverse=True)
-    
-    total_error = sum(e['error'] for e in errors) if errors else 0
-    avg_error = total_error / len(cases) if cases else 0
-    
-    return avg_error, sorted_paths
+        # Update the config for the next parameter in the group
+        best_group_config[param_to_tune] = best_param_value
+        if tracker is not None:
+            tracker.update(param_to_tune, best_param_value)
+
+    # Update the main config with the best found for the group
+    if tracker is not None:
+        initial_group_error, final_group_error = group_start_error, error_cents(tracker.total)
+    else:
+        errors = score_configs([current_best_config, best_group_config], cases, executor, vectorized, cache, evaluations)
+        initial_group_error, final_group_error = [error_cents(e) for e in errors]
+
+    if final_group_error < initial_group_error:
+        changed_params = {p: best_group_config[p] for p in params_to_tune if current_best_config[p] != best_group_config[p]}
+        return best_group_config, changed_params
+    if tracker is not None:
+        tracker.reset(current_best_config)
+    return current_best_config, {}
+
+def group_coverage(config, case_arrays, group_names=None):
+    """
+    For each group in group_names (default: all of PARAM_GROUPS), returns
+    (affected, movers, reach) case masks: the cases any value in the group's
+    search space can affect under the current paths, the cases whose path it
+    can change, and the cases it could affect on any path they can reach. A
+    case can reach its current path and any path one of these groups' values
+    moves it to, one parameter at a time as coordinate descent changes them.
+    """
+    days, miles, receipts, _ = case_arrays
+    tracker = CaseErrorTracker(config, case_arrays)
+    group_names = list(PARAM_GROUPS) if group_names is None else group_names
+    candidates = {
+        group_name: [(param, value) for param in PARAM_GROUPS[group_name] if param in PARAM_SEARCH_SPACE
+                     for value in PARAM_SEARCH_SPACE[param]]
+        for group_name in group_names
+    }
+    case_index = np.arange(len(days))
+    reachable = np.zeros((len(BATCH_PATH_LABELS), len(days)), dtype=bool)
+    reachable[tracker.path_codes, case_index] = True
+
+    affected, movers = {}, {}
+    for group_name in group_names:
+        affected[group_name] = np.zeros(len(days), dtype=bool)
+        movers[group_name] = np.zeros(len(days), dtype=bool)
+        for param, value in candidates[group_name]:
+            affected[group_name] |= tracker.affected(param, value)
+            _, path_codes = calculate_reimbursement_batch(days, miles, receipts, config={**config, param: value})
+            movers[group_name] |= path_codes != tracker.path_codes
+            reachable[path_codes, case_index] = True
+
+    coverage = {}
+    for group_name in group_names:
+        reach = affected[group_name].copy()
+        for code in np.flatnonzero(reachable.any(axis=1)):
+            on_path = np.full(len(days), code, dtype=np.int8)
+            for param, value in candidates[group_name]:
+                reach |= tracker.affected(param, value, on_path) & reachable[code]
+        coverage[group_name] = (affected[group_name], movers[group_name], reach)
+    return coverage
+
+def independent_group_batches(config, case_arrays, group_names=None):
+    """
+    Splits group_names (default: all of PARAM_GROUPS), in order, into batches
+    of groups that touch disjoint cases and can't move a case onto a path
+    another group in the batch reads. Groups in a batch can be tuned
+    concurrently on their own case subsets with the same result as tuning them
+    one after another.
+    """
+    group_names = list(PARAM_GROUPS) if group_names is None else group_names
+    coverage = group_coverage(config, case_arrays, group_names)
+
+    def independent(group_a, group_b):
+        affected_a, movers_a, reach_a = coverage[group_a]
+        affected_b, movers_b, reach_b = coverage[group_b]
+        return not ((affected_a & affected_b).any() or (movers_a & reach_b).any() or (movers_b & reach_a).any())
+
+    batches = []
+    for group_name in group_names:
+        if batches and all(independent(group_name, other) for other in batches[-1]):
+            batches[-1].append(group_name)
+        else:
+            batches.append([group_name])
+    return batches, {name: np.flatnonzero(affected) for name, (affected, _, _) in coverage.items()}
+
+def _tune_group_on_subset(task):
+    """Worker entry point: tunes one group against only the cases it can affect."""
+    params_to_tune, config, case_indices, args, cases = task
+    if cases is None:
+        cases = _worker_cases
+    subset = [cases[i] for i in case_indices]
+    subset_arrays = cases_to_arrays(subset)
+    tracker = CaseErrorTracker(config, subset_arrays) if args.incremental else None
+    cache = ComponentCache(subset_arrays) if args.component_cache else None
+    scorer = BoundedScorer(subset, subset_arrays) if args.early_abandon else None
+    evaluations = EvaluationCache(args.eval_cache, subset) if args.eval_cache else None
+    try:
+        return tune_group(config, params_to_tune, subset, subset_arrays, args, tracker=tracker, cache=cache, scorer=scorer,
+                          evaluations=evaluations)
+    finally:
+        if evaluations is not None:
+            evaluations.close()
+
+def tune_groups_in_parallel(current_best_config, cases, case_arrays, args, executor=None):
+    """
+    One coordinate-descent pass with independent groups tuned concurrently,
+    each against its own case subset, and their changes merged afterwards.
+    """
+    remaining = list(PARAM_GROUPS)
+    while remaining:
+        # A merged batch changes the paths cases take, so coverage is
+        # recomputed for the groups still to tune before picking the next batch
+        batches, group_cases = independent_group_batches(current_best_config, case_arrays, remaining)
+        batch = batches[0]
+        remaining = remaining[len(batch):]
+        print(f"\n...Tuning Groups {batch} concurrently...")
+        tasks = []
+        for group_name in batch:
+            params_to_tune = [p for p in PARAM_GROUPS[group_name] if p in PARAM_SEARCH_SPACE]
+            print(f"  > '{group_name}': {len(group_cases[group_name])} of {len(cases)} cases")
+            tasks.append((params_to_tune, current_best_config, group_cases[group_name], args,
+                          None if executor is not None else cases))
 
-def main():
-    with open('public_cases.json', 'r') as f:
-        cases = json.load(f)
+        results = executor.map(_tune_group_on_subset, tasks) if executor is not None else map(_tune_group_on_subset, tasks)
+        merged_config = current_best_config.copy()
+        for group_name, (_, changed_params) in zip(batch, results):
+            if changed_params:
+                print(f"  > Found better params for group '{group_name}': {changed_params}")
+                merged_config.update(changed_params)
+        current_best_config = merged_config
+    return current_best_config
 
-    current_best_config = DEFAULT_CONFIG.copy()
+def tune_config(current_best_config, cases, args, executor=None, evaluations=None):
+    """
+    Runs coordinate descent over PARAM_GROUPS starting from current_best_config
+    and returns the best config. With --checkpoint, progress is saved after
+    every group and a run resumes from the last completed group.
+    """
+    case_arrays = cases_to_arrays(cases)
+    group_names = list(PARAM_GROUPS)
     
     print(f"\n--- Starting Iterative Tuning ---")
-    
-    last_error, _ = get_path_errors(current_best_config, cases)
-    print(f"Starting with baseline average error: {last_error:.2f}")
 
-    MAX_ITERATIONS = 10
+    MAX_ITERATIONS = args.max_iterations
     MIN_IMPROVEMENT = 0.01
 
-    for i in range(MAX_ITERATIONS):
+    checkpoint = load_checkpoint(args.checkpoint, cases)
+    if checkpoint is not None:
+        current_best_config = {**current_best_config, **checkpoint['config']}
+        if checkpoint['done']:
+            print(f"Checkpoint {args.checkpoint} is from a completed run; nothing to resume.")
+            return current_best_config
+        start_iteration, start_group = checkpoint['iteration'], checkpoint['next_group']
+        last_error = checkpoint['last_error']
+        print(f"Resuming from {args.checkpoint}: iteration {start_iteration + 1}, group {start_group + 1}/{len(group_names)}")
+    else:
+        start_iteration, start_group = 0, 0
+        last_error = get_average_error(current_best_config, cases, evaluations)
+        print(f"Starting with baseline average error: {last_error:.2f}")
+
+    def save_progress(iteration, next_group, done=False):
+        if args.checkpoint:
+            save_checkpoint(args.checkpoint, {
+                'cases_digest': cases_digest(cases), 'code_digest': code_digest(),
+                'config': canonical_config(current_best_config),
+                'iteration': iteration, 'next_group': next_group, 'last_error': last_error, 'done': done,
+            })
+
+    # With --incremental, per-case errors of the group's best config are kept
+    # and only the cases a candidate can affect are re-evaluated.
+    tracker = CaseErrorTracker(current_best_config, case_arrays) if args.incremental else None
+    # With --component-cache, only the component columns a candidate changes are recomputed
+    cache = ComponentCache(case_arrays) if args.component_cache else None
+    # With --early-abandon, candidates stop scoring once they can't beat the incumbent
+    scorer = BoundedScorer(cases, case_arrays) if args.early_abandon else None
+
+    # Iterations completed so far, for the final checkpoint; the loop may not run at all
+    completed_iterations = start_iteration
+    for i in range(start_iteration, MAX_ITERATIONS):
         print(f"\n--- Iteration {i+1}/{MAX_ITERATIONS} ---")
         error_at_start_of_iteration = last_error
-        
-        # Tune parameter groups
-        for group_name, params_to_tune in PARAM_GROUPS.items():
-            
-            print(f"\n...Tuning Group '{group_name}'...")
-            
-            params_to_tune_filtered = [p for p in params_to_tune if p in PARAM_SEARCH_SPACE]
-            if len(params_to_tune_filtered) != len(params_to_tune):
-                 print(f"  > Warning: Some params for this group are not in search space and will be skipped.")
-            
-            # --- Tune parameters one by one (Coordinate Descent) ---
-            best_group_config = current_best_config.copy()
-            
-            for param_to_tune in params_to_tune_filtered:
-                best_param_value = best_group_config[param_to_tune]
-                # Calculate error with the current best params for this group
-                best_param_error = sum(abs(calculate_reimbursement(**c['input'], config=best_group_config) - c['expected_output']) for c in cases)
-
-                search_space = PARAM_SEARCH_SPACE[param_to_tune]
+
+        if args.parallel_groups:
+            current_best_config = tune_groups_in_parallel(current_best_config, cases, case_arrays, args, executor)
+        else:
+            # Tune parameter groups
+            for group_index, group_name in enumerate(group_names):
+                if i == start_iteration and group_index < start_group:
+                    continue
+                params_to_tune = PARAM_GROUPS[group_name]
                 
-                for value in search_space:
-                    test_config = best_group_config.copy()
-                    test_config[param_to_tune] = value
-                    
-                    total_error_for_value = sum(abs(calculate_reimbursement(**c['input'], config=test_config) - c['expected_output']) for c in cases)
-
-                    if total_error_for_value < best_param_error:
-                        best_param_error = total_error_for_value
-                        best_param_value = value
+                print(f"\n...Tuning Group '{group_name}'...")
                 
-                # Update the config for the next parameter in the group
-                best_group_config[param_to_tune] = best_param_value
+                params_to_tune_filtered = [p for p in params_to_tune if p in PARAM_SEARCH_SPACE]
+                if len(params_to_tune_filtered) != len(params_to_tune):
+                     print(f"  > Warning: Some params for this group are not in search space and will be skipped.")
 
-            # Update the main config with the best found for the group
-            initial_group_error = sum(abs(calculate_reimbursement(**c['input'], config=current_best_config) - c['expected_output']) for c in cases)
-            final_group_error = sum(abs(calculate_reimbursement(**c['input'], config=best_group_config) - c['expected_output']) for c in cases)
-
-            if final_group_error < initial_group_error:
-                changed_params = {p: best_group_config[p] for p in params_to_tune_filtered if current_best_config[p] != best_group_config[p]}
+                current_best_config, changed_params = tune_group(
+                    current_best_config, params_to_tune_filtered, cases, case_arrays, args, executor, tracker, cache, scorer,
+                    evaluations
+                )
                 if changed_params:
                     print(f"  > Found better params for this group: {changed_params}")
-                current_best_config = best_group_config.copy()
+                save_progress(i, group_index + 1)
         
         # Check overall improvement after a full pass
-        current_error, _ = get_path_errors(current_best_config, cases)
+        current_error = get_average_error(current_best_config, cases, evaluations)
+        completed_iterations = i + 1
         print(f"\n--- End of Iteration {i+1} ---")
         print(f"Average error after this pass: {current_error:.2f}")
+        if scorer is not None:
+            total = scorer.evaluated + scorer.saved
+            print(f"Early abandon: {scorer.evaluated} case evaluations, {scorer.saved} of {total} saved ({scorer.saved / max(1, total):.0%})")
+            scorer.reset_stats()
         
         improvement = error_at_start_of_iteration - current_error
         if improvement < MIN_IMPROVEMENT:
             print(f"Improvement ({improvement:.2f}) is less than threshold ({MIN_IMPROVEMENT}). Stopping.")
             break
         last_error = current_error
+        save_progress(i + 1, 0)
 
-    print("\n--- Tuning Complete ---")
-    print("Best configuration found:")
-    for key, value in current_best_config.items():
-        if DEFAULT_CONFIG.get(key) != value:
-            original_value = DEFAULT_CONFIG.get(key, 'N/A')
-            print(f"  - {key}: {value} (Original: {original_value})")
+    save_progress(completed_iterations, 0, done=True)
+
+    if cache is not None:
+        print(f"Component columns recomputed: {cache.columns_computed}, reused from cache: {cache.columns_reused}")
+    if evaluations is not None:
+        print(f"Evaluation cache: {evaluations.hits} hits, {evaluations.misses} misses")
+
+    return current_best_config
 
 if __name__ == '__main__':
     main()
\ No newline at end of file